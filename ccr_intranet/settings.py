@@ -43,10 +43,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'sitio_web.instrumentation.SQLInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'sitio_web.middleware.RoleMiddleware',
+    'sitio_web.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,6 +66,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'sitio_web.context_processors.unread_messages',
             ],
         },
     },
@@ -74,13 +78,80 @@ WSGI_APPLICATION = 'ccr_intranet.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite con varios procesos escribiendo a la vez (cuadrillas registrando avances):
+# - WAL: las lecturas no bloquean a las escrituras ni al revés;
+# - busy_timeout: una escritura espera el bloqueo en vez de fallar con "database is locked";
+# - synchronous=NORMAL: seguro con WAL y mucho más rápido que FULL;
+# - cache_size negativo = KiB de caché de páginas por conexión;
+# - transaction_mode IMMEDIATE: las transacciones piden el bloqueo de escritura al
+#   empezar, cuando busy_timeout todavía puede esperar (con DEFERRED el choque aparece
+#   a mitad de la transacción y SQLite falla sin esperar).
+# Las vistas que escriben además reintentan con backoff (sitio_web/retry.py).
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA busy_timeout=5000;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        # Conexiones persistentes (segundos): se ahorra abrir la base y correr los
+        # PRAGMA en cada petición. Con CONN_HEALTH_CHECKS se descartan las caídas.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Reintentos de las vistas que escriben cuando SQLite sigue bloqueada tras busy_timeout.
+DB_LOCK_RETRY_ATTEMPTS = 4
+DB_LOCK_RETRY_BASE_DELAY = 0.05  # segundos; se duplica en cada intento (con jitter)
+DB_LOCK_RETRY_MAX_DELAY = 1.0
+
+# Réplicas de solo lectura (sitio_web/routers.py). Las vistas de
+# DATABASE_REPLICA_VIEWS leen de una de ellas cuando la petición es GET; las
+# escrituras van siempre a 'default' y, tras escribir, la sesión lee del
+# primario durante DATABASE_REPLICA_STICKY_SECONDS (margen del retraso de
+# replicación). Para probarlo en local con una segunda base SQLite:
+#   DATABASES['replica'] = {
+#       'ENGINE': 'django.db.backends.sqlite3',
+#       'NAME': BASE_DIR / 'db_replica.sqlite3',
+#       'OPTIONS': SQLITE_OPTIONS,
+#       'TEST': {'MIRROR': 'default'},
+#   }
+#   DATABASE_REPLICAS = ['replica']
+# y copiar el primario con `manage.py sync_sqlite_replicas` (cada vez que se
+# quiera "replicar"). Con Postgres, 'replica' apunta al servidor en standby.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['sitio_web.routers.ReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = 10
+DATABASE_REPLICA_VIEWS = {
+    'dashboard',
+    'client_project_detail',
+    'client_inbox',
+    'staff_inbox',
+    'staff_project_documents',
+    'project_progress_series',
+    'search',
+    'export_projects',
+    'export_messages',
+}
+
+
+# Authentication backends
+# El backend propio carga User y Profile en una sola consulta por petición.
+
+AUTHENTICATION_BACKENDS = [
+    'sitio_web.backends.ProfileModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -117,11 +188,220 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# En producción (DEBUG=False), collectstatic copia los estáticos con el hash del
+# contenido en el nombre (staticfiles.json) y genera versiones .gz/.br de CSS y JS
+# (sitio_web/storage.py; .br solo con el paquete `brotli` instalado). Así se pueden
+# cachear para siempre. En desarrollo se sirven tal cual desde las apps.
+# Lo ideal es que nginx los sirva:
+#   location /static/ {
+#       alias /ruta/a/staticfiles/;
+#       gzip_static on; brotli_static on;
+#       add_header Cache-Control "public, max-age=31536000, immutable";
+#   }
+# Sin servidor delante, STATIC_SERVE=True los sirve desde Django (sitio_web/static_serve.py)
+# con las mismas cabeceras y las versiones precomprimidas.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'sitio_web.storage.PrecompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+STATIC_SERVE = False
+STATIC_UNHASHED_MAX_AGE = 3600  # segundos, para archivos pedidos sin hash
 
 # Configuración para archivos subidos por usuarios (imágenes, documentos)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Subida de documentos por partes (sitio_web/uploads.py).
+# Las partes se guardan fuera de MEDIA_ROOT hasta que la subida se finaliza.
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'chunked_uploads')
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024       # 8 MB por parte
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 2 GB por archivo
+CHUNKED_UPLOAD_EXPIRY_HOURS = 48                 # subidas abandonadas se purgan después de esto
+
+# Descarga de documentos (sitio_web/downloads.py).
+# None: Django transmite el archivo por bloques.
+# 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache): el proxy hace la transferencia
+# tras el control de permisos. En producción, la carpeta project_documents/ no debe
+# publicarse bajo MEDIA_URL; solo debe ser accesible como location "internal".
+DOCUMENT_DOWNLOAD_SENDFILE = None
+DOCUMENT_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# Cola de tareas en segundo plano (sitio_web/jobs.py, `manage.py runworker`)
+JOBS_MAX_ATTEMPTS = 5           # intentos antes de marcar el Job como FALLIDO
+JOBS_BACKOFF_BASE = 10          # segundos; se duplica en cada reintento (con jitter)
+JOBS_BACKOFF_MAX = 3600         # tope de espera entre reintentos
+JOBS_VISIBILITY_TIMEOUT = 300   # si un worker no termina en este tiempo, otro lo retoma
+JOBS_POLL_INTERVAL = 1.0        # espera del worker cuando la cola está vacía
+
+# Eventos en vivo por SSE (sitio_web/events.py). Requiere servir la app con un
+# servidor ASGI (uvicorn/daphne) para que las conexiones abiertas no ocupen hilos.
+# Con varios procesos, EVENTS_BROKER_SOCKET_DIR activa el reenvío de eventos entre
+# ellos por sockets Unix (una carpeta local compartida, p. ej. '/run/ccr_events').
+EVENTS_BROKER_SOCKET_DIR = None
+EVENTS_HEARTBEAT_SECONDS = 15       # comentario keepalive para proxies
+EVENTS_MAX_STREAM_SECONDS = 15 * 60  # luego el navegador reconecta y recarga permisos
+EVENTS_RETRY_MS = 3000              # espera sugerida al navegador antes de reconectar
+EVENTS_QUEUE_SIZE = 100             # eventos pendientes por conexión antes de cortarla
+
+# Vistas async (sitio_web/concurrency.py): las consultas independientes de una vista
+# se ejecutan a la vez, cada una en su propio hilo y conexión. Se desactiva solo con
+# SQLite en memoria o dentro de transacciones; poner False para forzar la secuencia.
+# Los hilos son de un pool propio de ASYNC_PARALLEL_WORKERS, cada uno con su conexión
+# persistente: por proceso se abren como mucho esa cantidad de conexiones extra.
+ASYNC_PARALLEL_QUERIES = True
+ASYNC_PARALLEL_WORKERS = 4
+
+# Cachés en archivos: fuera del árbol del proyecto, para que no queden junto al
+# código (ni en sus copias o respaldos). FileBasedCache crea las carpetas con
+# permisos 0700 y los archivos con 0600: solo los lee el usuario del servidor.
+FILE_CACHE_ROOT = os.environ.get('CCR_FILE_CACHE_ROOT', '/var/tmp/ccr_intranet')
+
+# Cache. 'fragments' guarda las tarjetas de proyecto renderizadas (sitio_web/fragments.py).
+# LocMemCache es por proceso: sirve en desarrollo, pero con varios workers de gunicorn
+# cada uno tendría su copia y no vería las invalidaciones de los demás. En producción
+# usar un cache compartido, por ejemplo:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': '/var/tmp/ccr_fragments',
+# o memcached por socket:
+#   'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+#   'LOCATION': 'unix:/run/memcached/memcached.sock',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ccr-default',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ccr-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Sesiones y usuarios: tiene que verse igual desde todos los procesos (un
+    # logout o un cambio de rol no puede quedar solo en la memoria de un worker),
+    # por eso es en archivos y no LocMem. Memcached/Redis también sirven.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(FILE_CACHE_ROOT, 'sessions'),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    # Contadores del límite de intentos, aparte: se escriben en cada intento de
+    # login y su poda (MAX_ENTRIES) no debe desalojar sesiones.
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(FILE_CACHE_ROOT, 'ratelimit'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+FRAGMENT_CACHE_ALIAS = 'fragments'
+FRAGMENT_CACHE_TIMEOUT = 24 * 3600  # segundos; las invalidaciones por señal llegan antes
+
+# Páginas públicas completas para visitantes anónimos (sitio_web/http_cache.py).
+# No hay invalidación: el contenido solo cambia con un despliegue, así que el
+# timeout acota cuánto tarda en verse una versión nueva. Con un cache compartido
+# (ver arriba), cambiar VERSION/KEY_PREFIX del alias al desplegar la vacía.
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 600  # segundos
+
+# Sesiones: cached_db lee de la caché y escribe en la caché y en la tabla
+# django_session (que sigue siendo la fuente si la caché se pierde). Una petición
+# autenticada no consulta la base para la sesión.
+# Alternativa sin estado: 'django.contrib.sessions.backends.signed_cookies'
+# (la sesión viaja firmada en la cookie), pero un logout no invalida copias de
+# la cookie y todo lo que se guarda en la sesión va y vuelve en cada petición.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+# Barrido de sesiones vencidas de django_session (tarea clear_expired_sessions,
+# se programa sola al iniciar `manage.py runworker`).
+SESSION_SWEEP_INTERVAL = 6 * 3600  # segundos
+
+# Usuario + perfil (rol, contador de no leídos) cacheados por el backend de
+# autenticación (sitio_web/backends.py); se invalidan al guardar User o Profile.
+# Solo se guardan los campos para autorizar la petición, nunca el hash de la contraseña.
+USER_CACHE_ALIAS = 'sessions'
+USER_CACHE_TIMEOUT = 15 * 60  # segundos
+
+# Límite de intentos de login y registro (sitio_web/ratelimit.py): cada intento
+# de login cuesta un hash PBKDF2 y un registro los validadores de contraseña; una
+# ráfaga de credential stuffing dejaría sin CPU a los workers. Por vista, tipo de
+# clave -> (intentos, período en segundos), en ventana deslizante. 'global' cuenta
+# todos los intentos juntos (frena registros masivos desde muchas IPs); en el login
+# no se usa: un atacante bloquearía el acceso de todos los usuarios legítimos.
+# Excedido el límite se responde 429 sin ejecutar la vista; `manage.py ratelimit_stats`
+# muestra los contadores. La caché tiene que ser compartida entre procesos.
+# Con FileBasedCache, add()/incr() no son atómicos entre procesos (leen y reescriben
+# el archivo): con intentos simultáneos se pierden incrementos y el límite efectivo
+# queda algo por encima del configurado. Con memcached o Redis incr() es atómico.
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE_ALIAS = 'ratelimit'
+RATELIMIT_RULES = {
+    'login': {'ip': (20, 60), 'username': (10, 300)},
+    'register': {'ip': (5, 3600), 'global': (60, 3600)},
+}
+# Detrás de nginx, REMOTE_ADDR es el proxy: indicar la cabecera que este completa
+# (p. ej. 'X-Real-IP' o 'X-Forwarded-For'). None = usar REMOTE_ADDR.
+RATELIMIT_CLIENT_IP_HEADER = None
+
+# Instrumentación SQL por petición (sitio_web/instrumentation.py): cabecera
+# Server-Timing, una línea de log por petición en 'sitio_web.sql', avisos de
+# posibles N+1 y las consultas lentas en el log 'sitio_web.sql.slow'.
+SQL_INSTRUMENTATION = True
+SQL_SLOW_QUERY_MS = 100         # consultas desde este tiempo van al log lento
+SQL_DUPLICATE_THRESHOLD = 5     # misma consulta (salvo literales) N veces = posible N+1
+# Máximo de consultas por vista (nombre de ruta), incluidas sesión y usuario
+# (que normalmente salen de la caché, pero no en la primera petición).
+# Si una petición lo supera, se registra un aviso.
+SQL_QUERY_BUDGETS = {
+    'dashboard': 4,
+    'client_inbox': 4,
+    'staff_inbox': 4,
+    'client_project_detail': 4,
+    'admin_user_management': 3,
+    'search': 3,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_sql': {
+            'class': 'logging.FileHandler',
+            'filename': os.path.join(BASE_DIR, 'slow_queries.log'),
+            'delay': True,  # el archivo se crea con la primera consulta lenta
+            'encoding': 'utf-8',
+        },
+    },
+    'loggers': {
+        # INFO para ver la línea de cada petición; WARNING solo muestra N+1 y presupuestos.
+        'sitio_web.sql': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'sitio_web.sql.slow': {
+            'handlers': ['slow_sql', 'console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        # Un aviso por cada intento bloqueado por el limitador de login/registro.
+        'sitio_web.ratelimit': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
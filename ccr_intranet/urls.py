@@ -1,14 +1,19 @@
 # ccr_intranet/urls.py
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from sitio_web.static_serve import serve_static
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('sitio_web.urls')),
 ]
 
+if settings.STATIC_SERVE:
+    urlpatterns += [re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'), serve_static)]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
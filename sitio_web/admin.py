@@ -1,7 +1,9 @@
 # sitio_web/admin.py
 
 from django.contrib import admin
-from .models import Profile, Project, ProjectAssignment, ProjectUpdate, Document, Message
+from .models import (
+    Profile, Project, ProjectAssignment, ProjectUpdate, ProjectProgressSnapshot, Document, ChunkedUpload, Message, MessageThread, Job,
+)
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
@@ -42,14 +44,40 @@ class ProjectUpdateAdmin(admin.ModelAdmin):
     list_filter = ('project', 'author', 'date')
     search_fields = ('project__name', 'author__username', 'comment')
 
+@admin.register(ProjectProgressSnapshot)
+class ProjectProgressSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('project', 'date', 'progress_percent', 'updates_count')
+    list_filter = ('project',)
+    date_hierarchy = 'date'
+
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-    list_display = ('title', 'project', 'uploaded_by', 'uploaded_at', 'visible_to_client')
+    list_display = ('title', 'original_filename', 'project', 'uploaded_by', 'uploaded_at', 'visible_to_client')
     list_filter = ('visible_to_client', 'uploaded_at')
-    search_fields = ('title', 'project__name', 'uploaded_by__username')
+    search_fields = ('title', 'original_filename', 'project__name', 'uploaded_by__username')
+    readonly_fields = ('sha256', 'size')
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'project', 'uploaded_by', 'total_size', 'status', 'updated_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'updated_at', 'sha256')
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ('subject', 'sender', 'receiver', 'project', 'sent_at', 'is_read')
     list_filter = ('is_read', 'sent_at')
-    search_fields = ('subject', 'body', 'sender__username', 'receiver__username')
\ No newline at end of file
+    search_fields = ('subject', 'body', 'sender__username', 'receiver__username')
+
+@admin.register(MessageThread)
+class MessageThreadAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'client', 'project', 'message_count', 'last_message_at')
+    search_fields = ('subject', 'client__username')
+    raw_id_fields = ('last_message',)
+    filter_horizontal = ('participants',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created_at', 'finished_at', 'last_error')
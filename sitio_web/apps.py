@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class SitioWebConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sitio_web'
+
+    def ready(self):
+        # Registra los receptores de señales de la app.
+        from . import signals  # noqa: F401
+
+        # Medición de consultas por petición (ver instrumentation.py).
+        from django.db.backends.signals import connection_created
+        from .instrumentation import install_execute_wrapper
+        connection_created.connect(install_execute_wrapper, dispatch_uid='sitio_web_sql_instrumentation')
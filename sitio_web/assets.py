@@ -0,0 +1,115 @@
+# sitio_web/assets.py
+
+import json
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+# Librerías de terceros servidas desde nuestros estáticos (versiones fijas).
+# nombre -> (URL de origen, ruta dentro de static/). `manage.py vendor_static_assets`
+# las descarga (no se versionan en el repositorio); mientras no estén descargadas,
+# las plantillas usan la URL de origen en jsDelivr.
+VENDOR_ASSETS = {
+    'bootstrap.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+        'sitio_web/vendor/bootstrap-5.3.0/bootstrap.min.css',
+    ),
+    'bootstrap.js': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.min.js',
+        'sitio_web/vendor/bootstrap-5.3.0/bootstrap.min.js',
+    ),
+    'bootstrap.bundle.js': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+        'sitio_web/vendor/bootstrap-5.3.0/bootstrap.bundle.min.js',
+    ),
+    'popper.js': (
+        'https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.6/dist/umd/popper.min.js',
+        'sitio_web/vendor/popper-2.11.6/popper.min.js',
+    ),
+    'bootstrap-icons.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/bootstrap-icons.css',
+        'sitio_web/vendor/bootstrap-icons-1.10.0/bootstrap-icons.css',
+    ),
+}
+
+# Archivos que las librerías cargan por su cuenta (fuentes referenciadas desde el CSS).
+VENDOR_FILES = [
+    (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff2',
+        'sitio_web/vendor/bootstrap-icons-1.10.0/fonts/bootstrap-icons.woff2',
+    ),
+    (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff',
+        'sitio_web/vendor/bootstrap-icons-1.10.0/fonts/bootstrap-icons.woff',
+    ),
+]
+
+# Imágenes de la página pública con variantes por ancho
+# (`manage.py build_responsive_images`).
+RESPONSIVE_IMAGES = [
+    'sitio_web/images/hero-construction.jpg',
+    'sitio_web/images/project1.jpg',
+    'sitio_web/images/project2.jpg',
+    'sitio_web/images/project3.avif',
+]
+RESPONSIVE_WIDTHS = (480, 800, 1200, 1600)
+RESPONSIVE_DIR = 'sitio_web/images/responsive'
+RESPONSIVE_MANIFEST = f'{RESPONSIVE_DIR}/manifest.json'
+
+
+@lru_cache(maxsize=None)
+def _is_vendored(path):
+    return finders.find(path) is not None
+
+
+def vendor_url(name):
+    """
+    URL de una librería de VENDOR_ASSETS: la copia local si ya se corrió
+    `vendor_static_assets`, o la de jsDelivr si no. Las copias no están en el
+    repositorio, así que sin ese paso de despliegue la página depende del CDN.
+    """
+    source_url, path = VENDOR_ASSETS[name]
+    return static(path) if _is_vendored(path) else source_url
+
+
+@lru_cache(maxsize=None)
+def responsive_manifest():
+    """
+    {imagen original: {'width', 'height', 'variants': {formato: {ancho: ruta}}}}
+    según el manifest que escribe build_responsive_images ({} si no existe).
+    """
+    path = finders.find(RESPONSIVE_MANIFEST)
+    if path is None:
+        return {}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def responsive_sources(image_path):
+    """
+    Datos para un <picture>: fuentes por formato con su srcset y la imagen
+    de respaldo. Sin variantes generadas, solo la imagen original.
+    """
+    entry = responsive_manifest().get(image_path)
+    if not entry:
+        return {'src': static(image_path), 'sources': [], 'srcset': '', 'width': None, 'height': None}
+
+    def srcset(variants):
+        return ', '.join(f'{static(path)} {width}w' for width, path in sorted(variants.items(), key=lambda i: int(i[0])))
+
+    variants = entry['variants']
+    fallback = variants.get('jpeg', {})
+    # Para navegadores sin srcset: un ancho intermedio, no el mayor.
+    default_width = max((w for w in fallback if int(w) <= 800), key=int, default=None) or min(fallback, key=int, default=None)
+    return {
+        'src': static(fallback[default_width]) if default_width else static(image_path),
+        'srcset': srcset(fallback),
+        # De más a menos eficiente: el navegador toma el primero que soporta.
+        'sources': [
+            {'type': f'image/{fmt}', 'srcset': srcset(variants[fmt])}
+            for fmt in ('avif', 'webp') if variants.get(fmt)
+        ],
+        'width': entry['width'],
+        'height': entry['height'],
+    }
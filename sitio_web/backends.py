@@ -0,0 +1,131 @@
+# sitio_web/backends.py
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Lo que se guarda del usuario en la caché: lo necesario para autorizar la
+# petición y armar el menú. El hash de la contraseña no sale de la base.
+CACHED_USER_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'email',
+    'is_active', 'is_staff', 'is_superuser', 'last_login', 'date_joined',
+)
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _session_secrets():
+    return [settings.SECRET_KEY, *settings.SECRET_KEY_FALLBACKS]
+
+
+def _field_values(instance, names=None):
+    # {attname: valor} en el orden de los campos del modelo, el que espera from_db().
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if names is None or field.attname in names
+    }
+
+
+def _from_values(model, values):
+    return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def _cache_entry(user):
+    """
+    Datos de User + Profile para la caché. En lugar de la contraseña van los
+    hashes de sesión (HMAC de la contraseña con SECRET_KEY y sus fallbacks),
+    que es lo único para lo que la petición la necesita.
+    """
+    profile = getattr(user, 'profile', None)
+    return {
+        'user': _field_values(user, CACHED_USER_FIELDS),
+        'profile': _field_values(profile) if profile else None,
+        'session_hashes': [user._get_session_auth_hash(secret=secret) for secret in _session_secrets()],
+    }
+
+
+def _user_from_entry(entry):
+    """
+    Reconstruye el User desde la caché. La contraseña queda diferida: si
+    algo la usara se leería de la base, y save() no la pisa.
+    """
+    from .models import Profile
+
+    user = _from_values(get_user_model(), entry['user'])
+    if entry['profile'] is not None:
+        user.profile = _from_values(Profile, entry['profile'])
+
+    hashes = dict(zip(_session_secrets(), entry['session_hashes']))
+
+    def session_auth_hash(secret=None):
+        # Con una SECRET_KEY que no estaba al cachear, la sesión no se valida.
+        return hashes.get(secret or settings.SECRET_KEY, '')
+    # Lo llaman get_user()/aget_user() de django.contrib.auth para validar la sesión.
+    user._get_session_auth_hash = session_auth_hash
+    return user
+
+
+def invalidate_cached_users(user_ids):
+    """
+    Descarta de la caché los usuarios indicados (con su perfil). Se repite
+    al confirmar la transacción: si otra petición leyó la fila vieja
+    mientras tanto y la volvió a guardar, no queda en la caché.
+    """
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    cache = caches[settings.USER_CACHE_ALIAS]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    Backend de autenticación que carga el Profile junto con el User
+    en una sola consulta, para que resolver el rol no cueste otra ida a la BD.
+
+    El par User + Profile queda en la caché USER_CACHE_ALIAS (sin el hash de
+    la contraseña, ver _cache_entry): las peticiones siguientes no consultan
+    la base. Las señales de User y Profile y los contadores de no leídos
+    (sitio_web/unread.py) lo invalidan.
+    """
+
+    def _users(self):
+        return get_user_model()._default_manager.select_related('profile')
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        cache = caches[settings.USER_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            try:
+                user = self._users().get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, _cache_entry(user), settings.USER_CACHE_TIMEOUT)
+        else:
+            user = _user_from_entry(entry)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # Versión async (request.auser()): el perfil también debe venir cargado,
+        # porque en un contexto async no se puede resolver de forma perezosa.
+        UserModel = get_user_model()
+        cache = caches[settings.USER_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        entry = await cache.aget(key)
+        if entry is None:
+            try:
+                user = await self._users().aget(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            await cache.aset(key, _cache_entry(user), settings.USER_CACHE_TIMEOUT)
+        else:
+            user = _user_from_entry(entry)
+        return user if self.user_can_authenticate(user) else None
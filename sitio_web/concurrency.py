@@ -0,0 +1,126 @@
+# sitio_web/concurrency.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+
+# Cuánto contenido (bytes o caracteres) se junta en cada salto al hilo de la
+# petición al transmitir una respuesta bajo ASGI (ver streaming_content).
+STREAM_BATCH_SIZE = 64 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _parallel_executor():
+    """
+    Pool propio y chico (ASYNC_PARALLEL_WORKERS hilos) para run_concurrently.
+    Cada hilo guarda su conexión a la base (CONN_MAX_AGE): con el pool por
+    defecto del loop, que crece según los núcleos, quedarían muchas abiertas.
+    Así hay como mucho ASYNC_PARALLEL_WORKERS por proceso.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_PARALLEL_WORKERS,
+                    thread_name_prefix='ccr-parallel-db',
+                )
+    return _executor
+
+
+def _run_and_release(func):
+    """
+    Ejecuta `func` en un hilo del pool y luego cierra la conexión de ese hilo
+    si ya no sirve o superó CONN_MAX_AGE, igual que al final de una petición.
+    """
+    try:
+        return func()
+    finally:
+        for connection in connections.all(initialized_only=True):
+            connection.close_if_unusable_or_obsolete()
+
+
+def _can_run_in_parallel():
+    if not settings.ASYNC_PARALLEL_QUERIES:
+        return False
+    for alias in connections:
+        connection = connections[alias]
+        # Dentro de una transacción, las consultas deben usar la misma conexión.
+        if connection.in_atomic_block:
+            return False
+        # SQLite en memoria: cada hilo vería una base distinta.
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            return False
+    return True
+
+
+async def run_concurrently(*funcs):
+    """
+    Ejecuta varias funciones síncronas con consultas independientes y
+    devuelve sus resultados en el mismo orden.
+
+    El ORM async de Django (aget, async for) pasa cada consulta por un único
+    hilo, así que dos consultas "en paralelo" se ejecutan una tras otra. Aquí
+    cada función corre en su propio hilo y con su propia conexión, de modo que
+    las consultas sí se solapan. Si la base no lo permite (ver
+    ASYNC_PARALLEL_QUERIES), se ejecutan en secuencia.
+
+    Las funciones deben devolver datos ya evaluados (listas, no querysets).
+    """
+    # Las conexiones son por hilo: la transacción abierta, si la hay, está en
+    # el hilo de la petición (thread_sensitive), no en el del loop.
+    if not await sync_to_async(_can_run_in_parallel)():
+        return [await sync_to_async(func)() for func in funcs]
+    executor = _parallel_executor()
+    return await asyncio.gather(*(
+        sync_to_async(_run_and_release, thread_sensitive=False, executor=executor)(func) for func in funcs
+    ))
+
+
+def streaming_content(request, iterable):
+    """
+    Contenido para un StreamingHttpResponse que se transmite a medida que se
+    genera tanto con WSGI como con ASGI.
+
+    Bajo ASGI, Django consume un iterador síncrono con sync_to_async(list):
+    arma la respuesta entera en memoria antes de mandar el primer byte. Ahí
+    se devuelve un iterador async que avanza el síncrono en el hilo de la
+    petición (thread_sensitive: las consultas de un .iterator() siguen en su
+    conexión), de a lotes de unos STREAM_BATCH_SIZE para no saltar de hilo
+    por cada fila.
+    """
+    if not isinstance(request, ASGIRequest):
+        return iterable
+    return _iterate_in_batches(iter(iterable))
+
+
+async def _iterate_in_batches(iterator):
+    def next_batch():
+        parts, size = [], 0
+        for chunk in iterator:
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_BATCH_SIZE:
+                break
+        return parts
+
+    pull = sync_to_async(next_batch, thread_sensitive=True)
+    try:
+        while True:
+            parts = await pull()
+            if not parts:
+                break
+            # Todas las partes son del mismo tipo (str o bytes).
+            yield parts[0][:0].join(parts)
+    finally:
+        # Si el cliente corta la descarga, se cierra el generador (archivo, cursor).
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
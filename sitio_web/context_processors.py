@@ -0,0 +1,17 @@
+# sitio_web/context_processors.py
+
+from .unread import unread_count
+
+
+def unread_messages(request):
+    """
+    Cantidad de mensajes sin leer para el badge del menú. Sale del contador
+    en Profile, que el backend de autenticación ya cargó junto con el usuario,
+    y para el staff también del de la bandeja del equipo, que RoleMiddleware
+    deja en request.team_unread_count: no agrega consultas al render.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    role = getattr(request, 'role', None)
+    return {'unread_count': unread_count(user, role, getattr(request, 'team_unread_count', None))}
@@ -0,0 +1,120 @@
+# sitio_web/dashboard.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import F, Func, IntegerField, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .concurrency import run_concurrently
+from .fragments import attach_card_versions
+from .models import PROJECT_STATUS_CHOICES, Project, ProjectUpdate, TeamInbox
+from .unread import STAFF_ROLES, TEAM_INBOX_ID
+
+# Cantidad de proyectos recientes que ve el ADMIN en su panel.
+ADMIN_RECENT_PROJECTS = 10
+
+
+def projects_for_role(user, role):
+    """
+    Queryset de proyectos visibles en el dashboard según el rol.
+    Incluye el cliente en la misma consulta para que las tarjetas
+    no hagan una consulta extra por proyecto.
+    """
+    projects = Project.objects.select_related('client').order_by('-created_at')
+    if role == 'ADMIN':
+        return projects
+    if role == 'WORKER':
+        return projects.filter(assignments__worker=user)
+    return projects.filter(client=user)
+
+
+def _count(queryset):
+    """
+    Envuelve un queryset como subconsulta escalar COUNT(*) para poder
+    combinar varios contadores en una única sentencia SQL.
+    """
+    counted = queryset.order_by().annotate(
+        _count=Func(F('pk'), function='COUNT')
+    ).values('_count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def summary_counters(user, role):
+    """
+    Calcula los contadores del dashboard en una sola consulta:
+    proyectos por estado, mensajes no leídos y avances de esta semana.
+    """
+    projects = projects_for_role(user, role).order_by()
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+
+    annotations = {
+        f'status_{code}': _count(projects.filter(status=code))
+        for code, _label in PROJECT_STATUS_CHOICES
+    }
+    annotations['total_projects'] = _count(projects)
+    # Los contadores desnormalizados (sitio_web/unread.py), no un COUNT de mensajes.
+    unread = Coalesce(F('profile__unread_messages'), 0)
+    if role in STAFF_ROLES:
+        team = TeamInbox.objects.filter(pk=TEAM_INBOX_ID).values('unread_messages')
+        unread = unread + Coalesce(Subquery(team, output_field=IntegerField()), 0)
+    annotations['unread_messages'] = unread
+    annotations['updates_this_week'] = _count(
+        ProjectUpdate.objects.filter(
+            project__in=projects.values('pk'),
+            date__gte=week_start,
+        )
+    )
+
+    row = User.objects.filter(pk=user.pk).values(**annotations).get()
+
+    return {
+        'total_projects': row['total_projects'],
+        'unread_messages': row['unread_messages'],
+        'updates_this_week': row['updates_this_week'],
+        'status_counts': [
+            (code, label, row[f'status_{code}'])
+            for code, label in PROJECT_STATUS_CHOICES
+        ],
+    }
+
+
+def get_dashboard_data(user, role):
+    """
+    Devuelve lo necesario para renderizar el dashboard de un rol
+    en un número fijo de consultas, sin importar cuántos proyectos haya.
+    """
+    projects = projects_for_role(user, role)
+    if role == 'ADMIN':
+        projects = projects[:ADMIN_RECENT_PROJECTS]
+
+    return {
+        'projects': attach_card_versions(projects),
+        'summary': summary_counters(user, role),
+        'fragment_cache': settings.FRAGMENT_CACHE_ALIAS,
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+
+
+async def aget_dashboard_data(user, role):
+    """
+    Versión async de get_dashboard_data: las tarjetas y los contadores
+    son consultas independientes y se ejecutan a la vez.
+    """
+    projects = projects_for_role(user, role)
+    if role == 'ADMIN':
+        projects = projects[:ADMIN_RECENT_PROJECTS]
+
+    cards, summary = await run_concurrently(
+        lambda: attach_card_versions(projects),
+        lambda: summary_counters(user, role),
+    )
+    return {
+        'projects': cards,
+        'summary': summary,
+        'fragment_cache': settings.FRAGMENT_CACHE_ALIAS,
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,36 @@
+# sitio_web/decorators.py
+
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseForbidden
+
+from .middleware import get_user_role
+
+
+def role_required(*roles, message="No tienes permiso para acceder a esta sección."):
+    """
+    Exige que el usuario esté autenticado y tenga uno de los roles indicados.
+    Uso: @role_required('ADMIN', 'WORKER')
+    Sirve tanto para vistas síncronas como para vistas `async def`.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async def _wrapped_view(request, *args, **kwargs):
+                role = getattr(request, 'role', None)
+                if role is None:
+                    role = get_user_role(await request.auser())
+                if role not in roles:
+                    return HttpResponseForbidden(message)
+                return await view_func(request, *args, **kwargs)
+        else:
+            def _wrapped_view(request, *args, **kwargs):
+                role = getattr(request, 'role', None)
+                if role is None:
+                    role = get_user_role(request.user)
+                if role not in roles:
+                    return HttpResponseForbidden(message)
+                return view_func(request, *args, **kwargs)
+        return login_required(wraps(view_func)(_wrapped_view))
+    return decorator
@@ -0,0 +1,136 @@
+# sitio_web/downloads.py
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from .concurrency import streaming_content
+
+# Tamaño de cada bloque leído del disco al transmitir un archivo.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Interpreta un encabezado Range de un único rango de bytes.
+    Devuelve (inicio, fin) inclusivo, None si no aplica (se sirve completo)
+    o 'unsatisfiable' si el rango cae fuera del archivo.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Rangos múltiples o unidades desconocidas: se responde el archivo completo.
+        return None
+
+    start, end = match.groups()
+    if start == '' and end == '':
+        return None
+    if start == '':
+        # Sufijo: los últimos N bytes.
+        length = int(end)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return start, min(end, size - 1)
+
+
+def _iter_file(field_file, start, length):
+    with field_file.open('rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _sendfile_response(field_file):
+    """
+    Delega la transferencia al proxy frontal (nginx / Apache) según
+    DOCUMENT_DOWNLOAD_SENDFILE. Devuelve None si el modo no está activo.
+    """
+    mode = getattr(settings, 'DOCUMENT_DOWNLOAD_SENDFILE', None)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'DOCUMENT_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + field_file.name.replace(os.sep, '/')
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = field_file.path
+        return response
+    return None
+
+
+def serve_document(request, document):
+    """
+    Respuesta HTTP para descargar un Document ya autorizado: soporta
+    If-None-Match / If-Modified-Since (304), Range (206) y el modo
+    X-Sendfile / X-Accel-Redirect. Si el archivo falta en el storage, 404.
+    """
+    field_file = document.file
+    try:
+        size = field_file.size
+    except (FileNotFoundError, ValueError):
+        # ValueError: el Document no tiene archivo asociado.
+        raise Http404("El archivo de este documento no está disponible.")
+    # El contenido es inmutable por hash: el SHA-256 es un ETag natural.
+    etag = quote_etag(document.sha256 or f'{document.pk}-{size}-{int(document.uploaded_at.timestamp())}')
+    last_modified = int(document.uploaded_at.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    filename = document.display_filename
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = _sendfile_response(field_file)
+    if response is None:
+        byte_range = parse_range(request.headers.get('Range'), size)
+        # If-Range: solo se respeta el rango si el archivo no cambió.
+        if_range = request.headers.get('If-Range')
+        if byte_range and if_range and if_range.strip() != etag:
+            byte_range = None
+
+        if byte_range == 'unsatisfiable':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                streaming_content(request, _iter_file(field_file, start, length)), status=206,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            length = size
+            response = StreamingHttpResponse(streaming_content(request, _iter_file(field_file, 0, size)))
+        response['Content-Length'] = str(length)
+
+    response['Content-Type'] = content_type
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = content_disposition_header(
+        request.GET.get('download') == '1', filename
+    )
+    return response
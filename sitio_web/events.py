@@ -0,0 +1,244 @@
+# sitio_web/events.py
+
+import asyncio
+import atexit
+import glob
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Tamaño máximo de un evento enviado por el broker local (datagrama Unix).
+MAX_DATAGRAM_SIZE = 64 * 1024
+
+_OVERFLOW = object()
+
+
+class Subscriber:
+    """
+    Una conexión SSE abierta: su cola de eventos y lo necesario para
+    decidir qué eventos puede ver (usuario, rol y proyectos asignados).
+    """
+
+    def __init__(self, loop, user_id, role, project_ids=(), queue_size=100):
+        self.loop = loop
+        self.user_id = user_id
+        self.role = role
+        self.project_ids = frozenset(project_ids)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def can_see(self, event):
+        kind = event.get('type')
+        if kind == 'message':
+            if event.get('team'):
+                return self.role in ('ADMIN', 'WORKER')
+            return event.get('receiver_id') == self.user_id
+        if kind == 'update':
+            if self.role == 'ADMIN':
+                return True
+            if self.role == 'WORKER':
+                return event.get('project_id') in self.project_ids
+            return event.get('client_id') == self.user_id
+        return False
+
+    def deliver(self, event):
+        # Corre en el loop del suscriptor. Un cliente que no lee a tiempo se
+        # desconecta (el navegador reconecta) en vez de acumular memoria.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_OVERFLOW)
+
+
+class EventBroker:
+    """
+    Pub/sub en memoria para un proceso. `publish` se puede llamar desde
+    cualquier hilo (vistas síncronas, señales); cada evento se entrega en el
+    loop de asyncio de cada suscriptor que tiene permiso para verlo.
+
+    Si EVENTS_BROKER_SOCKET_DIR está configurado, además reenvía los eventos
+    a los demás procesos por sockets Unix de datagramas (uno por proceso que
+    tenga conexiones abiertas), sin depender de un servicio externo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+        self._socket = None
+        self._socket_path = None
+
+    # --- Suscripción (desde código async) ---
+
+    def subscribe(self, user_id, role, project_ids=()):
+        loop = asyncio.get_running_loop()
+        subscriber = Subscriber(loop, user_id, role, project_ids,
+                                queue_size=settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            subscriber.key = next(self._ids)
+            self._subscribers[subscriber.key] = subscriber
+            self._ensure_listener(loop)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.pop(subscriber.key, None)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    # --- Publicación (desde cualquier hilo) ---
+
+    def publish(self, event):
+        self._deliver_local(event)
+        if settings.EVENTS_BROKER_SOCKET_DIR:
+            self._forward(event)
+
+    def _deliver_local(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            if subscriber.can_see(event):
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+                except RuntimeError:
+                    # El loop ya se cerró; la conexión se limpia al salir.
+                    pass
+
+    # --- Broker local entre procesos ---
+
+    def _forward(self, event):
+        data = json.dumps(event).encode()
+        if len(data) > MAX_DATAGRAM_SIZE:
+            logger.warning("Evento demasiado grande para el broker local: %s bytes", len(data))
+            return
+
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        try:
+            pattern = os.path.join(settings.EVENTS_BROKER_SOCKET_DIR, '*.sock')
+            for path in glob.glob(pattern):
+                if path == self._socket_path:
+                    continue
+                try:
+                    sender.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Proceso terminado sin limpiar su socket.
+                    _unlink_quietly(path)
+                except BlockingIOError:
+                    # Receptor saturado: los eventos son avisos, no se reintenta.
+                    pass
+        finally:
+            sender.close()
+
+    def _ensure_listener(self, loop):
+        directory = settings.EVENTS_BROKER_SOCKET_DIR
+        if not directory or self._socket is not None:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.sock')
+        _unlink_quietly(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.bind(path)
+        listener.setblocking(False)
+        loop.add_reader(listener.fileno(), self._on_datagram)
+
+        self._socket = listener
+        self._socket_path = path
+        atexit.register(_unlink_quietly, path)
+
+    def _on_datagram(self):
+        while True:
+            try:
+                data = self._socket.recv(MAX_DATAGRAM_SIZE)
+            except BlockingIOError:
+                return
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            self._deliver_local(event)
+
+
+def _unlink_quietly(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+broker = EventBroker()
+
+
+# --- Eventos de la aplicación ---
+
+def message_event(message, team):
+    return {
+        'type': 'message',
+        'id': message.pk,
+        'thread_id': message.thread_id,
+        'project_id': message.project_id,
+        'sender_id': message.sender_id,
+        'receiver_id': message.receiver_id,
+        'team': team,
+        'subject': message.subject or '',
+        'sent_at': message.sent_at.isoformat() if message.sent_at else None,
+    }
+
+
+def update_event(update, client_id):
+    return {
+        'type': 'update',
+        'id': update.pk,
+        'project_id': update.project_id,
+        'client_id': client_id,
+        'progress_percent': float(update.progress_percent),
+        'date': update.date.isoformat() if update.date else None,
+    }
+
+
+def format_sse(event):
+    """
+    Serializa un evento en el formato de text/event-stream.
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_events(subscriber):
+    """
+    Generador async del cuerpo text/event-stream de una conexión. Envía un
+    comentario cada EVENTS_HEARTBEAT_SECONDS para que los proxies no corten la
+    conexión, y la cierra pasado EVENTS_MAX_STREAM_SECONDS: al reconectar, el
+    navegador vuelve a cargar los permisos (proyectos asignados).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(),
+                    timeout=min(settings.EVENTS_HEARTBEAT_SECONDS, remaining),
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is _OVERFLOW:
+                return
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscriber)
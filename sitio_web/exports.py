@@ -0,0 +1,237 @@
+# sitio_web/exports.py
+
+import csv
+import io
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .dashboard import projects_for_role
+from .models import ProjectUpdate
+from .permissions import visible_messages
+
+# Filas que el ORM trae por cada ida a la base de datos.
+EXPORT_CHUNK_SIZE = 2000
+
+# Bytes acumulados del XLSX antes de entregarlos al cliente.
+XLSX_FLUSH_SIZE = 64 * 1024
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+# --- Datos: querysets filtrados por rol y generadores de filas ---
+
+def projects_with_latest_update(user, role):
+    """
+    Proyectos visibles para el rol, con su último avance anotado en la
+    misma consulta (sin una consulta extra por proyecto).
+    """
+    latest = ProjectUpdate.objects.filter(project=OuterRef('pk')).order_by('-date', '-id')
+    return projects_for_role(user, role).order_by('id').annotate(
+        latest_update_date=Subquery(latest.values('date')[:1]),
+        latest_update_percent=Subquery(latest.values('progress_percent')[:1]),
+        latest_update_comment=Subquery(latest.values('comment')[:1]),
+    )
+
+
+def messages_for_role(user, role, client_id=None):
+    """
+    Historial de mensajes con el mismo alcance que las bandejas
+    (permissions.visible_messages). El staff puede limitarlo a un cliente.
+    """
+    messages = visible_messages(user, role).select_related('sender', 'receiver', 'project').order_by('sent_at', 'id')
+    if client_id and role != 'CLIENT':
+        messages = messages.filter(thread__client_id=client_id)
+    return messages
+
+
+PROJECT_HEADER = [
+    'ID', 'Proyecto', 'Cliente', 'Ciudad', 'Dirección', 'Estado', 'Avance (%)',
+    'Inicio', 'Término estimado', 'Último avance', 'Avance registrado (%)', 'Comentario del último avance',
+]
+
+MESSAGE_HEADER = ['Fecha', 'Proyecto', 'De', 'Para', 'Asunto', 'Mensaje', 'Leído']
+
+
+def project_rows(user, role):
+    yield PROJECT_HEADER
+    for project in projects_with_latest_update(user, role).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            project.pk,
+            project.name,
+            project.client.username if project.client else '',
+            project.city,
+            project.address,
+            project.get_status_display(),
+            project.progress_percent,
+            project.start_date,
+            project.end_date_estimated,
+            project.latest_update_date,
+            project.latest_update_percent,
+            project.latest_update_comment or '',
+        ]
+
+
+def message_rows(user, role, client_id=None):
+    yield MESSAGE_HEADER
+    for message in messages_for_role(user, role, client_id).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            timezone.localtime(message.sent_at).strftime('%Y-%m-%d %H:%M'),
+            message.project.name if message.project else '',
+            message.sender.username,
+            message.receiver.username if message.receiver else 'Equipo',
+            message.subject or '',
+            message.body,
+            'Sí' if message.is_read else 'No',
+        ]
+
+
+# --- Formatos ---
+
+class _Echo:
+    """
+    "Archivo" cuyo write devuelve lo escrito: csv.writer produce cada línea
+    sin acumularlas (patrón recomendado por Django para CSV en streaming).
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # Evita que una planilla interprete el texto como fórmula.
+        return "'" + value
+    return value
+
+
+def csv_stream(rows):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel reconozca el UTF-8 (tildes y eñes).
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destino no "seekable" del zip: acumula lo escrito hasta que el
+    generador lo entrega. zipfile escribe entonces descriptores de datos
+    en vez de volver atrás a completar los encabezados.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+# Caracteres de control que XML 1.0 no admite.
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_STATIC = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        value = 'Sí' if value else 'No'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_stream(rows, sheet_name='Datos'):
+    """
+    Genera un .xlsx mínimo (una hoja, textos inline, sin estilos) a medida
+    que llegan las filas. No usa dependencias externas ni archivos temporales.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield sink.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for row in rows:
+                sheet.write(('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode())
+                if sink.size >= XLSX_FLUSH_SIZE:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+def render_export(rows, fmt, sheet_name='Datos'):
+    """
+    Generador del archivo en el formato pedido ('csv' o 'xlsx').
+    """
+    if fmt == 'xlsx':
+        return xlsx_stream(rows, sheet_name)
+    return csv_stream(rows)
+
+
+def export_filename(prefix, fmt):
+    return f"{prefix}_{timezone.localdate():%Y%m%d}.{fmt}"
@@ -78,7 +78,7 @@ class MessageReplyForm(forms.ModelForm):
         widgets = {
             'body': forms.Textarea(attrs={
                 'rows': 4,
-                'placeholder': 'Escribe tu respuesta al cliente aquí...',
+                'placeholder': 'Escribe tu respuesta aquí...',
                 'class': 'form-control',
             }),
         }
@@ -152,9 +152,17 @@ class UserRegisterForm(UserCreationForm):
         user = super().save(commit=False)
         user.email = self.cleaned_data['email']
         if commit:
-            user.save()
-            # Crear perfil con rol CLIENT por defecto
-            Profile.objects.get_or_create(user=user, defaults={'role': 'CLIENT'})
+            self.save_account(user)
+        return user
+
+    def save_account(self, user):
+        """
+        Guarda el usuario (de save(commit=False), con la contraseña ya
+        hasheada) y su perfil.
+        """
+        user.save()
+        # Crear perfil con rol CLIENT por defecto
+        Profile.objects.get_or_create(user=user, defaults={'role': 'CLIENT'})
         return user
 
 class UserRoleForm(forms.ModelForm):
@@ -0,0 +1,59 @@
+# sitio_web/fragments.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Prefijo de la clave que guarda la versión de las tarjetas de cada proyecto.
+VERSION_KEY_PREFIX = 'project-card-version'
+
+
+def get_fragment_cache():
+    """
+    Cache donde viven los fragmentos renderizados (alias FRAGMENT_CACHE_ALIAS).
+    """
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def _version_key(project_id):
+    return f'{VERSION_KEY_PREFIX}:{project_id}'
+
+
+def _new_version():
+    # Un valor nuevo en cada cambio (y no un contador que arranca en 1): si la
+    # clave de versión se expulsa del cache, nunca se reutiliza una versión vieja.
+    return time.time_ns()
+
+
+def bump_project_version(project_id):
+    """
+    Invalida las tarjetas cacheadas de un proyecto cambiando su versión.
+    """
+    get_fragment_cache().set(_version_key(project_id), _new_version(), None)
+
+
+def attach_card_versions(projects):
+    """
+    Evalúa los proyectos y le asigna a cada uno `card_version`, que forma
+    parte de la clave del fragmento en las plantillas. Lee todas las
+    versiones con un solo get_many().
+    """
+    projects = list(projects)
+    if not projects:
+        return projects
+
+    cache = get_fragment_cache()
+    keys = {project.pk: _version_key(project.pk) for project in projects}
+    versions = cache.get_many(keys.values())
+
+    for project in projects:
+        key = keys[project.pk]
+        version = versions.get(key)
+        if version is None:
+            version = _new_version()
+            # add() no pisa la versión si otro proceso la creó entremedio.
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        project.card_version = version
+    return projects
@@ -0,0 +1,190 @@
+# sitio_web/http_cache.py
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Document, Project, ProjectUpdate
+
+
+# --- GET condicional (ETag / Last-Modified) ---
+
+def _aggregate(queryset, **annotations):
+    """
+    Subconsulta con agregados por proyecto, para anotarla sin multiplicar
+    filas con JOINs (avances × documentos).
+    """
+    return queryset.filter(project=OuterRef('pk')).order_by().values('project').annotate(**annotations)
+
+
+def client_project_validators(request, project_id):
+    """
+    (etag, last_modified) de la página de detalle de un proyecto para su
+    cliente, en una sola consulta y sin renderizar nada. (None, None) si el
+    proyecto no es del usuario: la vista responde entonces lo que corresponda.
+    El proyecto leído queda en request.validated_project para la vista.
+
+    El estado cubre lo que cambia la página: el proyecto, los avances (altas,
+    bajas y ediciones, incluidas las variantes de imagen, por su updated_at),
+    los documentos visibles y el badge de no leídos del menú.
+    """
+    updates = _aggregate(
+        ProjectUpdate.objects.all(),
+        total=Count('pk'), last=Max('pk'), changed=Max('updated_at'),
+    )
+    documents = _aggregate(
+        Document.objects.filter(visible_to_client=True),
+        total=Count('pk'), last=Max('uploaded_at'),
+    )
+    project = (
+        Project.objects.filter(pk=project_id, client_id=request.user.pk)
+        .annotate(
+            updates_count=Subquery(updates.values('total')),
+            last_update_id=Subquery(updates.values('last')),
+            last_update_change=Subquery(updates.values('changed')),
+            documents_count=Subquery(documents.values('total')),
+            last_document_at=Subquery(documents.values('last')),
+        )
+        .first()
+    )
+    if project is None:
+        return None, None
+    # La vista lo reutiliza si hay que renderizar: una consulta menos.
+    request.validated_project = project
+
+    last_modified = max(filter(None, (project.updated_at, project.last_update_change, project.last_document_at)))
+    # El contador del badge ya vino con el usuario (backends.py): no cuesta consultas.
+    profile = getattr(request.user, 'profile', None)
+    state = ':'.join(str(value) for value in (
+        request.user.pk, project.updated_at.timestamp(),
+        project.updates_count, project.last_update_id,
+        project.last_update_change and project.last_update_change.timestamp(),
+        project.documents_count, project.last_document_at and project.last_document_at.timestamp(),
+        profile.unread_messages if profile else 0,
+    ))
+    # Débil (W/): la misma página puede viajar comprimida o no.
+    return 'W/' + quote_etag(hashlib.md5(state.encode()).hexdigest()), last_modified
+
+
+def _has_pending_messages(request):
+    # len() carga los mensajes sin marcarlos como leídos (eso lo hace iterarlos).
+    return len(messages.get_messages(request)) > 0
+
+
+def conditional_page(validators):
+    """
+    Responde 304 Not Modified sin ejecutar la vista si el navegador ya
+    tiene la versión vigente (If-None-Match / If-Modified-Since).
+    `validators(request, *args, **kwargs)` devuelve (etag, last_modified)
+    sin renderizar. A diferencia de django.views.decorators.http.condition,
+    en vistas async los calcula fuera del loop (hacen consultas).
+
+    Con mensajes flash pendientes (p. ej. "Mensaje enviado" tras el
+    redirect de client_send_message) la página se renderiza siempre y sin
+    validadores: un 304 los perdería, y guardada con su ETag el navegador
+    los volvería a mostrar en la próxima visita.
+
+    La respuesta queda como privada y a revalidar en cada visita.
+    """
+    def decorator(view_func):
+        def prepare(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or _has_pending_messages(request):
+                return None, None
+            return validators(request, *args, **kwargs)
+
+        def check(request, etag, last_modified):
+            if etag is None and last_modified is None:
+                return None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+        def finish(request, response, etag, last_modified):
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+                if last_modified:
+                    response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                etag, last_modified = await sync_to_async(prepare)(request, *args, **kwargs)
+                response = check(request, etag, last_modified)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                etag, last_modified = prepare(request, *args, **kwargs)
+                response = check(request, etag, last_modified)
+                if response is None:
+                    response = view_func(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+        return _wrapped_view
+    return decorator
+
+
+# --- Página completa en caché para visitantes anónimos ---
+
+def _is_cacheable_visitor(request):
+    """
+    Visitante sin sesión ni mensajes pendientes: ve exactamente la misma
+    página que cualquier otro. Se decide por las cookies, sin tocar la base.
+    """
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def cache_anonymous_page(view_func):
+    """
+    Guarda la página renderizada para visitantes anónimos (PAGE_CACHE_*)
+    y la entrega sin ejecutar la vista, con ETag para responder 304 a quien
+    ya la tiene. Los usuarios con sesión siempre reciben la página generada.
+
+    No se guardan respuestas que pongan cookies (p. ej. el token CSRF de un
+    formulario): serían de un visitante en particular.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _is_cacheable_visitor(request):
+            return view_func(request, *args, **kwargs)
+
+        cache = caches[settings.PAGE_CACHE_ALIAS]
+        key = f'page:{request.get_full_path()}'
+        page = cache.get(key)
+        if page is None:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+            page = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+                'last_modified': int(timezone.now().timestamp()),
+            }
+            cache.set(key, page, settings.PAGE_CACHE_TIMEOUT)
+
+        response = get_conditional_response(request, etag=page['etag'], last_modified=page['last_modified'])
+        if response is None:
+            response = HttpResponse(page['content'], content_type=page['content_type'])
+        response.headers['ETag'] = page['etag']
+        response.headers['Last-Modified'] = http_date(page['last_modified'])
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+    return _wrapped_view
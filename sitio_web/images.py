@@ -0,0 +1,142 @@
+# sitio_web/images.py
+
+import base64
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+# Anchos (px) de las variantes responsivas que se generan por imagen.
+VARIANT_WIDTHS = (320, 640, 1280)
+
+# Formato de salida -> (formato Pillow, extensión, opciones de guardado).
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Formatos de las variantes de imágenes estáticas (página pública). AVIF solo
+# si el Pillow instalado sabe escribirlo.
+STATIC_VARIANT_FORMATS = {
+    'avif': ('AVIF', 'avif', {'quality': 55}),
+    'webp': ('WEBP', 'webp', {'quality': 78, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+# Ancho del placeholder borroso que se incrusta como data URI.
+PLACEHOLDER_WIDTH = 24
+
+
+def _variant_name(original_name, width, extension):
+    directory, filename = os.path.split(original_name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}-{width}w.{extension}')
+
+
+def _encode(image, pil_format, options):
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(field_file):
+    """
+    Genera las variantes de una imagen y las guarda en el storage.
+    Devuelve el diccionario que se persiste en ProjectUpdate.image_variants.
+    """
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+        image.load()
+
+    original_width, original_height = image.size
+    # Nunca se agranda: solo anchos menores al original, y al menos uno.
+    widths = [w for w in VARIANT_WIDTHS if w < original_width] or [original_width]
+
+    variants = {
+        'width': original_width,
+        'height': original_height,
+    }
+    for key, (pil_format, extension, options) in VARIANT_FORMATS.items():
+        variants[key] = {}
+        for width in widths:
+            resized = image.copy()
+            resized.thumbnail((width, original_height), Image.LANCZOS)
+            name = _variant_name(field_file.name, width, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            saved = default_storage.save(name, ContentFile(_encode(resized, pil_format, options)))
+            variants[key][str(width)] = saved
+
+    placeholder = image.copy()
+    placeholder.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    data = _encode(placeholder, 'JPEG', {'quality': 40})
+    variants['placeholder'] = 'data:image/jpeg;base64,' + base64.b64encode(data).decode()
+
+    return variants
+
+
+def delete_variants(variants):
+    """
+    Borra del storage los archivos de un diccionario de image_variants
+    (el placeholder va incrustado y no tiene archivo).
+    """
+    for key in VARIANT_FORMATS:
+        for name in (variants or {}).get(key, {}).values():
+            default_storage.delete(name)
+
+
+def generate_image_variants(update_id):
+    """
+    Procesa la imagen de un ProjectUpdate y guarda las variantes generadas.
+    """
+    from django.utils import timezone
+
+    from .models import Project, ProjectUpdate
+
+    update = ProjectUpdate.objects.filter(pk=update_id).only('id', 'project_id', 'image').first()
+    if update is None or not update.image:
+        return None
+
+    variants = build_variants(update.image)
+    # update() no toca los auto_now: updated_at a mano, que entra en el ETag
+    # de la página del proyecto (ahora con <picture> y variantes).
+    now = timezone.now()
+    ProjectUpdate.objects.filter(pk=update_id).update(image_variants=variants, updated_at=now)
+    Project.objects.filter(pk=update.project_id).update(updated_at=now)
+    return variants
+
+
+def build_static_variants(source_path, output_dir, widths, url_prefix):
+    """
+    Genera variantes por ancho y formato de una imagen de los estáticos y
+    las escribe en output_dir. Devuelve la entrada del manifest responsivo:
+    {'width', 'height', 'variants': {formato: {ancho: ruta estática}}}.
+    """
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+        image.load()
+
+    original_width, original_height = image.size
+    # Nunca se agranda; el ancho original se incluye si no supera el mayor pedido.
+    targets = [w for w in widths if w < original_width]
+    if original_width <= max(widths) or not targets:
+        targets.append(original_width)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+
+    entry = {'width': original_width, 'height': original_height, 'variants': {}}
+    for key, (pil_format, extension, options) in STATIC_VARIANT_FORMATS.items():
+        if key == 'avif' and not features.check('avif'):
+            continue
+        entry['variants'][key] = {}
+        for width in targets:
+            resized = image.copy()
+            resized.thumbnail((width, original_height), Image.LANCZOS)
+            filename = f'{stem}-{width}w.{extension}'
+            with open(os.path.join(output_dir, filename), 'wb') as target:
+                target.write(_encode(resized, pil_format, options))
+            entry['variants'][key][str(width)] = f'{url_prefix}/{filename}'
+    return entry
@@ -0,0 +1,314 @@
+# sitio_web/imports.py
+
+import csv
+import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import PROJECT_STATUS_CHOICES, ROLE_CHOICES, Profile, Project, ProjectAssignment
+from .search import index_many
+from .unread import initialize_counters
+
+DEFAULT_BATCH_SIZE = 1000
+
+USER_COLUMNS = ('username', 'email', 'first_name', 'last_name', 'role', 'phone', 'company_name', 'password')
+PROJECT_COLUMNS = ('name', 'client', 'start_date', 'end_date_estimated', 'address', 'city',
+                   'status', 'progress_percent', 'description')
+ASSIGNMENT_COLUMNS = ('project', 'worker')
+
+_ROLES = {code for code, _label in ROLE_CHOICES}
+_STATUSES = {code for code, _label in PROJECT_STATUS_CHOICES}
+
+
+class RowError(Exception):
+    """
+    Fila inválida del CSV. Se informa con su número de línea y se omite.
+    """
+
+
+class ImportStats:
+    """
+    Resultado de importar un archivo: filas leídas, creadas, omitidas
+    (ya existían) y errores con su número de línea.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.read = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.elapsed = 0.0
+        # True si el backend no devolvió ids en bulk_create y hay que reindexar.
+        self.needs_reindex = False
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def read_batches(path, required, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Lee un CSV en streaming y entrega lotes de (número de línea, fila).
+    Nunca carga el archivo completo en memoria.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        reader = csv.DictReader(handle)
+        missing = [column for column in required if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path}: faltan las columnas {', '.join(missing)}.")
+        rows = ((reader.line_num, row) for row in reader)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+# --- Validación de campos ---
+
+def _text(row, column, max_length, required=False):
+    value = (row.get(column) or '').strip()
+    if required and not value:
+        raise RowError(f"'{column}' es obligatorio.")
+    if len(value) > max_length:
+        raise RowError(f"'{column}' supera {max_length} caracteres.")
+    return value
+
+
+def _date(row, column, required=False):
+    value = (row.get(column) or '').strip()
+    if not value:
+        if required:
+            raise RowError(f"'{column}' es obligatorio.")
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise RowError(f"'{column}' debe tener formato AAAA-MM-DD: {value!r}.")
+
+
+def _percent(row, column):
+    value = (row.get(column) or '').strip() or '0'
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"'{column}' no es un número: {value!r}.")
+    if not 0 <= number <= 100:
+        raise RowError(f"'{column}' debe estar entre 0 y 100.")
+    return number.quantize(Decimal('0.01'))
+
+
+# --- Usuarios y perfiles ---
+
+def parse_user(row):
+    username = _text(row, 'username', 150, required=True)
+    email = _text(row, 'email', 254)
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise RowError(f"Email inválido: {email!r}.")
+    role = (row.get('role') or 'CLIENT').strip().upper()
+    if role not in _ROLES:
+        raise RowError(f"Rol desconocido: {role!r}.")
+    password = (row.get('password') or '').strip()
+    user = User(
+        username=username,
+        email=email,
+        first_name=_text(row, 'first_name', 150),
+        last_name=_text(row, 'last_name', 150),
+        # Sin contraseña en el CSV, la cuenta queda sin acceso hasta que se defina una.
+        password=make_password(password or None),
+    )
+    profile = Profile(
+        role=role,
+        phone=_text(row, 'phone', 20) or None,
+        company_name=_text(row, 'company_name', 100) or None,
+    )
+    return user, profile
+
+
+def import_users(path, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    stats = ImportStats('usuarios')
+    for batch in read_batches(path, ('username',), batch_size):
+        parsed = {}
+        for line, row in batch:
+            stats.read += 1
+            try:
+                user, profile = parse_user(row)
+            except RowError as exc:
+                stats.errors.append((line, str(exc)))
+                continue
+            if user.username in parsed:
+                stats.errors.append((line, f"Usuario repetido en el archivo: {user.username}."))
+                continue
+            parsed[user.username] = (user, profile)
+
+        existing = set(User.objects.filter(username__in=parsed).values_list('username', flat=True))
+        new = {name: pair for name, pair in parsed.items() if name not in existing}
+        stats.skipped += len(existing)
+        if dry_run:
+            stats.created += len(new)
+            continue
+        if not new:
+            continue
+
+        with transaction.atomic():
+            User.objects.bulk_create([user for user, _profile in new.values()], ignore_conflicts=True)
+            # bulk_create con ignore_conflicts no devuelve los ids: se leen por username.
+            ids = dict(User.objects.filter(username__in=new).values_list('username', 'id'))
+            profiles = []
+            for name, (_user, profile) in new.items():
+                profile.user_id = ids[name]
+                profiles.append(profile)
+            Profile.objects.bulk_create(profiles, ignore_conflicts=True)
+            # bulk_create no dispara la señal que inicializa los contadores de no leídos.
+            initialize_counters(list(ids.values()))
+        stats.created += len(new)
+    return stats
+
+
+# --- Proyectos ---
+
+def parse_project(row, client_ids):
+    client_name = (row.get('client') or '').strip()
+    client_id = None
+    if client_name:
+        client_id = client_ids.get(client_name)
+        if client_id is None:
+            raise RowError(f"El cliente {client_name!r} no existe o no tiene rol CLIENT.")
+    status = (row.get('status') or 'PENDIENTE').strip().upper()
+    if status not in _STATUSES:
+        raise RowError(f"Estado desconocido: {status!r}.")
+    return Project(
+        name=_text(row, 'name', 200, required=True),
+        description=(row.get('description') or '').strip() or None,
+        client_id=client_id,
+        start_date=_date(row, 'start_date', required=True),
+        end_date_estimated=_date(row, 'end_date_estimated'),
+        address=_text(row, 'address', 255, required=True),
+        city=_text(row, 'city', 100, required=True),
+        status=status,
+        progress_percent=_percent(row, 'progress_percent'),
+    )
+
+
+def import_projects(path, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Un proyecto con el mismo nombre y cliente que uno existente se omite,
+    así el comando se puede volver a correr sobre el mismo archivo.
+    """
+    stats = ImportStats('proyectos')
+    for batch in read_batches(path, ('name', 'start_date', 'address', 'city'), batch_size):
+        client_names = {(row.get('client') or '').strip() for _line, row in batch} - {''}
+        client_ids = dict(
+            User.objects.filter(username__in=client_names, profile__role='CLIENT')
+            .values_list('username', 'id')
+        )
+
+        projects = []
+        keys = set()
+        for line, row in batch:
+            stats.read += 1
+            try:
+                project = parse_project(row, client_ids)
+            except RowError as exc:
+                stats.errors.append((line, str(exc)))
+                continue
+            key = (project.name, project.client_id)
+            if key in keys:
+                stats.skipped += 1
+                continue
+            keys.add(key)
+            projects.append(project)
+
+        existing = set(
+            Project.objects.filter(name__in={name for name, _client in keys})
+            .values_list('name', 'client_id')
+        )
+        new = [project for project in projects if (project.name, project.client_id) not in existing]
+        stats.skipped += len(projects) - len(new)
+        if dry_run:
+            stats.created += len(new)
+            continue
+        if not new:
+            continue
+
+        with transaction.atomic():
+            created = Project.objects.bulk_create(new)
+            # bulk_create no dispara post_save: el índice de búsqueda se actualiza aquí.
+            if all(project.pk for project in created):
+                index_many(created)
+            else:
+                stats.needs_reindex = True
+        stats.created += len(new)
+    return stats
+
+
+# --- Asignaciones ---
+
+def import_assignments(path, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    El proyecto se identifica por nombre; si hay varios con el mismo nombre,
+    la fila se rechaza. Las asignaciones repetidas se ignoran (unique_together).
+    """
+    stats = ImportStats('asignaciones')
+    for batch in read_batches(path, ASSIGNMENT_COLUMNS, batch_size):
+        names = {(row.get('project') or '').strip() for _line, row in batch}
+        workers = {(row.get('worker') or '').strip() for _line, row in batch}
+
+        project_ids = {}
+        for name, project_id in Project.objects.filter(name__in=names).values_list('name', 'id'):
+            project_ids.setdefault(name, []).append(project_id)
+        worker_ids = dict(
+            User.objects.filter(username__in=workers, profile__role='WORKER').values_list('username', 'id')
+        )
+
+        assignments = []
+        seen = set()
+        for line, row in batch:
+            stats.read += 1
+            name = (row.get('project') or '').strip()
+            worker = (row.get('worker') or '').strip()
+            candidates = project_ids.get(name, [])
+            if not candidates:
+                stats.errors.append((line, f"El proyecto {name!r} no existe."))
+                continue
+            if len(candidates) > 1:
+                stats.errors.append((line, f"Hay {len(candidates)} proyectos llamados {name!r}."))
+                continue
+            if worker not in worker_ids:
+                stats.errors.append((line, f"El trabajador {worker!r} no existe o no tiene rol WORKER."))
+                continue
+            key = (candidates[0], worker_ids[worker])
+            if key in seen:
+                stats.skipped += 1
+                continue
+            seen.add(key)
+            assignments.append(ProjectAssignment(project_id=key[0], worker_id=key[1]))
+
+        existing = set(
+            ProjectAssignment.objects.filter(
+                project_id__in={project_id for project_id, _worker in seen},
+                worker_id__in={worker_id for _project, worker_id in seen},
+            ).values_list('project_id', 'worker_id')
+        )
+        new = [item for item in assignments if (item.project_id, item.worker_id) not in existing]
+        stats.skipped += len(assignments) - len(new)
+        if dry_run:
+            stats.created += len(new)
+            continue
+        if not new:
+            continue
+        with transaction.atomic():
+            # ignore_conflicts cubre una asignación creada entretanto por otra vía.
+            ProjectAssignment.objects.bulk_create(new, ignore_conflicts=True)
+        stats.created += len(new)
+    return stats
@@ -0,0 +1,260 @@
+# sitio_web/instrumentation.py
+
+import contextvars
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ContextDecorator
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('sitio_web.sql')
+slow_logger = logging.getLogger('sitio_web.sql.slow')
+
+# Registros activos en el contexto actual (la petición, un query_budget...).
+# Es una variable de contexto y no de hilo: sync_to_async la copia a los hilos
+# donde corren las consultas de las vistas async (también en run_concurrently).
+_active = contextvars.ContextVar('sitio_web_sql_recorders', default=())
+
+_THIS_FILE = os.path.abspath(__file__)
+_PROJECT_DIR = str(settings.BASE_DIR)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Forma normalizada de una consulta: sin literales ni largo de las listas
+    IN. Dos consultas con la misma huella en una petición suelen ser un N+1.
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _LITERALS.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def query_origin():
+    """
+    Primer marco del código del proyecto (no de Django ni de librerías) que
+    llevó a la consulta, como 'sitio_web/views.py:170 in worker_project_detail'.
+    """
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename == _THIS_FILE or not filename.startswith(_PROJECT_DIR):
+            continue
+        if f'{os.sep}site-packages{os.sep}' in filename:
+            continue
+        return f'{os.path.relpath(filename, _PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return '?'
+
+
+class QueryRecorder:
+    """
+    Acumula las consultas ejecutadas mientras está activo: cantidad, tiempo
+    total, huellas repetidas y consultas lentas (con su origen).
+    """
+
+    def __init__(self, slow_ms=None, duplicate_threshold=None):
+        self.slow_ms = settings.SQL_SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.duplicate_threshold = (
+            settings.SQL_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold
+        )
+        self.count = 0
+        self.duration_ms = 0.0
+        self.fingerprints = Counter()
+        self.origins = {}
+        self.slow = []
+
+    def record(self, sql, duration_ms, alias):
+        self.count += 1
+        self.duration_ms += duration_ms
+        key = fingerprint(sql)
+        self.fingerprints[key] += 1
+        # El origen solo se busca cuando hace falta (recorrer la pila cuesta).
+        if self.fingerprints[key] == self.duplicate_threshold and key not in self.origins:
+            self.origins[key] = query_origin()
+        if self.slow_ms is not None and duration_ms >= self.slow_ms:
+            self.slow.append({
+                'sql': sql,
+                'duration_ms': round(duration_ms, 2),
+                'database': alias,
+                'origin': query_origin(),
+            })
+
+    def duplicates(self):
+        """
+        [(huella, veces, origen)] de las consultas repetidas al menos
+        duplicate_threshold veces, de más a menos.
+        """
+        return [
+            (key, count, self.origins.get(key, '?'))
+            for key, count in self.fingerprints.most_common()
+            if count >= self.duplicate_threshold
+        ]
+
+    def __enter__(self):
+        self._token = _active.set(_active.get() + (self,))
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.reset(self._token)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    recorders = _active.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        alias = context['connection'].alias
+        for recorder in recorders:
+            recorder.record(sql, duration_ms, alias)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """
+    Receptor de connection_created: deja el wrapper instalado en cada
+    conexión. Sin un QueryRecorder activo solo cuesta una lectura de contexto.
+    """
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+# --- Presupuestos de consultas ---
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    Falla si el bloque ejecuta más consultas de las permitidas o repite la
+    misma consulta demasiadas veces. Sirve como context manager o decorador:
+
+        with query_budget(4):
+            client.get(reverse('dashboard'))
+
+    max_duplicates limita las repeticiones de una misma huella (N+1).
+    """
+
+    def __init__(self, max_queries, max_duplicates=None):
+        self.max_queries = max_queries
+        self.max_duplicates = max_duplicates
+
+    def __enter__(self):
+        threshold = self.max_duplicates + 1 if self.max_duplicates is not None else None
+        self.recorder = QueryRecorder(duplicate_threshold=threshold).__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, *exc_info):
+        self.recorder.__exit__(exc_type, *exc_info)
+        if exc_type is not None:
+            return False
+        problems = []
+        if self.recorder.count > self.max_queries:
+            problems.append(f"{self.recorder.count} consultas (máximo {self.max_queries})")
+        if self.max_duplicates is not None:
+            problems.extend(
+                f"{count} veces (máximo {self.max_duplicates}) desde {origin}: {key}"
+                for key, count, origin in self.recorder.duplicates()
+            )
+        if problems:
+            raise QueryBudgetExceeded("Presupuesto de consultas excedido:\n  " + "\n  ".join(problems))
+        return False
+
+
+# --- Middleware ---
+
+class SQLInstrumentationMiddleware:
+    """
+    Mide las consultas SQL de cada petición y las informa:
+
+    - cabecera Server-Timing (visible en las herramientas del navegador);
+    - una línea de log por petición en 'sitio_web.sql' (cantidad, tiempo,
+      repetidas) y un aviso con origen por cada posible N+1;
+    - las consultas que superan SQL_SLOW_QUERY_MS, en 'sitio_web.sql.slow';
+    - un aviso si la vista supera su presupuesto en SQL_QUERY_BUDGETS.
+
+    Conviene ponerlo al principio de MIDDLEWARE para contar también las
+    consultas de sesión y autenticación. En respuestas en streaming solo
+    cuenta lo ejecutado antes de empezar a enviar el cuerpo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.SQL_INSTRUMENTATION
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        self.report(request, response, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        self.report(request, response, recorder, started)
+        return response
+
+    def report(self, request, response, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        duplicates = recorder.duplicates()
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '-'
+
+        metrics = [
+            f'db;dur={recorder.duration_ms:.1f};desc="{recorder.count} queries"',
+            f'app;dur={total_ms:.1f}',
+        ]
+        if duplicates:
+            metrics.append(f'db-dup;desc="{len(duplicates)} repeated"')
+        timing = ', '.join(metrics)
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+
+        logger.info(
+            "sql view=%s method=%s path=%s status=%s queries=%s sql_ms=%.1f total_ms=%.1f duplicates=%s",
+            view, request.method, request.path, response.status_code,
+            recorder.count, recorder.duration_ms, total_ms, len(duplicates),
+            extra={
+                'view': view,
+                'queries': recorder.count,
+                'sql_ms': round(recorder.duration_ms, 2),
+                'total_ms': round(total_ms, 2),
+                'duplicates': len(duplicates),
+            },
+        )
+        for key, count, origin in duplicates:
+            logger.warning("Posible N+1 en %s: %s consultas iguales desde %s: %s", view, count, origin, key)
+        for query in recorder.slow:
+            slow_logger.warning(
+                "%.1f ms [%s] %s desde %s: %s",
+                query['duration_ms'], query['database'], view, query['origin'], query['sql'],
+                extra=query,
+            )
+
+        budget = settings.SQL_QUERY_BUDGETS.get(match.url_name) if match else None
+        if budget is not None and recorder.count > budget:
+            logger.warning("%s excedió su presupuesto: %s consultas (máximo %s)", view, recorder.count, budget)
@@ -0,0 +1,156 @@
+# sitio_web/jobs.py
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Registro nombre -> función de las tareas declaradas con @task.
+_registry = {}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def task(name=None, max_attempts=None):
+    """
+    Declara una función como tarea en segundo plano.
+    La función decorada gana un método .enqueue(**kwargs).
+    Los argumentos deben ser serializables a JSON.
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        _registry[task_name] = func
+
+        def enqueue_task(delay=0, **kwargs):
+            return enqueue(task_name, delay=delay, max_attempts=max_attempts, **kwargs)
+
+        func.task_name = task_name
+        func.enqueue = enqueue_task
+        return func
+    return decorator
+
+
+def enqueue(task_name, delay=0, max_attempts=None, **payload):
+    """
+    Encola una tarea. Si se llama dentro de una transacción, el Job se
+    confirma junto con los datos que lo originaron.
+    """
+    return Job.objects.create(
+        task=task_name,
+        payload=payload,
+        max_attempts=max_attempts or _setting('JOBS_MAX_ATTEMPTS', 5),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def backoff_seconds(attempts):
+    """
+    Espera exponencial con jitter antes del siguiente reintento.
+    """
+    base = _setting('JOBS_BACKOFF_BASE', 10)
+    cap = _setting('JOBS_BACKOFF_MAX', 3600)
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _available(now):
+    # Pendientes cuyo run_at ya pasó, o tomadas por un worker cuyo
+    # timeout de visibilidad expiró (el worker murió o se colgó).
+    return Q(status='PENDIENTE', run_at__lte=now) | Q(status='EN_PROCESO', locked_until__lt=now)
+
+
+def claim_job(worker_id):
+    """
+    Toma el siguiente Job disponible. El UPDATE condicional hace que dos
+    workers no puedan tomar el mismo Job, incluso en SQLite.
+    """
+    visibility = _setting('JOBS_VISIBILITY_TIMEOUT', 300)
+    now = timezone.now()
+    candidates = Job.objects.filter(_available(now)).order_by('run_at', 'id').values_list('id', flat=True)[:10]
+
+    for job_id in candidates:
+        claimed = Job.objects.filter(_available(now), pk=job_id).update(
+            status='EN_PROCESO',
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """
+    Ejecuta un Job ya tomado y registra el resultado o programa el reintento.
+    """
+    func = _registry.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f"Tarea no registrada: {job.task}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) falló definitivamente:\n%s", job.pk, job.task, error)
+            Job.objects.filter(pk=job.pk).update(
+                status='FALLIDO', last_error=error, locked_until=None, finished_at=timezone.now(),
+            )
+        else:
+            delay = backoff_seconds(job.attempts)
+            logger.warning("Job %s (%s) falló, reintento en %.0fs", job.pk, job.task, delay)
+            Job.objects.filter(pk=job.pk).update(
+                status='PENDIENTE', last_error=error, locked_until=None,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status='COMPLETADO', locked_until=None, finished_at=timezone.now(),
+    )
+    return True
+
+
+def run_worker(stop_event=None, poll_interval=None, max_jobs=None, burst=False):
+    """
+    Bucle de un worker: toma y ejecuta Jobs hasta que se detiene.
+    Con burst=True termina cuando no quedan Jobs disponibles.
+    """
+    # Asegura que las tareas de la app estén registradas.
+    from . import tasks  # noqa: F401
+
+    poll_interval = poll_interval if poll_interval is not None else _setting('JOBS_POLL_INTERVAL', 1.0)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    processed = 0
+
+    while not (stop_event and stop_event.is_set()):
+        close_old_connections()
+        job = claim_job(worker_id)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+
+    close_old_connections()
+    return processed
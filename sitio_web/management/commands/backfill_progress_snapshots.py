@@ -0,0 +1,63 @@
+# sitio_web/management/commands/backfill_progress_snapshots.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sitio_web.models import ProjectProgressSnapshot, ProjectUpdate
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la serie diaria de avance (ProjectProgressSnapshot) a partir de los ProjectUpdate existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Cantidad de snapshots por inserción masiva.")
+        parser.add_argument('--project', type=int,
+                            help="Reconstruir solo el proyecto con este id.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        updates = ProjectUpdate.objects.order_by('project_id', 'date', 'id')
+        snapshots = ProjectProgressSnapshot.objects.all()
+        if options['project']:
+            updates = updates.filter(project_id=options['project'])
+            snapshots = snapshots.filter(project_id=options['project'])
+
+        rows = updates.values_list('project_id', 'date', 'progress_percent').iterator(chunk_size=batch_size)
+
+        created = 0
+        batch = []
+        current = None
+
+        with transaction.atomic():
+            snapshots.delete()
+
+            # Las filas vienen ordenadas por (proyecto, fecha, id): el último
+            # porcentaje de cada grupo es el que queda como snapshot del día.
+            for project_id, day, progress in rows:
+                if current and (current.project_id, current.date) == (project_id, day):
+                    current.progress_percent = progress
+                    current.updates_count += 1
+                    continue
+
+                if current:
+                    batch.append(current)
+                    if len(batch) >= batch_size:
+                        ProjectProgressSnapshot.objects.bulk_create(batch)
+                        created += len(batch)
+                        batch = []
+
+                current = ProjectProgressSnapshot(
+                    project_id=project_id,
+                    date=day,
+                    progress_percent=progress,
+                    updates_count=1,
+                )
+
+            if current:
+                batch.append(current)
+            ProjectProgressSnapshot.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Se generaron {created} snapshots de avance."))
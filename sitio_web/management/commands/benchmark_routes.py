@@ -0,0 +1,319 @@
+# sitio_web/management/commands/benchmark_routes.py
+
+import json
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from sitio_web import urls as sitio_urls
+from sitio_web.models import Document, Message, MessageThread, Profile, Project, ProjectAssignment, ProjectUpdate
+
+HOST = 'localhost'
+ROLES = ('ADMIN', 'WORKER', 'CLIENT')
+
+# Rutas que no se pueden medir con un GET repetido, y por qué.
+SKIPPED = {
+    'logout': "cierra la sesión del cliente de prueba",
+    'event_stream': "stream SSE sin fin (medir con benchmark_views bajo ASGI)",
+    'chunked_upload_init': "solo POST, crea subidas",
+    'chunked_upload_status': "requiere una subida en curso",
+    'chunked_upload_chunk': "solo PUT, escribe partes",
+    'chunked_upload_finalize': "solo POST, crea documentos",
+}
+
+# Parámetros fijos de algunas rutas.
+FIXED_KWARGS = {
+    'fmt': 'csv',
+}
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _change(old, new):
+    if not old:
+        return '—'
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide todas las rutas con nombre de sitio_web/urls.py, como cada rol y con "
+        "peticiones concurrentes: latencia p50/p95/p99, throughput y consultas SQL por "
+        "petición. Guarda el resultado en un JSON (línea base) que se puede comparar "
+        "entre versiones con --compare. Pensado para correr sobre datos de seed_load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='load_baseline.json',
+                            help="Archivo JSON donde guardar los resultados.")
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help="JSON de una corrida anterior con el que comparar.")
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help="Aumento de p95 (%%) desde el que se marca una regresión.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Hilos cliente simultáneos.")
+        parser.add_argument('--requests', type=int, default=50,
+                            help="Peticiones por ruta y rol.")
+        parser.add_argument('--role', action='append', choices=ROLES, dest='roles',
+                            help="Rol a medir; se puede repetir (por defecto, todos).")
+        parser.add_argument('--route', action='append', dest='routes',
+                            help="Nombre de ruta a medir; se puede repetir (por defecto, todas).")
+
+    # --- Usuarios y parámetros de cada rol ---
+
+    def _pick_users(self):
+        """
+        Un usuario representativo por rol: el trabajador con más proyectos
+        asignados y el cliente con más proyectos (los casos más pesados).
+        """
+        users = {}
+        users['ADMIN'] = User.objects.filter(profile__role='ADMIN').order_by('id').first()
+        worker_id = (
+            ProjectAssignment.objects.values('worker_id')
+            .order_by().annotate(total=Count('id')).order_by('-total', 'worker_id')
+            .values_list('worker_id', flat=True).first()
+        )
+        users['WORKER'] = User.objects.filter(pk=worker_id).first()
+        client_id = (
+            Project.objects.filter(client__profile__role='CLIENT').values('client_id')
+            .order_by().annotate(total=Count('id')).order_by('-total', 'client_id')
+            .values_list('client_id', flat=True).first()
+        )
+        users['CLIENT'] = User.objects.filter(pk=client_id).first()
+        return users
+
+    def _route_kwargs(self, role, user):
+        """
+        Valores de los parámetros de URL para un rol: objetos que el rol sí
+        puede ver, para medir el camino normal y no la respuesta 403.
+        """
+        if role == 'CLIENT':
+            projects = Project.objects.filter(client=user)
+            messages = Message.objects.filter(Q(sender=user) | Q(receiver=user))
+            threads = MessageThread.objects.filter(client=user)
+            documents = Document.objects.filter(project__client=user, visible_to_client=True)
+        else:
+            projects = Project.objects.all()
+            if role == 'WORKER':
+                projects = projects.filter(assignments__worker=user)
+            messages = Message.objects.filter(sender__profile__role='CLIENT', project__in=projects)
+            threads = MessageThread.objects.filter(client__isnull=False, project__in=projects)
+            documents = Document.objects.filter(project__in=projects)
+
+        # El proyecto con más avances, para que el detalle y la serie pesen.
+        project_id = (
+            ProjectUpdate.objects.filter(project__in=projects).values('project_id')
+            .order_by().annotate(total=Count('id')).order_by('-total', 'project_id')
+            .values_list('project_id', flat=True).first()
+        ) or projects.order_by('id').values_list('id', flat=True).first()
+
+        kwargs = dict(FIXED_KWARGS)
+        kwargs['project_id'] = project_id
+        kwargs['message_id'] = messages.order_by('-sent_at', '-id').values_list('id', flat=True).first()
+        # La conversación más larga.
+        kwargs['thread_id'] = threads.order_by('-message_count', '-id').values_list('id', flat=True).first()
+        kwargs['document_id'] = documents.order_by('-id').values_list('id', flat=True).first()
+        kwargs['user_id'] = (
+            Profile.objects.filter(role='CLIENT').order_by('user_id').values_list('user_id', flat=True).first()
+        )
+        return kwargs
+
+    def _targets(self, users, only_routes):
+        """
+        [(nombre, rol, url)] para cada ruta con nombre y cada rol, más las
+        rutas omitidas con el motivo.
+        """
+        targets, skipped = [], {}
+        for pattern in sitio_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = pattern.name
+            if only_routes and name not in only_routes:
+                continue
+            if name in SKIPPED:
+                skipped[name] = SKIPPED[name]
+                continue
+            params = list(pattern.pattern.converters)
+            for role, user in users.items():
+                values = self.role_kwargs[role]
+                kwargs = {param: values.get(param) for param in params}
+                missing = [param for param, value in kwargs.items() if value is None]
+                if missing:
+                    skipped[f'{name}[{role}]'] = f"sin datos para {', '.join(missing)}"
+                    continue
+                targets.append((name, role, reverse(name, kwargs=kwargs)))
+        return targets, skipped
+
+    # --- Medición ---
+
+    def _client(self, user):
+        client = Client(raise_request_exception=False, SERVER_NAME=HOST)
+        client.force_login(user)
+        return client
+
+    def _fetch(self, client, url):
+        started = time.perf_counter()
+        response = client.get(url)
+        # Las respuestas en streaming hacen su trabajo al recorrerlas.
+        if response.streaming:
+            for _chunk in response.streaming_content:
+                pass
+        else:
+            response.content
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    def _count_queries(self, client, url):
+        # En secuencia y sin consultas paralelas: así todas pasan por esta conexión.
+        with override_settings(ASYNC_PARALLEL_QUERIES=False):
+            with CaptureQueriesContext(connection) as context:
+                _latency, status = self._fetch(client, url)
+        return len(context.captured_queries), status
+
+    def _measure(self, clients, url, total):
+        concurrency = len(clients)
+
+        def worker(args):
+            client, count = args
+            try:
+                return [self._fetch(client, url) for _ in range(count)]
+            finally:
+                connections.close_all()
+
+        counts = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, zip(clients, counts)))
+        elapsed = time.perf_counter() - started
+        return [sample for samples in results for sample in samples], elapsed
+
+    # --- Comparación ---
+
+    def _compare(self, baseline_path, current, threshold):
+        try:
+            with open(baseline_path, encoding='utf-8') as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"No se pudo leer la línea base {baseline_path}: {exc}")
+
+        self.stdout.write(f"\nComparación con {baseline_path} ({baseline['meta'].get('generated_at', '?')}):")
+        self.stdout.write(f"{'ruta':<42}{'p95 antes':>11}{'p95 ahora':>11}{'cambio':>9}{'consultas':>12}")
+        regressions = 0
+        for name, roles in sorted(current['routes'].items()):
+            for role, now in sorted(roles.items()):
+                before = baseline['routes'].get(name, {}).get(role)
+                label = f"{name}[{role}]"
+                if before is None:
+                    self.stdout.write(f"{label:<42}{'—':>11}{now['p95_ms']:>9.1f}ms{'nueva':>9}")
+                    continue
+                queries = f"{before['queries']}→{now['queries']}"
+                line = (f"{label:<42}{before['p95_ms']:>9.1f}ms{now['p95_ms']:>9.1f}ms"
+                        f"{_change(before['p95_ms'], now['p95_ms']):>9}{queries:>12}")
+                slower = before['p95_ms'] and (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 > threshold
+                if slower or now['queries'] > before['queries']:
+                    regressions += 1
+                    self.stdout.write(self.style.WARNING(line + "  REGRESIÓN"))
+                else:
+                    self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f"{regressions} regresiones (p95 > +{threshold:.0f}% o más consultas)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Sin regresiones."))
+
+    # --- Comando ---
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        total = max(1, options['requests'])
+        roles = options['roles'] or list(ROLES)
+
+        users = {role: user for role, user in self._pick_users().items() if role in roles}
+        for role, user in list(users.items()):
+            if user is None:
+                self.stderr.write(f"No hay usuarios con rol {role}; se omite.")
+                del users[role]
+        if not users:
+            raise CommandError("No hay datos para medir; genera una carga con `manage.py seed_load`.")
+
+        self.role_kwargs = {role: self._route_kwargs(role, user) for role, user in users.items()}
+        targets, skipped = self._targets(users, set(options['routes'] or ()))
+        clients = {role: [self._client(user) for _ in range(concurrency)] for role, user in users.items()}
+
+        result = {
+            'meta': {
+                'generated_at': timezone.now().isoformat(timespec='seconds'),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'concurrency': concurrency,
+                'requests_per_route': total,
+                'users': {role: user.username for role, user in users.items()},
+                'data': {
+                    model.__name__: model.objects.count()
+                    for model in (User, Project, ProjectAssignment, ProjectUpdate, Document, Message)
+                },
+            },
+            'routes': {},
+            'skipped': skipped,
+        }
+
+        # Los 403 esperados de cada rol llenarían la salida de avisos de django.request.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        self.stdout.write(f"{len(targets)} mediciones, {total} peticiones cada una, concurrencia {concurrency}.")
+        self.stdout.write(
+            f"{'ruta':<42}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>8}{'consultas':>11}  estados"
+        )
+        for name, role, url in targets:
+            role_clients = clients[role]
+            queries, _status = self._count_queries(role_clients[0], url)
+            self._fetch(role_clients[0], url)  # calentamiento
+            samples, elapsed = self._measure(role_clients, url, total)
+
+            latencies = [latency for latency, _status in samples]
+            statuses = {}
+            for _latency, status in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            stats = {
+                'url': url,
+                'p50_ms': round(statistics.median(latencies), 2),
+                'p95_ms': round(_percentile(latencies, 95), 2),
+                'p99_ms': round(_percentile(latencies, 99), 2),
+                'max_ms': round(max(latencies), 2),
+                'requests_per_second': round(len(samples) / elapsed, 1),
+                'queries': queries,
+                'status_codes': statuses,
+            }
+            result['routes'].setdefault(name, {})[role] = stats
+            self.stdout.write(
+                f"{f'{name}[{role}]':<42}"
+                f"{stats['p50_ms']:>7.1f}ms{stats['p95_ms']:>7.1f}ms{stats['p99_ms']:>7.1f}ms"
+                f"{stats['requests_per_second']:>8.0f}{queries:>11}  "
+                + ', '.join(f'{code}×{n}' for code, n in sorted(statuses.items()))
+            )
+
+        for role_clients in clients.values():
+            for client in role_clients:
+                client.logout()
+
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump(result, handle, indent=2, sort_keys=True, ensure_ascii=False)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}."))
+        for name, reason in sorted(skipped.items()):
+            self.stdout.write(f"  omitida {name}: {reason}")
+
+        if options['compare']:
+            self._compare(options['compare'], result, options['threshold'])
@@ -0,0 +1,54 @@
+# sitio_web/management/commands/benchmark_search.py
+
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from sitio_web.middleware import get_user_role
+from sitio_web.search import like_search, search
+
+DEFAULT_TERMS = ['hormigon', 'plano', 'avance', 'contrato', 'santiago', 'retraso']
+
+
+class Command(BaseCommand):
+    help = "Compara la búsqueda FTS5 contra la línea base con LIKE '%...%' (la del admin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('terms', nargs='*', help="Términos a buscar (por defecto, una lista fija).")
+        parser.add_argument('--user', help="Usuario con cuyos permisos se busca (por defecto, el primer ADMIN).")
+        parser.add_argument('--repeat', type=int, default=20, help="Repeticiones por término.")
+
+    def _time(self, func, *args):
+        samples = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            results = func(*args)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples, len(results)
+
+    def handle(self, *args, **options):
+        self.repeat = max(1, options['repeat'])
+        terms = options['terms'] or DEFAULT_TERMS
+
+        if options['user']:
+            user = User.objects.filter(username=options['user']).select_related('profile').first()
+        else:
+            user = User.objects.filter(profile__role='ADMIN').select_related('profile').first()
+        if user is None:
+            raise CommandError("No se encontró el usuario para el benchmark.")
+        role = get_user_role(user)
+
+        self.stdout.write(f"Usuario: {user.username} ({role}); {self.repeat} repeticiones por término.")
+        self.stdout.write(f"{'término':<16}{'FTS5 p50':>12}{'LIKE p50':>12}{'aceleración':>14}{'FTS':>6}{'LIKE':>6}")
+
+        for term in terms:
+            fts_samples, fts_count = self._time(search, user, role, term)
+            like_samples, like_count = self._time(like_search, user, role, term)
+            fts_p50 = statistics.median(fts_samples)
+            like_p50 = statistics.median(like_samples)
+            speedup = like_p50 / fts_p50 if fts_p50 else float('inf')
+            self.stdout.write(
+                f"{term:<16}{fts_p50:>10.2f}ms{like_p50:>10.2f}ms{speedup:>13.1f}x{fts_count:>6}{like_count:>6}"
+            )
@@ -0,0 +1,148 @@
+# sitio_web/management/commands/benchmark_sqlite_writes.py
+
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from sitio_web.models import Project, ProjectUpdate
+from sitio_web.retry import is_database_locked, run_with_retry
+
+# 'baseline' es la configuración por defecto de Django (antes de este ajuste):
+# journal DELETE, transacciones DEFERRED y el timeout de 5 s del módulo sqlite3.
+# journal_mode se fija en la copia antes de empezar (WAL queda guardado en el
+# archivo y cambiarlo con otros procesos conectados falla).
+MODES = {
+    'baseline': {'journal_mode': 'DELETE', 'options': {}, 'retry': False},
+    'tuned': {'journal_mode': 'WAL', 'options': settings.SQLITE_OPTIONS, 'retry': True},
+}
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _add_update(project_id, author_id, percent):
+    # Lo mismo que escribe worker_add_update al registrar un avance (el
+    # snapshot diario lo suma la señal post_save de ProjectUpdate).
+    ProjectUpdate.objects.create(
+        project_id=project_id, author_id=author_id,
+        progress_percent=percent, comment='Avance de prueba de carga',
+    )
+    Project.objects.filter(pk=project_id).update(progress_percent=percent)
+
+
+def _writer(job):
+    """
+    Proceso hijo: espera la señal de partida y registra `writes` avances,
+    midiendo cada uno. Devuelve (latencias en ms, errores).
+    """
+    path, mode, writes, targets, start_at = job
+    connection = connections[DEFAULT_DB_ALIAS]
+    connection.settings_dict = {
+        **connection.settings_dict,
+        'NAME': path,
+        'OPTIONS': dict(MODES[mode]['options']),
+        'CONN_MAX_AGE': None,
+    }
+    retry = MODES[mode]['retry']
+
+    latencies, errors = [], 0
+    time.sleep(max(0.0, start_at - time.time()))
+    for i in range(writes):
+        project_id, author_id = targets[i % len(targets)]
+        percent = Decimal(i % 100)
+        started = time.perf_counter()
+        try:
+            if retry:
+                run_with_retry(_add_update, project_id, author_id, percent)
+            else:
+                with transaction.atomic():
+                    _add_update(project_id, author_id, percent)
+        except OperationalError as exc:
+            if not is_database_locked(exc):
+                raise
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide escrituras concurrentes en SQLite desde varios procesos (como varios "
+        "workers de gunicorn registrando avances a la vez), con la configuración por "
+        "defecto de Django (baseline) y con WAL, busy_timeout, transacciones IMMEDIATE "
+        "y reintentos (tuned). Trabaja sobre una copia temporal de la base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help="Procesos escribiendo a la vez.")
+        parser.add_argument('--writes', type=int, default=200, help="Avances que registra cada proceso.")
+        parser.add_argument('--mode', choices=['baseline', 'tuned', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError("Este benchmark es para la base SQLite en archivo.")
+        targets = list(
+            Project.objects.filter(assignments__isnull=False)
+            .values_list('id', 'assignments__worker_id').order_by('id')[:50]
+        )
+        if not targets:
+            raise CommandError("Se necesita al menos un proyecto con un trabajador asignado (ver seed_load).")
+
+        processes = max(1, options['processes'])
+        writes = max(1, options['writes'])
+        modes = ['baseline', 'tuned'] if options['mode'] == 'both' else [options['mode']]
+        source_path = str(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+
+        workdir = tempfile.mkdtemp(prefix='ccr_sqlite_bench_')
+        try:
+            self.stdout.write(f"{processes} procesos × {writes} avances; copia de trabajo en {workdir}")
+            self.stdout.write(f"{'modo':<10}{'escr/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}  bloqueos")
+            for mode in modes:
+                # Copia fresca por modo, para que ambos partan de los mismos datos.
+                path = os.path.join(workdir, f'{mode}.sqlite3')
+                source, target = sqlite3.connect(source_path), sqlite3.connect(path)
+                try:
+                    source.backup(target)
+                    target.execute(f"PRAGMA journal_mode={MODES[mode]['journal_mode']}")
+                finally:
+                    target.close()
+                    source.close()
+
+                # Los hijos no deben heredar conexiones abiertas del padre.
+                connections.close_all()
+                context = multiprocessing.get_context('fork')
+                start_at = time.time() + 0.5
+                jobs = [(path, mode, writes, targets[i::processes] or targets, start_at) for i in range(processes)]
+                with context.Pool(processes) as pool:
+                    results = pool.map(_writer, jobs)
+                elapsed = time.time() - start_at
+
+                latencies = [latency for samples, _errors in results for latency in samples]
+                errors = sum(errors for _samples, errors in results)
+                if not latencies:
+                    self.stdout.write(f"{mode:<10}{'—':>9}  todas las escrituras fallaron ({errors} bloqueos)")
+                    continue
+                self.stdout.write(
+                    f"{mode:<10}{len(latencies) / elapsed:>9.0f}"
+                    f"{statistics.median(latencies):>8.1f}ms"
+                    f"{_percentile(latencies, 95):>8.1f}ms"
+                    f"{_percentile(latencies, 99):>8.1f}ms"
+                    f"{max(latencies):>8.1f}ms  {errors}"
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
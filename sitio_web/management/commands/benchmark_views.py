@@ -0,0 +1,200 @@
+# sitio_web/management/commands/benchmark_views.py
+
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+
+HOST = 'localhost'
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la latencia (p50/p95/p99) de las vistas servidas por el handler WSGI "
+        "(un hilo por petición, como gunicorn con hilos) y por ccr_intranet.asgi "
+        "(tareas en un loop), a distintos niveles de concurrencia. Corre en el mismo "
+        "proceso, sin red: mide la pila de Django y la base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Usuario autenticado (por defecto, el primer CLIENTE).")
+        parser.add_argument('--url', action='append', dest='urls',
+                            help="Ruta a pedir; se puede repetir (por defecto /dashboard/ y /client/inbox/).")
+        parser.add_argument('--concurrency', default='1,8,32',
+                            help="Niveles de concurrencia separados por coma.")
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Peticiones por nivel de concurrencia y por modo.")
+        parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='both')
+
+    # --- Sesión del usuario de prueba ---
+
+    def _login_cookie(self, user):
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.save()
+        self.session = store
+        return f'{settings.SESSION_COOKIE_NAME}={store.session_key}'
+
+    # --- WSGI ---
+
+    def _wsgi_request(self, app, path, cookie):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': HOST,
+            'HTTP_COOKIE': cookie,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        started = time.perf_counter()
+        body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            for _chunk in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return (time.perf_counter() - started) * 1000, status[0]
+
+    def _run_wsgi(self, paths, cookie, concurrency, total):
+        app = get_wsgi_application()
+
+        def worker(count):
+            samples = []
+            try:
+                for i in range(count):
+                    samples.append(self._wsgi_request(app, paths[i % len(paths)], cookie))
+            finally:
+                connections.close_all()
+            return samples
+
+        counts = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, counts))
+        elapsed = time.perf_counter() - started
+        return [sample for samples in results for sample in samples], elapsed
+
+    # --- ASGI ---
+
+    async def _asgi_request(self, app, path, cookie):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': (HOST, 80),
+        }
+        request_sent = False
+        finished = asyncio.Event()
+        status = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(str(message['status']))
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                finished.set()
+
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        return (time.perf_counter() - started) * 1000, status[0]
+
+    def _run_asgi(self, paths, cookie, concurrency, total):
+        app = get_asgi_application()
+
+        async def client(count):
+            return [await self._asgi_request(app, paths[i % len(paths)], cookie) for i in range(count)]
+
+        async def main():
+            counts = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+            started = time.perf_counter()
+            results = await asyncio.gather(*(client(count) for count in counts))
+            return [sample for samples in results for sample in samples], time.perf_counter() - started
+
+        return asyncio.run(main())
+
+    # --- Comando ---
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.filter(profile__role='CLIENT').first()
+        if user is None:
+            raise CommandError("No se encontró el usuario para el benchmark.")
+
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError("--concurrency debe ser una lista de enteros, p. ej. 1,8,32.")
+        paths = options['urls'] or ['/dashboard/', '/client/inbox/']
+        total = max(1, options['requests'])
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+
+        cookie = self._login_cookie(user)
+        try:
+            self.stdout.write(f"Usuario: {user.username}; rutas: {', '.join(paths)}; {total} peticiones por nivel.")
+            self.stdout.write(
+                f"{'modo':<6}{'conc.':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}{'req/s':>9}  errores"
+            )
+            for concurrency in levels:
+                for mode in modes:
+                    runner = self._run_wsgi if mode == 'wsgi' else self._run_asgi
+                    runner(paths, cookie, 1, len(paths))  # calentamiento
+                    samples, elapsed = runner(paths, cookie, concurrency, total)
+                    latencies = [latency for latency, _status in samples]
+                    errors = sum(1 for _latency, status in samples if not status.startswith('200'))
+                    self.stdout.write(
+                        f"{mode:<6}{concurrency:>6}"
+                        f"{statistics.median(latencies):>8.1f}ms"
+                        f"{_percentile(latencies, 95):>8.1f}ms"
+                        f"{_percentile(latencies, 99):>8.1f}ms"
+                        f"{max(latencies):>8.1f}ms"
+                        f"{len(samples) / elapsed:>9.0f}  {errors}"
+                    )
+        finally:
+            self.session.delete()
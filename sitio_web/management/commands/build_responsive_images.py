@@ -0,0 +1,47 @@
+# sitio_web/management/commands/build_responsive_images.py
+
+import json
+import os
+
+from django.apps import apps
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from sitio_web.assets import RESPONSIVE_DIR, RESPONSIVE_IMAGES, RESPONSIVE_MANIFEST, RESPONSIVE_WIDTHS
+from sitio_web.images import build_static_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera variantes por ancho (AVIF/WebP/JPEG) de las imágenes de la página pública "
+        "(RESPONSIVE_IMAGES en sitio_web/assets.py) y el manifest que usa {% responsive_image %}. "
+        "Correr al cambiar esas imágenes; el resultado se versiona junto a los estáticos."
+    )
+
+    def handle(self, *args, **options):
+        static_dir = os.path.join(apps.get_app_config('sitio_web').path, 'static')
+        output_dir = os.path.join(static_dir, *RESPONSIVE_DIR.split('/'))
+        os.makedirs(output_dir, exist_ok=True)
+
+        manifest = {}
+        for image_path in RESPONSIVE_IMAGES:
+            source = finders.find(image_path)
+            if source is None:
+                raise CommandError(f"No se encontró la imagen {image_path} en los estáticos.")
+            entry = build_static_variants(source, output_dir, RESPONSIVE_WIDTHS, RESPONSIVE_DIR)
+            manifest[image_path] = entry
+            generated = sum(len(widths) for widths in entry['variants'].values())
+            total = sum(
+                os.path.getsize(os.path.join(static_dir, *path.split('/')))
+                for widths in entry['variants'].values() for path in widths.values()
+            )
+            self.stdout.write(
+                f"  {image_path}: {entry['width']}x{entry['height']}, "
+                f"{generated} variantes ({total // 1024} KB en total, "
+                f"original {os.path.getsize(source) // 1024} KB)"
+            )
+
+        with open(os.path.join(static_dir, *RESPONSIVE_MANIFEST.split('/')), 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Manifest escrito en {RESPONSIVE_MANIFEST}."))
@@ -0,0 +1,94 @@
+# sitio_web/management/commands/dedupe_document_storage.py
+
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sitio_web.models import Document
+from sitio_web.storage import blob_digest, blob_name, hash_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Migra los documentos existentes al storage direccionado por contenido: "
+        "calcula su SHA-256, los mueve a blobs/ y elimina las copias duplicadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Solo informar qué se haría y cuánto espacio se liberaría.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = Document._meta.get_field('file').storage
+
+        migrated = duplicates = missing = 0
+        reclaimed = 0
+        # Varios Document pueden apuntar al mismo archivo antiguo.
+        digests_by_old_name = {}
+        seen_digests = set()
+
+        documents = Document.objects.exclude(file='').only('id', 'file', 'original_filename', 'sha256', 'size')
+        for doc in documents.iterator(chunk_size=500):
+            old_name = doc.file.name
+            if blob_digest(old_name):
+                if not doc.sha256 and not dry_run:
+                    Document.objects.filter(pk=doc.pk).update(
+                        sha256=blob_digest(old_name), size=storage.size(old_name),
+                    )
+                continue
+
+            digest = digests_by_old_name.get(old_name)
+            first_reference = digest is None
+            if first_reference:
+                if not storage.exists(old_name):
+                    missing += 1
+                    self.stderr.write(f"Documento {doc.pk}: no existe el archivo {old_name}")
+                    continue
+                with storage.open(old_name, 'rb') as content:
+                    digest = hash_file(content)
+                digests_by_old_name[old_name] = digest
+
+            new_name = blob_name(digest)
+            already_stored = storage.exists(new_name)
+            if first_reference:
+                size = storage.size(old_name)
+                if digest in seen_digests or already_stored:
+                    duplicates += 1
+                    reclaimed += size
+                seen_digests.add(digest)
+            else:
+                size = storage.size(new_name) if already_stored else storage.size(old_name)
+
+            migrated += 1
+            if dry_run:
+                continue
+
+            if not already_stored:
+                # Enlace duro (o copia si no se puede) antes de tocar la BD:
+                # si algo falla, el archivo original sigue en su lugar.
+                new_path = storage.path(new_name)
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                try:
+                    os.link(storage.path(old_name), new_path)
+                except OSError:
+                    shutil.copy2(storage.path(old_name), new_path)
+
+            with transaction.atomic():
+                Document.objects.filter(pk=doc.pk).update(
+                    file=new_name,
+                    sha256=digest,
+                    size=size,
+                    original_filename=doc.original_filename or os.path.basename(old_name),
+                )
+
+            if not Document.objects.filter(file=old_name).exists() and storage.exists(old_name):
+                storage.delete(old_name)
+
+        verb = "Se migrarían" if dry_run else "Se migraron"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {migrated} documentos; {duplicates} eran duplicados "
+            f"({reclaimed / (1024 * 1024):.1f} MB liberados). Archivos faltantes: {missing}."
+        ))
@@ -0,0 +1,56 @@
+# sitio_web/management/commands/export_data.py
+
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from sitio_web.exports import FORMATS, message_rows, project_rows, render_export
+from sitio_web.middleware import get_user_role
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta proyectos (con su último avance) o el historial de mensajes a CSV o XLSX "
+        "en streaming, con memoria constante. Con --user se aplican los filtros de ese rol."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['projects', 'messages'])
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help="Archivo de salida (por defecto, la salida estándar).")
+        parser.add_argument('--user', help="Exportar con los permisos de este usuario (por defecto, como ADMIN).")
+        parser.add_argument('--client', help="Solo mensajes de este cliente (username).")
+
+    def handle(self, *args, **options):
+        user, role = None, 'ADMIN'
+        if options['user']:
+            user = User.objects.filter(username=options['user']).select_related('profile').first()
+            if user is None:
+                raise CommandError(f"No existe el usuario {options['user']!r}.")
+            role = get_user_role(user)
+
+        if options['dataset'] == 'projects':
+            rows, sheet_name = project_rows(user, role), 'Proyectos'
+        else:
+            client_id = None
+            if options['client']:
+                client_id = User.objects.filter(username=options['client']).values_list('id', flat=True).first()
+                if client_id is None:
+                    raise CommandError(f"No existe el cliente {options['client']!r}.")
+            rows, sheet_name = message_rows(user, role, client_id), 'Mensajes'
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in render_export(rows, options['format'], sheet_name):
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Se escribieron {written / 1024:.0f} KB en {options['output']}."))
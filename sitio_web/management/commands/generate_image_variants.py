@@ -0,0 +1,32 @@
+# sitio_web/management/commands/generate_image_variants.py
+
+from django.core.management.base import BaseCommand
+
+from sitio_web.images import generate_image_variants
+from sitio_web.models import ProjectUpdate
+
+
+class Command(BaseCommand):
+    help = "Genera las variantes responsivas (WebP/JPEG y placeholder) de las imágenes de avances existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Regenerar también las imágenes que ya tienen variantes.")
+
+    def handle(self, *args, **options):
+        updates = ProjectUpdate.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['force']:
+            updates = updates.filter(image_variants={})
+
+        processed = failed = 0
+        for update_id in updates.values_list('id', flat=True).iterator():
+            try:
+                generate_image_variants(update_id)
+                processed += 1
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f"Avance {update_id}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Variantes generadas para {processed} imágenes ({failed} con error)."
+        ))
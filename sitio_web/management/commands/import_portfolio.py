@@ -0,0 +1,66 @@
+# sitio_web/management/commands/import_portfolio.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sitio_web.imports import DEFAULT_BATCH_SIZE, import_assignments, import_projects, import_users
+
+# Se importan en este orden: los proyectos referencian clientes y las
+# asignaciones, proyectos y trabajadores.
+STEPS = (
+    ('users', import_users),
+    ('projects', import_projects),
+    ('assignments', import_assignments),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga masiva de una cartera desde CSV (UTF-8, con encabezado). "
+        "usuarios: username,email,first_name,last_name,role,phone,company_name[,password]; "
+        "proyectos: name,client,start_date,end_date_estimated,address,city,status,progress_percent,description; "
+        "asignaciones: project,worker. Las filas inválidas se informan y se omiten; "
+        "lo que ya existe no se duplica."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', help="CSV de usuarios (se crean con su Profile).")
+        parser.add_argument('--projects', help="CSV de proyectos (client = username del cliente).")
+        parser.add_argument('--assignments', help="CSV de asignaciones (project = nombre, worker = username).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Filas por transacción y por bulk_create.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Solo validar y contar, sin escribir. Cada archivo se valida contra la "
+                                 "base actual: las referencias a filas de otro CSV aún no importado fallan.")
+        parser.add_argument('--max-errors', type=int, default=20,
+                            help="Cuántos errores de fila mostrar por archivo.")
+
+    def handle(self, *args, **options):
+        files = [(key, importer, options[key]) for key, importer in STEPS if options[key]]
+        if not files:
+            raise CommandError("Indica al menos uno de --users, --projects o --assignments.")
+        batch_size = max(1, options['batch_size'])
+
+        verb = "se crearían" if options['dry_run'] else "creados"
+        for _key, importer, path in files:
+            started = time.perf_counter()
+            try:
+                stats = importer(path, batch_size=batch_size, dry_run=options['dry_run'])
+            except (OSError, ValueError) as exc:
+                raise CommandError(str(exc))
+            stats.elapsed = time.perf_counter() - started
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{stats.label}: {stats.read} filas en {stats.elapsed:.2f}s "
+                f"({stats.rows_per_second:,.0f} filas/s); {verb}: {stats.created}, "
+                f"ya existían: {stats.skipped}, con errores: {len(stats.errors)}."
+            ))
+            for line, message in stats.errors[:options['max_errors']]:
+                self.stderr.write(f"  línea {line}: {message}")
+            if len(stats.errors) > options['max_errors']:
+                self.stderr.write(f"  ... y {len(stats.errors) - options['max_errors']} errores más.")
+            if stats.needs_reindex:
+                self.stdout.write(self.style.WARNING(
+                    "La base de datos no devolvió los ids creados: corre rebuild_search_index."
+                ))
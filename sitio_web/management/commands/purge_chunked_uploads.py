@@ -0,0 +1,30 @@
+# sitio_web/management/commands/purge_chunked_uploads.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sitio_web.models import ChunkedUpload
+from sitio_web.uploads import discard
+
+
+class Command(BaseCommand):
+    help = "Elimina las subidas por partes abandonadas y sus archivos temporales."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=settings.CHUNKED_UPLOAD_EXPIRY_HOURS,
+                            help="Antigüedad mínima (sin actividad) para purgar una subida.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        stale = ChunkedUpload.objects.filter(status='EN_PROGRESO', updated_at__lt=cutoff)
+
+        purged = 0
+        for upload in stale.iterator():
+            discard(upload)
+            upload.delete()
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Se purgaron {purged} subidas abandonadas."))
@@ -0,0 +1,22 @@
+# sitio_web/management/commands/ratelimit_stats.py
+
+from django.core.management.base import BaseCommand
+
+from sitio_web.ratelimit import rate_stats, reset_rate_stats
+
+
+class Command(BaseCommand):
+    help = "Muestra cuántos intentos dejó pasar y cuántos bloqueó el limitador de login y registro."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Pone los contadores en cero después de mostrarlos.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'vista':<12}{'permitidos':>12}{'bloqueados':>12}  por regla")
+        for scope, stats in rate_stats().items():
+            blocked = stats['blocked']
+            detail = ', '.join(f'{kind}={count}' for kind, count in blocked.items())
+            self.stdout.write(f"{scope:<12}{stats['allowed']:>12}{sum(blocked.values()):>12}  {detail}")
+        if options['reset']:
+            reset_rate_stats()
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
@@ -0,0 +1,28 @@
+# sitio_web/management/commands/rebuild_search_index.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sitio_web.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda FTS5 de mensajes, documentos, avances y proyectos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Filas por inserción masiva.")
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stderr.write("La búsqueda FTS5 solo está disponible con SQLite; no hay índice que reconstruir.")
+            return
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            total = rebuild_index(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruido: {total} entradas en {elapsed:.2f}s."))
@@ -0,0 +1,51 @@
+# sitio_web/management/commands/reconcile_unread_counters.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sitio_web.backends import invalidate_cached_users
+from sitio_web.models import Profile, TeamInbox
+from sitio_web.unread import TEAM_INBOX_ID, expected_counts, expected_team_count, set_team_unread
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los contadores de mensajes sin leer (Profile.unread_messages y "
+        "el compartido del equipo, TeamInbox) desde la tabla de mensajes y corrige "
+        "los que se hayan desviado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Solo informar qué contadores están desviados.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        with transaction.atomic():
+            expected = expected_counts()
+            fixed = 0
+
+            team_total = expected_team_count()
+            current = TeamInbox.objects.filter(pk=TEAM_INBOX_ID).values_list('unread_messages', flat=True).first()
+            if current != team_total:
+                fixed += 1
+                self.stdout.write(f"Bandeja del equipo: {current} -> {team_total}")
+                if not dry_run:
+                    set_team_unread(team_total)
+
+            profiles = Profile.objects.select_related('user').only('id', 'user__username', 'user_id', 'unread_messages')
+            for profile in profiles.iterator():
+                correct = expected.get(profile.user_id, 0)
+                if profile.unread_messages == correct:
+                    continue
+                fixed += 1
+                self.stdout.write(
+                    f"{profile.user.username}: {profile.unread_messages} -> {correct}"
+                )
+                if not dry_run:
+                    Profile.objects.filter(pk=profile.pk).update(unread_messages=correct)
+                    invalidate_cached_users([profile.user_id])
+
+        verb = "Se corregirían" if dry_run else "Se corrigieron"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} contadores."))
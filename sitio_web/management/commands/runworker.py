@@ -0,0 +1,85 @@
+# sitio_web/management/commands/runworker.py
+
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# sitio_web.jobs se importa dentro de las funciones: con 'spawn' este módulo
+# se vuelve a importar en cada proceso hijo antes de django.setup().
+
+
+def _process_main(stop_event, poll_interval, burst):
+    """
+    Punto de entrada de cada proceso del pool (multiprocessing 'spawn').
+    """
+    import django
+    django.setup()
+    from sitio_web.jobs import run_worker
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(stop_event=stop_event, poll_interval=poll_interval, burst=burst)
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de tareas en segundo plano (tabla Job) con un pool de hilos o procesos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help="Cantidad de workers simultáneos.")
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help="Ejecutar los workers como hilos o como procesos.")
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Procesar lo pendiente y terminar.")
+
+    def handle(self, *args, **options):
+        from sitio_web.jobs import run_worker
+        from sitio_web.tasks import schedule_session_sweep
+
+        # Tareas periódicas: cada una vuelve a encolarse al terminar.
+        schedule_session_sweep()
+
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        burst = options['burst']
+
+        self.stdout.write(f"Iniciando {concurrency} worker(s) en modo {options['pool']}...")
+
+        if options['pool'] == 'process':
+            # Los procesos hijos abren sus propias conexiones.
+            connections.close_all()
+            context = multiprocessing.get_context('spawn')
+            stop_event = context.Event()
+            workers = [
+                context.Process(target=_process_main, args=(stop_event, poll_interval, burst), daemon=True)
+                for _ in range(concurrency)
+            ]
+        else:
+            stop_event = threading.Event()
+            workers = [
+                threading.Thread(
+                    target=run_worker,
+                    kwargs={'stop_event': stop_event, 'poll_interval': poll_interval, 'burst': burst},
+                    daemon=True,
+                )
+                for _ in range(concurrency)
+            ]
+
+        for worker in workers:
+            worker.start()
+
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Deteniendo workers (terminando las tareas en curso)...")
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+
+        self.stdout.write(self.style.SUCCESS("Workers detenidos."))
@@ -0,0 +1,350 @@
+# sitio_web/management/commands/seed_load.py
+
+import io
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from sitio_web.models import (
+    Document,
+    Message,
+    MessageThread,
+    Profile,
+    Project,
+    ProjectAssignment,
+    ProjectUpdate,
+)
+from sitio_web.search import rebuild_index
+from sitio_web.threads import backfill_threads
+
+# Todo lo que crea este comando lleva este prefijo, para poder borrarlo con --flush.
+PREFIX = 'load_'
+SEED_ADMIN = f'{PREFIX}admin'
+# Contraseña de todas las cuentas generadas (para entrar a mirar a mano).
+SEED_PASSWORD = 'carga-ccr-2025'
+
+CITIES = ['Santiago', 'Valparaíso', 'Concepción', 'La Serena', 'Antofagasta', 'Temuco', 'Rancagua', 'Talca']
+STREETS = ['Av. Providencia', 'Los Carrera', 'Av. Libertad', 'O\'Higgins', 'Av. Alemania', 'Balmaceda']
+WORKS = ['Edificio', 'Condominio', 'Bodega', 'Ampliación', 'Remodelación', 'Galpón', 'Oficinas']
+SUBJECTS = ['Consulta por plazos', 'Cambio de terminaciones', 'Estado de pago', 'Visita a obra',
+            'Retraso de materiales', 'Planos actualizados', 'Permiso municipal']
+WORDS = ('hormigón enfierradura moldaje losa muro tabique instalación eléctrica sanitaria '
+         'terminaciones pintura cerámica ventanas techumbre excavación fundaciones plano '
+         'inspección avance retraso proveedor camión grúa cuadrilla').split()
+DOCUMENT_KINDS = [('Plano', 'pdf'), ('Contrato', 'pdf'), ('Presupuesto', 'xlsx'), ('Informe', 'docx'), ('Foto', 'jpg')]
+
+# Escala por defecto: la que pidió gerencia para saber cómo se comporta la app.
+DEFAULTS = {
+    'clients': 300,
+    'workers': 60,
+    'projects': 1000,
+    'updates': 50000,
+    'messages': 500000,
+    'documents': 5000,
+}
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """
+    Desactiva auto_now_add mientras dura el bloque, para que bulk_create
+    respete las fechas generadas (si no, todas las filas quedarían con "ahora").
+    """
+    previous = [(field, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in previous:
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos, realistas y deterministas (misma semilla, mismos datos) "
+        "para pruebas de carga: usuarios con perfil, proyectos, asignaciones, avances, "
+        "documentos y mensajes. Usar solo en bases de desarrollo o de pruebas."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULTS.items():
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=f"Cantidad de {name} (por defecto {default}).")
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help="Multiplica todas las cantidades (p. ej. 0.01 para una prueba rápida).")
+        parser.add_argument('--seed', type=int, default=42, help="Semilla del generador aleatorio.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Filas por bulk_create.")
+        parser.add_argument('--flush', action='store_true',
+                            help=f"Borrar antes los datos generados por una carga anterior ({PREFIX}*).")
+
+    # --- Utilidades ---
+
+    def _step(self, label, started):
+        self.stdout.write(f"  {label}: {time.perf_counter() - started:.1f}s")
+
+    def _bulk(self, model, objects, **kwargs):
+        for start in range(0, len(objects), self.batch_size):
+            model.objects.bulk_create(objects[start:start + self.batch_size], **kwargs)
+
+    def _text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    def _moment(self, day):
+        return timezone.make_aware(datetime.combine(day, dt_time(
+            self.rng.randint(8, 19), self.rng.randint(0, 59), self.rng.randint(0, 59))))
+
+    # --- Limpieza ---
+
+    def flush(self):
+        started = time.perf_counter()
+        projects = Project.objects.filter(created_by__username=SEED_ADMIN)
+        users = User.objects.filter(username__startswith=PREFIX)
+        # _raw_delete: sin cargar cientos de miles de objetos en memoria ni
+        # disparar señales fila a fila; el índice de búsqueda se reconstruye al final.
+        # Hilos y mensajes se referencian entre sí (thread / last_message): se
+        # borran en la misma transacción, donde las FK se verifican al final.
+        Participant = MessageThread.participants.through
+        with transaction.atomic():
+            for queryset in (
+                Participant.objects.filter(messagethread__client__in=users),
+                Participant.objects.filter(messagethread__project__in=projects),
+                MessageThread.objects.filter(client__in=users),
+                MessageThread.objects.filter(project__in=projects),
+                Message.objects.filter(sender__in=users),
+                Message.objects.filter(project__in=projects),
+                ProjectUpdate.objects.filter(project__in=projects),
+            ):
+                queryset._raw_delete(queryset.db)
+        # Los documentos sí pasan por delete(): sus señales liberan los blobs.
+        Document.objects.filter(project__in=projects).delete()
+        projects.delete()
+        users.delete()
+        self._step("datos anteriores borrados", started)
+
+    # --- Generación ---
+
+    def create_users(self, clients, workers):
+        password = make_password(SEED_PASSWORD)
+        specs = [(SEED_ADMIN, 'ADMIN')]
+        specs += [(f'{PREFIX}worker_{i:04d}', 'WORKER') for i in range(workers)]
+        specs += [(f'{PREFIX}client_{i:05d}', 'CLIENT') for i in range(clients)]
+
+        users = [
+            User(username=username, email=f'{username}@ejemplo.cl', password=password,
+                 first_name=username.split('_')[1].capitalize(), last_name=username.rsplit('_', 1)[-1])
+            for username, _role in specs
+        ]
+        self._bulk(User, users)
+        ids = dict(User.objects.filter(username__startswith=PREFIX).values_list('username', 'id'))
+        self._bulk(Profile, [
+            Profile(user_id=ids[username], role=role,
+                    company_name=f'Inmobiliaria {username[-3:]}' if role == 'CLIENT' else None)
+            for username, role in specs
+        ])
+        by_role = {'ADMIN': [], 'WORKER': [], 'CLIENT': []}
+        for username, role in specs:
+            by_role[role].append(ids[username])
+        return by_role
+
+    def plan_updates(self, projects, updates):
+        # Cuántos avances recibe cada proyecto (algunos muchos, otros pocos).
+        weights = [self.rng.paretovariate(1.5) for _ in range(projects)]
+        return Counter(self.rng.choices(range(projects), weights=weights, k=updates))
+
+    def create_projects(self, count, users, update_counts, today):
+        admin_id = users['ADMIN'][0]
+        # Proyectos con avances pero sin terminar: la mayoría en curso.
+        statuses = ['EN_PROGRESO'] * 6 + ['PAUSADO', 'CANCELADO']
+        projects = []
+        self.project_meta = []
+        for i in range(count):
+            start = today - timedelta(days=self.rng.randint(30, 720))
+            updates = update_counts.get(i, 0)
+            final = Decimal(min(100, updates * self.rng.uniform(0.5, 4))).quantize(Decimal('0.01'))
+            status = 'COMPLETADO' if final >= 100 else ('PENDIENTE' if not updates else self.rng.choice(statuses))
+            city = self.rng.choice(CITIES)
+            projects.append(Project(
+                name=f'{self.rng.choice(WORKS)} {city} {i:05d}',
+                description=self._text(20),
+                client_id=self.rng.choice(users['CLIENT']),
+                start_date=start,
+                end_date_estimated=start + timedelta(days=self.rng.randint(180, 900)),
+                address=f'{self.rng.choice(STREETS)} {self.rng.randint(100, 9999)}',
+                city=city,
+                status=status,
+                progress_percent=final,
+                created_by_id=admin_id,
+                created_at=self._moment(start),
+            ))
+            self.project_meta.append((start, final))
+        with explicit_timestamps(Project._meta.get_field('created_at')):
+            self._bulk(Project, projects)
+        # Los ids en el mismo orden de creación.
+        return list(
+            Project.objects.filter(created_by_id=admin_id).order_by('id').values_list('id', 'client_id')
+        )
+
+    def create_assignments(self, projects, workers):
+        assignments = []
+        self.project_workers = {}
+        for project_id, _client in projects:
+            chosen = self.rng.sample(workers, k=min(len(workers), self.rng.randint(1, 3)))
+            self.project_workers[project_id] = chosen
+            assignments.extend(ProjectAssignment(project_id=project_id, worker_id=w) for w in chosen)
+        self._bulk(ProjectAssignment, assignments, ignore_conflicts=True)
+
+    def create_updates(self, projects, update_counts, today):
+        updates = []
+        for index, (project_id, _client) in enumerate(projects):
+            count = update_counts.get(index, 0)
+            if not count:
+                continue
+            start, final = self.project_meta[index]
+            span = max(1, (today - start).days)
+            days = sorted(self.rng.randint(0, span) for _ in range(count))
+            steps = sorted(self.rng.uniform(0, float(final)) for _ in range(count - 1)) + [float(final)]
+            for day, percent in zip(days, steps):
+                updates.append(ProjectUpdate(
+                    project_id=project_id,
+                    author_id=self.rng.choice(self.project_workers[project_id]),
+                    date=start + timedelta(days=day),
+                    progress_percent=Decimal(percent).quantize(Decimal('0.01')),
+                    comment=self._text(self.rng.randint(6, 30)),
+                ))
+            if len(updates) >= self.batch_size:
+                with explicit_timestamps(ProjectUpdate._meta.get_field('date')):
+                    self._bulk(ProjectUpdate, updates)
+                updates = []
+        with explicit_timestamps(ProjectUpdate._meta.get_field('date')):
+            self._bulk(ProjectUpdate, updates)
+
+    def create_documents(self, projects, count):
+        storage = Document._meta.get_field('file').storage
+        # Pocos contenidos distintos: el storage por contenido los deduplica.
+        blobs = []
+        for i in range(24):
+            data = (f'Documento de carga {i}\n' + self._text(200) + '\n').encode() * self.rng.randint(5, 200)
+            name = storage.save(f'carga_{i}.bin', ContentFile(data))
+            blobs.append((name, name.rsplit('/', 1)[-1], len(data)))
+
+        documents = []
+        for i in range(count):
+            project_id, _client = self.rng.choice(projects)
+            kind, extension = self.rng.choice(DOCUMENT_KINDS)
+            name, digest, size = self.rng.choice(blobs)
+            documents.append(Document(
+                project_id=project_id,
+                uploaded_by_id=self.rng.choice(self.project_workers[project_id]),
+                title=f'{kind} {i:05d}',
+                file=name,
+                original_filename=f'{kind.lower()}_{i:05d}.{extension}',
+                sha256=digest,
+                size=size,
+                visible_to_client=self.rng.random() < 0.7,
+            ))
+        self._bulk(Document, documents)
+
+    def create_messages(self, projects, count, today):
+        # Mensajes ordenados en el tiempo durante el último año.
+        first_day = today - timedelta(days=365)
+        seconds = 365 * 24 * 3600
+        offsets = sorted(self.rng.randrange(seconds) for _ in range(count))
+        base = timezone.make_aware(datetime.combine(first_day, dt_time()))
+        recent = base + timedelta(seconds=seconds * 0.97)
+
+        messages = []
+        sent_at_field = Message._meta.get_field('sent_at')
+        for offset in offsets:
+            project_id, client_id = self.rng.choice(projects)
+            sent_at = base + timedelta(seconds=offset)
+            if self.rng.random() < 0.6:
+                sender_id, receiver_id = client_id, None
+                subject = self.rng.choice(SUBJECTS)
+            else:
+                sender_id, receiver_id = self.rng.choice(self.project_workers[project_id]), client_id
+                subject = 'Re: ' + self.rng.choice(SUBJECTS)
+            messages.append(Message(
+                project_id=project_id,
+                sender_id=sender_id,
+                receiver_id=receiver_id,
+                subject=subject,
+                body=self._text(self.rng.randint(8, 60)),
+                sent_at=sent_at,
+                # Lo antiguo ya se leyó; lo de las últimas semanas, a veces no.
+                is_read=sent_at < recent or self.rng.random() < 0.5,
+            ))
+            if len(messages) >= self.batch_size:
+                with explicit_timestamps(sent_at_field):
+                    Message.objects.bulk_create(messages)
+                messages = []
+        with explicit_timestamps(sent_at_field):
+            Message.objects.bulk_create(messages)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = max(1, options['batch_size'])
+        scale = options['scale']
+        counts = {name: max(0, int(options[name] * scale)) for name in DEFAULTS}
+        counts['clients'] = max(1, counts['clients'])
+        counts['workers'] = max(1, counts['workers'])
+        counts['projects'] = max(1, counts['projects'])
+
+        if options['flush']:
+            self.flush()
+        elif User.objects.filter(username=SEED_ADMIN).exists():
+            self.stderr.write(f"Ya hay datos de carga ({SEED_ADMIN}); usa --flush para regenerarlos.")
+            return
+
+        # Las fechas se generan relativas a hoy; el resto depende solo de la semilla.
+        today = timezone.localdate()
+        self.stdout.write("Generando: " + ", ".join(f"{n} {name}" for name, n in counts.items()))
+        total_started = time.perf_counter()
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            users = self.create_users(counts['clients'], counts['workers'])
+            self._step("usuarios y perfiles", started)
+
+            started = time.perf_counter()
+            update_counts = self.plan_updates(counts['projects'], counts['updates'])
+            projects = self.create_projects(counts['projects'], users, update_counts, today)
+            self.create_assignments(projects, users['WORKER'])
+            self._step("proyectos y asignaciones", started)
+
+            started = time.perf_counter()
+            self.create_updates(projects, update_counts, today)
+            self._step("avances", started)
+
+            started = time.perf_counter()
+            self.create_documents(projects, counts['documents'])
+            self._step("documentos", started)
+
+            started = time.perf_counter()
+            self.create_messages(projects, counts['messages'], today)
+            self._step("mensajes", started)
+
+        # bulk_create no dispara señales: se recalcula lo que ellas mantienen.
+        started = time.perf_counter()
+        quiet = io.StringIO()
+        backfill_threads()
+        call_command('reconcile_unread_counters', stdout=quiet)
+        call_command('backfill_progress_snapshots', stdout=quiet)
+        indexed = rebuild_index()
+        self._step(f"conversaciones, contadores, snapshots e índice de búsqueda ({indexed} entradas)", started)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Carga generada en {time.perf_counter() - total_started:.1f}s. "
+            f"Usuarios {PREFIX}*, contraseña: {SEED_PASSWORD}"
+        ))
@@ -0,0 +1,49 @@
+# sitio_web/management/commands/sync_sqlite_replicas.py
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base SQLite primaria sobre las réplicas de DATABASE_REPLICAS "
+        "(API de backup de SQLite, consistente aunque haya escrituras en curso). "
+        "Sirve para probar en local el enrutamiento a réplicas: cada ejecución "
+        "equivale a que la réplica se ponga al día."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='aliases',
+                            help="Réplica a actualizar; se puede repetir (por defecto, todas).")
+
+    def _sqlite_path(self, alias):
+        config = settings.DATABASES[alias]
+        if config['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError(f"'{alias}' no es SQLite; las réplicas reales se actualizan por replicación.")
+        if connections[alias].is_in_memory_db():
+            raise CommandError(f"'{alias}' es una base en memoria.")
+        return str(config['NAME'])
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or list(settings.DATABASE_REPLICAS)
+        if not aliases:
+            raise CommandError("No hay réplicas configuradas en DATABASE_REPLICAS.")
+        unknown = [alias for alias in aliases if alias not in settings.DATABASES]
+        if unknown:
+            raise CommandError(f"Bases no definidas en DATABASES: {', '.join(unknown)}")
+
+        source_path = self._sqlite_path(DEFAULT_DB_ALIAS)
+        for alias in aliases:
+            target_path = self._sqlite_path(alias)
+            connections[alias].close()
+            source = sqlite3.connect(source_path)
+            target = sqlite3.connect(target_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(f"Réplica '{alias}' actualizada desde {source_path}."))
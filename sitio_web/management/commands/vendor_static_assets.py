@@ -0,0 +1,51 @@
+# sitio_web/management/commands/vendor_static_assets.py
+
+import os
+import re
+import urllib.request
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from sitio_web.assets import VENDOR_ASSETS, VENDOR_FILES
+
+# El comentario de source map apuntaría a un .map que no se descarga, y
+# ManifestStaticFilesStorage fallaría al no encontrarlo en collectstatic.
+SOURCE_MAP_COMMENT = re.compile(rb'\n?/[/*]# sourceMappingURL=[^\n]*')
+
+
+class Command(BaseCommand):
+    help = (
+        "Descarga a sitio_web/static/ las librerías de terceros de sitio_web/assets.py "
+        "(Bootstrap, Bootstrap Icons, Popper) en sus versiones fijas, para servirlas "
+        "desde nuestros estáticos en vez del CDN. Los archivos descargados no se versionan: "
+        "hay que correrlo en cada despliegue antes de collectstatic; si no, las plantillas "
+        "siguen cargando las librerías desde jsDelivr."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Volver a descargar aunque ya existan.")
+        parser.add_argument('--timeout', type=int, default=30, help="Segundos de espera por archivo.")
+
+    def handle(self, *args, **options):
+        static_dir = os.path.join(apps.get_app_config('sitio_web').path, 'static')
+        downloads = list(VENDOR_ASSETS.values()) + list(VENDOR_FILES)
+
+        for url, path in downloads:
+            target = os.path.join(static_dir, *path.split('/'))
+            if os.path.exists(target) and not options['force']:
+                self.stdout.write(f"  ya existe {path}")
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=options['timeout']) as response:
+                    data = response.read()
+            except OSError as exc:
+                raise CommandError(f"No se pudo descargar {url}: {exc}")
+            if path.endswith(('.css', '.js')):
+                data = SOURCE_MAP_COMMENT.sub(b'', data)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as handle:
+                handle.write(data)
+            self.stdout.write(f"  {path} ({len(data) // 1024} KB)")
+
+        self.stdout.write(self.style.SUCCESS("Librerías listas; las plantillas ya las sirven desde los estáticos."))
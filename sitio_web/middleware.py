@@ -0,0 +1,138 @@
+# sitio_web/middleware.py
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import routers
+from .unread import STAFF_ROLES, ateam_unread_count, team_unread_count
+
+# Clave de sesión: hasta cuándo (timestamp) leer del primario tras una escritura.
+PRIMARY_UNTIL_SESSION_KEY = '_db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def get_user_role(user):
+    """
+    Devuelve el rol (Profile.role) del usuario, o None si es anónimo
+    o no tiene perfil.
+    """
+    if not user.is_authenticated:
+        return None
+    profile = getattr(user, 'profile', None)
+    return profile.role if profile else None
+
+
+class RoleMiddleware:
+    """
+    Resuelve el rol del usuario una sola vez por petición y lo deja
+    disponible como request.role para vistas y plantillas.
+    Debe ir después de AuthenticationMiddleware.
+
+    Soporta modo síncrono y asíncrono: bajo ASGI la pila completa queda
+    async y las vistas async (p. ej. el stream de eventos) no ocupan un hilo.
+
+    Para el staff deja también request.team_unread_count (el contador de la
+    bandeja del equipo, para el badge): las vistas async renderizan dentro
+    del loop, donde el context processor ya no puede consultar la base.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = request.user
+        request.role = get_user_role(user)
+        if request.role in STAFF_ROLES:
+            request.team_unread_count = team_unread_count()
+
+        # Bajo WSGI, las vistas async piden el usuario con request.auser(), que
+        # lo volvería a cargar: se reutiliza el que ya se resolvió.
+        async def auser():
+            return user._wrapped if hasattr(user, '_wrapped') else user
+        request.auser = auser
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        # Se deja el usuario ya resuelto para que las vistas síncronas
+        # no lo vuelvan a cargar desde su hilo.
+        request.user = user
+        request.role = get_user_role(user)
+        if request.role in STAFF_ROLES:
+            request.team_unread_count = await ateam_unread_count()
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide de qué base lee cada petición (ver sitio_web/routers.py):
+
+    - las vistas de DATABASE_REPLICA_VIEWS, pedidas con GET/HEAD, leen de
+      una réplica de DATABASE_REPLICAS;
+    - si la petición escribe (un POST, o un GET que marca mensajes como
+      leídos), la sesión queda pegada al primario DATABASE_REPLICA_STICKY_SECONDS,
+      para que el usuario vea sus propios cambios aunque la réplica vaya atrasada.
+
+    Sin réplicas configuradas no hace nada. Debe ir después de
+    AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = bool(routers.replica_aliases())
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        state, token = routers.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end_request(token)
+        self.stick_to_primary(request, state)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        state, token = routers.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.end_request(token)
+        self.stick_to_primary(request, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routers.current_state()
+        if state is None or request.method not in ('GET', 'HEAD'):
+            return None
+        match = request.resolver_match
+        if match is None or match.url_name not in settings.DATABASE_REPLICA_VIEWS:
+            return None
+        if request.session.get(PRIMARY_UNTIL_SESSION_KEY, 0) > time.time():
+            return None
+        state['replica'] = routers.choose_replica()
+        return None
+
+    def stick_to_primary(self, request, state):
+        if not (state['wrote'] or request.method not in SAFE_METHODS):
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            request.session[PRIMARY_UNTIL_SESSION_KEY] = time.time() + settings.DATABASE_REPLICA_STICKY_SECONDS
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitio_web', '0002_message_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectProgressSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('progress_percent', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('updates_count', models.PositiveIntegerField(default=0, help_text='Cantidad de actualizaciones registradas ese día.')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_snapshots', to='sitio_web.project')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'date'), name='unique_project_progress_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitio_web', '0003_project_progress_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectupdate',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Variantes redimensionadas de la imagen (ver sitio_web/images.py).'),
+        ),
+    ]
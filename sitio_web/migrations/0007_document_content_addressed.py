@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:32
+
+import sitio_web.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitio_web', '0006_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='original_filename',
+            field=models.CharField(blank=True, help_text='Nombre con el que se subió el archivo.', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash del contenido; documentos idénticos comparten el mismo archivo.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='file',
+            field=models.FileField(storage=sitio_web.storage.get_document_storage, upload_to=''),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Índice de búsqueda de texto completo (SQLite FTS5). Ver sitio_web/search.py.
+
+from django.db import migrations
+
+CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sitio_web_search USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    project_id UNINDEXED,
+    user_a UNINDEXED,
+    user_b UNINDEXED,
+    visible UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+POPULATE_SQL = [
+    """
+    INSERT INTO sitio_web_search (rowid, kind, object_id, project_id, user_a, user_b, visible, title, body)
+    SELECT id * 4 + 0, 'message', id, project_id, sender_id, receiver_id, 1, COALESCE(subject, ''), body
+    FROM sitio_web_message
+    """,
+    """
+    INSERT INTO sitio_web_search (rowid, kind, object_id, project_id, user_a, user_b, visible, title, body)
+    SELECT id * 4 + 1, 'document', id, project_id, uploaded_by_id, NULL, visible_to_client, title, original_filename
+    FROM sitio_web_document
+    """,
+    """
+    INSERT INTO sitio_web_search (rowid, kind, object_id, project_id, user_a, user_b, visible, title, body)
+    SELECT id * 4 + 2, 'update', id, project_id, author_id, NULL, 1, '', COALESCE(comment, '')
+    FROM sitio_web_projectupdate
+    """,
+    """
+    INSERT INTO sitio_web_search (rowid, kind, object_id, project_id, user_a, user_b, visible, title, body)
+    SELECT id * 4 + 3, 'project', id, id, client_id, NULL, 1, name, address || ' ' || city
+    FROM sitio_web_project
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    for statement in POPULATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS sitio_web_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitio_web', '0007_document_content_addressed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
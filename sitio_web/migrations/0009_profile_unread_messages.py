@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:37
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_unread_counters(apps, schema_editor):
+    # Mismo cálculo que sitio_web.unread.expected_counts, con los modelos históricos:
+    # lo dirigido a cada usuario va a su perfil y la bandeja del equipo, a la
+    # fila compartida de TeamInbox.
+    Message = apps.get_model('sitio_web', 'Message')
+    Profile = apps.get_model('sitio_web', 'Profile')
+    TeamInbox = apps.get_model('sitio_web', 'TeamInbox')
+
+    unread = Message.objects.filter(is_read=False)
+    per_receiver = (
+        unread.filter(receiver__isnull=False)
+        .values('receiver_id')
+        .annotate(total=Count('pk'))
+    )
+    for row in per_receiver:
+        Profile.objects.filter(user_id=row['receiver_id']).update(unread_messages=row['total'])
+
+    team_total = unread.filter(receiver__isnull=True, sender__profile__role='CLIENT').count()
+    TeamInbox.objects.create(pk=1, unread_messages=team_total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitio_web', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='unread_messages',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Mensajes sin leer dirigidos al usuario (contador desnormalizado, ver sitio_web/unread.py). Los de la bandeja del equipo se cuentan aparte, en TeamInbox.'),
+        ),
+        migrations.CreateModel(
+            name='TeamInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_messages', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_unread_counters, migrations.RunPython.noop),
+    ]
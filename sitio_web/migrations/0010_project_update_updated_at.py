@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitio_web', '0009_profile_unread_messages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectupdate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
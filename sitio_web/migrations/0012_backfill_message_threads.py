@@ -0,0 +1,108 @@
+# Generated by Django 5.2.9 on 2026-10-16 23:40
+
+import re
+
+from django.db import migrations, transaction
+from django.db.models import Count, OuterRef, Subquery
+
+# Copia congelada de sitio_web.threads (backfill_threads / refresh_threads)
+# tal como estaba al crear esta migración: si esas funciones cambian, la
+# migración tiene que seguir haciendo lo mismo con los modelos históricos.
+
+REPLY_PREFIX = re.compile(r'^(\s*re\s*:\s*)+', re.IGNORECASE)
+
+BATCH_SIZE = 2000
+
+
+def thread_subject(subject):
+    return REPLY_PREFIX.sub('', subject or '').strip()
+
+
+def refresh_threads(Message, MessageThread, thread_ids, chunk_size=500):
+    in_thread = Message.objects.filter(thread=OuterRef('pk'))
+    latest = in_thread.order_by('-sent_at', '-id')
+    total = in_thread.order_by().values('thread').annotate(total=Count('pk')).values('total')
+    Participant = MessageThread.participants.through
+
+    for start in range(0, len(thread_ids), chunk_size):
+        chunk = thread_ids[start:start + chunk_size]
+        with transaction.atomic():
+            MessageThread.objects.filter(pk__in=chunk).update(
+                last_message_id=Subquery(latest.values('pk')[:1]),
+                last_message_at=Subquery(latest.values('sent_at')[:1]),
+                message_count=Subquery(total),
+            )
+            senders = Message.objects.filter(thread_id__in=chunk).order_by().values_list('thread_id', 'sender_id').distinct()
+            Participant.objects.bulk_create(
+                [Participant(messagethread_id=thread_id, user_id=user_id) for thread_id, user_id in senders],
+                ignore_conflicts=True,
+            )
+
+
+def assign_threads(apps, schema_editor):
+    """
+    Agrupa en conversaciones los mensajes sin hilo, en orden de envío. Una
+    respuesta ("Re: asunto", mismo cliente y proyecto) va a la última
+    conversación con ese asunto y apunta al mensaje anterior; cualquier otro
+    mensaje empieza una conversación. Un lote por transacción: si se corta,
+    se retoma desde los hilos ya creados.
+    """
+    Message = apps.get_model('sitio_web', 'Message')
+    MessageThread = apps.get_model('sitio_web', 'MessageThread')
+    Profile = apps.get_model('sitio_web', 'Profile')
+
+    clients = set(Profile.objects.filter(role='CLIENT').values_list('user_id', flat=True))
+
+    open_threads = {}
+    existing = MessageThread.objects.order_by('last_message_at', 'id').values_list(
+        'id', 'client_id', 'project_id', 'subject', 'last_message_id',
+    )
+    for thread_id, client_id, project_id, subject, last_message_id in existing.iterator():
+        open_threads[(client_id, project_id, subject)] = [MessageThread(pk=thread_id), last_message_id]
+
+    pending = Message.objects.filter(thread__isnull=True).order_by('sent_at', 'id')
+    touched = set()
+    while True:
+        rows = list(pending.values_list('id', 'sender_id', 'receiver_id', 'project_id', 'subject', 'sent_at')[:BATCH_SIZE])
+        if not rows:
+            break
+
+        with transaction.atomic():
+            new_threads, placed = [], []
+            for message_id, sender_id, receiver_id, project_id, subject, sent_at in rows:
+                if sender_id in clients:
+                    client_id = sender_id
+                else:
+                    client_id = receiver_id if receiver_id in clients else None
+                key = (client_id, project_id, thread_subject(subject))
+                current = open_threads.get(key) if REPLY_PREFIX.match(subject or '') else None
+                if current is None:
+                    thread = MessageThread(project_id=project_id, client_id=client_id, subject=key[2], last_message_at=sent_at)
+                    new_threads.append(thread)
+                    current = open_threads[key] = [thread, None]
+                placed.append((message_id, current[0], current[1]))
+                current[1] = message_id
+
+            MessageThread.objects.bulk_create(new_threads)
+            Message.objects.bulk_update(
+                [Message(pk=message_id, thread_id=thread.pk, parent_id=parent_id) for message_id, thread, parent_id in placed],
+                ['thread', 'parent'],
+                batch_size=500,
+            )
+        touched.update(thread.pk for _message_id, thread, _parent_id in placed)
+
+    refresh_threads(Message, MessageThread, sorted(touched))
+
+
+class Migration(migrations.Migration):
+    # Cada lote confirma su propia transacción: con muchos mensajes no se
+    # mantiene la base bloqueada todo el proceso, y si se corta se retoma.
+    atomic = False
+
+    dependencies = [
+        ('sitio_web', '0011_message_threads'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_threads, migrations.RunPython.noop),
+    ]
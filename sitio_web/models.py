@@ -3,7 +3,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.files.storage import default_storage
+from .storage import blob_digest, get_document_storage
 import os
+import uuid
 
 # --- Constantes y Choices ---
 ROLE_CHOICES = (
@@ -12,6 +15,18 @@ ROLE_CHOICES = (
     ('CLIENT', 'Cliente'),
 )
 
+JOB_STATUS_CHOICES = (
+    ('PENDIENTE', 'Pendiente'),
+    ('EN_PROCESO', 'En proceso'),
+    ('COMPLETADO', 'Completado'),
+    ('FALLIDO', 'Fallido'),
+)
+
+UPLOAD_STATUS_CHOICES = (
+    ('EN_PROGRESO', 'En progreso'),
+    ('COMPLETADO', 'Completado'),
+)
+
 PROJECT_STATUS_CHOICES = (
     ('PENDIENTE', 'Pendiente'),
     ('EN_PROGRESO', 'En Progreso'),
@@ -32,6 +47,10 @@ class Profile(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     company_name = models.CharField(max_length=100, blank=True, null=True,
                                     help_text="Nombre de la empresa si el usuario es un cliente.")
+    unread_messages = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Mensajes sin leer dirigidos al usuario (contador desnormalizado, ver sitio_web/unread.py). "
+                  "Los de la bandeja del equipo se cuentan aparte, en TeamInbox.")
 
     def __str__(self):
         return f"{self.user.username} - {self.get_role_display()}"
@@ -103,6 +122,9 @@ class ProjectUpdate(models.Model):
                                            help_text="Porcentaje de avance en esta actualización.")
     comment = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to=project_update_image_path, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False,
+                                      help_text="Variantes redimensionadas de la imagen (ver sitio_web/images.py).")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date']
@@ -110,9 +132,51 @@ class ProjectUpdate(models.Model):
     def __str__(self):
         return f"Actualización de {self.project.name} al {self.date}: {self.progress_percent}%"
 
+    def _srcset(self, image_format):
+        variants = (self.image_variants or {}).get(image_format) or {}
+        return ", ".join(
+            f"{default_storage.url(name)} {width}w"
+            for width, name in sorted(variants.items(), key=lambda item: int(item[0]))
+        )
+
+    @property
+    def image_srcset_webp(self):
+        return self._srcset('webp')
+
+    @property
+    def image_srcset_jpeg(self):
+        return self._srcset('jpeg')
+
+    @property
+    def image_placeholder(self):
+        return (self.image_variants or {}).get('placeholder', '')
+
+class ProjectProgressSnapshot(models.Model):
+    """
+    Serie de avance materializada: un registro por proyecto y día con el
+    último porcentaje reportado. Se mantiene de forma incremental al
+    registrar cada ProjectUpdate, para graficar sin recorrer el historial.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='progress_snapshots')
+    date = models.DateField()
+    progress_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    updates_count = models.PositiveIntegerField(default=0,
+                                                help_text="Cantidad de actualizaciones registradas ese día.")
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'date'], name='unique_project_progress_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.project.name} al {self.date}: {self.progress_percent}%"
+
 def project_document_path(instance, filename):
     """
-    Define la ruta donde se guardarán los documentos del proyecto.
+    Define la ruta donde se guardaban los documentos del proyecto.
+    Ya no se usa (los documentos viven en el storage por contenido,
+    ver sitio_web/storage.py); se conserva porque lo referencia 0001_initial.
     """
     project_name = instance.project.name.replace(" ", "_")
     return os.path.join('project_documents', project_name, filename)
@@ -125,7 +189,12 @@ class Document(models.Model):
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
                                     related_name='uploaded_documents')
     title = models.CharField(max_length=200)
-    file = models.FileField(upload_to=project_document_path)
+    file = models.FileField(storage=get_document_storage)
+    original_filename = models.CharField(max_length=255, blank=True,
+                                         help_text="Nombre con el que se subió el archivo.")
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True,
+                              help_text="Hash del contenido; documentos idénticos comparten el mismo archivo.")
+    size = models.BigIntegerField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     visible_to_client = models.BooleanField(default=True,
                                             help_text="Indica si el cliente puede ver este documento.")
@@ -133,6 +202,85 @@ class Document(models.Model):
     def __str__(self):
         return f"Documento '{self.title}' para {self.project.name}"
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # Antes de que el storage lo renombre por su hash, guardamos el nombre original.
+            if not self.original_filename:
+                self.original_filename = os.path.basename(self.file.name)
+            self.file.save(self.file.name, self.file.file, save=False)
+        if self.file:
+            self.sha256 = blob_digest(self.file.name) or self.sha256
+            if self.size is None:
+                self.size = self.file.size
+        super().save(*args, **kwargs)
+
+    @property
+    def display_filename(self):
+        return self.original_filename or os.path.basename(self.file.name)
+
+class ChunkedUpload(models.Model):
+    """
+    Subida de un documento grande en partes numeradas (ver sitio_web/uploads.py).
+    Las partes recibidas viven en disco; al finalizar se ensamblan y se crea
+    el Document correspondiente.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='chunked_uploads')
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    title = models.CharField(max_length=200)
+    visible_to_client = models.BooleanField(default=True)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=UPLOAD_STATUS_CHOICES, default='EN_PROGRESO')
+    sha256 = models.CharField(max_length=64, blank=True)
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def expected_chunk_length(self, index):
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
+
+    def __str__(self):
+        return f"Subida '{self.filename}' ({self.get_status_display()})"
+
+class MessageThread(models.Model):
+    """
+    Conversación: el mensaje de un cliente y todas sus respuestas.
+    last_message, last_message_at, message_count y participants están
+    desnormalizados para listar las bandejas sin recorrer los mensajes
+    (los mantiene sitio_web/threads.py).
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='message_threads', null=True, blank=True)
+    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='client_threads', null=True, blank=True,
+                               help_text="Cliente de la conversación (nulo si es solo entre staff).")
+    subject = models.CharField(max_length=255, blank=True)
+    participants = models.ManyToManyField(User, related_name='message_threads', blank=True,
+                                          help_text="Usuarios que escribieron en la conversación.")
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_message_at', '-id']
+        # Bandejas paginadas por cursor (last_message_at, id).
+        indexes = [
+            models.Index(fields=['client', '-last_message_at', '-id'], name='thread_client_last_idx'),
+            models.Index(fields=['project', '-last_message_at', '-id'], name='thread_project_last_idx'),
+            models.Index(fields=['-last_message_at', '-id'], name='thread_last_idx'),
+        ]
+
+    def __str__(self):
+        return f"Conversación '{self.subject or 'Sin asunto'}' ({self.message_count} mensajes)"
+
 class Message(models.Model):
     """
     Sistema de mensajería interna.
@@ -146,9 +294,58 @@ class Message(models.Model):
     body = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    thread = models.ForeignKey(MessageThread, on_delete=models.CASCADE, related_name='messages', null=True, blank=True)
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='replies',
+                               help_text="Mensaje al que responde.")
+
+    class Meta:
+        ordering = ['-sent_at', '-id']
+        # Índices compuestos para las bandejas paginadas por cursor (sent_at, id)
+        # y para cargar una conversación completa en orden.
+        indexes = [
+            models.Index(fields=['thread', 'sent_at', 'id'], name='msg_thread_sent_idx'),
+            models.Index(fields=['receiver', '-sent_at', '-id'], name='msg_receiver_sent_idx'),
+            models.Index(fields=['sender', '-sent_at', '-id'], name='msg_sender_sent_idx'),
+            models.Index(fields=['project', '-sent_at', '-id'], name='msg_project_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f"De {self.sender.username} a {self.receiver.username if self.receiver else 'Equipo Admin'}: {self.subject[:50] if self.subject else 'Sin asunto'}..."
+
+class TeamInbox(models.Model):
+    """
+    Fila única con los mensajes sin leer de la bandeja del equipo (de
+    clientes, sin destinatario). Todo el staff comparte este contador, así
+    un mensaje nuevo actualiza una fila y no la de cada perfil del staff.
+    """
+    unread_messages = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Bandeja del equipo ({self.unread_messages} sin leer)"
+
+class Job(models.Model):
+    """
+    Tarea en segundo plano de la cola propia (sin broker externo).
+    La procesa el comando `manage.py runworker`; ver sitio_web/jobs.py.
+    """
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='PENDIENTE')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(help_text="No se ejecuta antes de esta fecha (reintentos con backoff).")
+    locked_until = models.DateTimeField(blank=True, null=True,
+                                        help_text="Fin del timeout de visibilidad del worker que la tomó.")
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
-        ordering = ['-sent_at']
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
 
     def __str__(self):
-        return f"De {self.sender.username} a {self.receiver.username if self.receiver else 'Equipo Admin'}: {self.subject[:50] if self.subject else 'Sin asunto'}..."
\ No newline at end of file
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,128 @@
+# sitio_web/pagination.py
+
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+# Tamaño de página por defecto para las bandejas de mensajes.
+DEFAULT_PAGE_SIZE = 25
+
+
+class KeysetPage:
+    """
+    Página de resultados obtenida con paginación por cursor (keyset).
+    A diferencia de OFFSET, el costo de pedir una página no depende de
+    cuántos registros haya antes de ella.
+
+    next_cursor lleva a la página siguiente (más antigua) y prev_cursor a
+    la anterior (más reciente); None si no hay.
+    """
+
+    def __init__(self, object_list, next_cursor, cursor, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.prev_cursor is None
+
+
+def encode_cursor(timestamp, pk):
+    """
+    Codifica la posición (timestamp, id) de la última fila en un token opaco.
+    """
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decodifica un cursor. Devuelve None si el token es inválido.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, pk = raw.split('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def keyset_paginate(queryset, cursor=None, field='sent_at', per_page=DEFAULT_PAGE_SIZE, before=None):
+    """
+    Pagina un queryset en orden descendente por (field, id).
+
+    `cursor` pide la página que sigue (más antigua) a esa posición; `before`,
+    la que la precede (más reciente), para volver una página atrás. Si vienen
+    los dos, manda `before`.
+
+    El queryset debería estar respaldado por un índice compuesto que termine
+    en (field, id) para que cada página sea un recorrido acotado del índice.
+    """
+    def position_of(row):
+        return encode_cursor(getattr(row, field), row.pk)
+
+    back = decode_cursor(before)
+    if back is not None:
+        # Hacia atrás: las filas más nuevas que la posición, de la más cercana
+        # en adelante, y se invierten para mostrarlas en el orden normal.
+        timestamp, pk = back
+        rows = list(
+            queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+            .order_by(field, 'id')[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        if not rows:
+            return KeysetPage(rows, None, None)
+        # Se llegó desde la fila `before`: detrás de esta página está al menos ella.
+        return KeysetPage(
+            rows,
+            next_cursor=position_of(rows[-1]),
+            cursor=before,
+            prev_cursor=position_of(rows[0]) if has_previous else None,
+        )
+
+    position = decode_cursor(cursor)
+    queryset = queryset.order_by(f'-{field}', '-id')
+    if position is not None:
+        timestamp, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+        )
+    else:
+        cursor = None
+
+    # Pedimos una fila extra para saber si hay página siguiente sin hacer COUNT(*).
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = position_of(rows[-1])
+
+    # Con cursor se llegó desde una página más reciente, que sigue existiendo.
+    prev_cursor = position_of(rows[0]) if cursor is not None and rows else None
+    return KeysetPage(rows, next_cursor, cursor, prev_cursor)
@@ -0,0 +1,53 @@
+# sitio_web/permissions.py
+
+from .models import Message, MessageThread, ProjectAssignment
+from .unread import STAFF_ROLES
+
+
+def can_view_project(user, role, project):
+    """
+    Indica si el usuario puede ver un proyecto:
+    ADMIN ve todos, WORKER solo los asignados y CLIENT solo los propios.
+    """
+    if role == 'ADMIN':
+        return True
+    if role == 'WORKER':
+        return ProjectAssignment.objects.filter(project=project, worker=user).exists()
+    if role == 'CLIENT':
+        return project.client_id == user.id
+    return False
+
+
+def visible_threads(user, role, queryset=None):
+    """
+    Conversaciones que ve cada rol: el staff (ADMIN y WORKER), todas las de
+    clientes, como en staff_inbox; CLIENT, solo las suyas. Las bandejas, la
+    búsqueda y las exportaciones parten de aquí para no divergir.
+    """
+    queryset = MessageThread.objects.all() if queryset is None else queryset
+    if role in STAFF_ROLES:
+        return queryset.filter(client__isnull=False)
+    if role == 'CLIENT':
+        return queryset.filter(client=user)
+    return queryset.none()
+
+
+def visible_messages(user, role, queryset=None):
+    """
+    Mensajes de las conversaciones de visible_threads().
+    """
+    queryset = Message.objects.all() if queryset is None else queryset
+    if role in STAFF_ROLES:
+        return queryset.filter(thread__client__isnull=False)
+    if role == 'CLIENT':
+        return queryset.filter(thread__client=user)
+    return queryset.none()
+
+
+def can_view_thread(user, role, thread):
+    """
+    Lo mismo que visible_threads() para una conversación ya cargada.
+    """
+    if role in STAFF_ROLES:
+        return thread.client_id is not None
+    return role == 'CLIENT' and thread.client_id == user.id
@@ -0,0 +1,65 @@
+# sitio_web/progress.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import ProjectProgressSnapshot, ProjectUpdate
+
+
+def record_progress_snapshot(update):
+    """
+    Actualiza de forma incremental el snapshot diario del proyecto
+    con el porcentaje de un ProjectUpdate recién guardado.
+    """
+    updated = ProjectProgressSnapshot.objects.filter(
+        project_id=update.project_id,
+        date=update.date,
+    ).update(
+        progress_percent=update.progress_percent,
+        updates_count=F('updates_count') + 1,
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            ProjectProgressSnapshot.objects.create(
+                project_id=update.project_id,
+                date=update.date,
+                progress_percent=update.progress_percent,
+                updates_count=1,
+            )
+    except IntegrityError:
+        # Otra petición creó el snapshot del día entre el UPDATE y el INSERT.
+        record_progress_snapshot(update)
+
+
+def rebuild_progress_day(project_id, day):
+    """
+    Recalcula el snapshot de un día desde sus ProjectUpdate: cuando se edita
+    o borra un avance ya registrado, el incremento no alcanza. Sin avances
+    ese día, el snapshot se borra.
+    """
+    updates = ProjectUpdate.objects.filter(project_id=project_id, date=day)
+    last = updates.order_by('-id').values_list('progress_percent', flat=True).first()
+    if last is None:
+        ProjectProgressSnapshot.objects.filter(project_id=project_id, date=day).delete()
+        return
+    ProjectProgressSnapshot.objects.update_or_create(
+        project_id=project_id,
+        date=day,
+        defaults={'progress_percent': last, 'updates_count': updates.count()},
+    )
+
+
+def progress_series(project_id):
+    """
+    Serie (fecha, porcentaje) del proyecto leída solo desde los snapshots.
+    """
+    rows = ProjectProgressSnapshot.objects.filter(
+        project_id=project_id
+    ).order_by('date').values_list('date', 'progress_percent')
+    return [
+        {'date': day.isoformat(), 'progress': float(progress)}
+        for day, progress in rows
+    ]
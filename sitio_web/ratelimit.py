@@ -0,0 +1,154 @@
+# sitio_web/ratelimit.py
+
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+STATS_PREFIX = 'ratelimit:stats'
+
+
+def client_ip(request):
+    """
+    IP del cliente. Detrás de un proxy, REMOTE_ADDR es la del proxy: se usa
+    la cabecera RATELIMIT_CLIENT_IP_HEADER si está configurada (solo si el
+    proxy la pisa siempre; si no, el cliente podría elegir su propia IP).
+    """
+    header = settings.RATELIMIT_CLIENT_IP_HEADER
+    if header:
+        value = request.headers.get(header, '')
+        # X-Forwarded-For: la última es la que agregó nuestro proxy.
+        ip = value.split(',')[-1].strip()
+        if ip:
+            return ip
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _identifiers(request, scope_rules):
+    """
+    [(tipo, identificador, límite, período)] para las reglas que aplican a
+    esta petición. 'username' solo si el formulario trae uno.
+    """
+    values = {
+        'ip': client_ip(request),
+        'username': (request.POST.get('username') or '').strip().lower(),
+        'global': 'all',
+    }
+    return [
+        (kind, values[kind], limit, period)
+        for kind, (limit, period) in scope_rules.items()
+        if values.get(kind)
+    ]
+
+
+def _incr(cache, key, timeout=None):
+    """
+    Suma 1 al contador `key`, que vence a los `timeout` segundos (None: nunca).
+
+    Atómico solo si lo es el backend (memcached, Redis). FileBasedCache lee y
+    reescribe el archivo: dos procesos a la vez pueden perder un incremento,
+    así que bajo contención se cuenta de menos (el límite es aproximado).
+    """
+    cache.add(key, 0, timeout)
+    try:
+        value = cache.incr(key)
+    except ValueError:
+        # Expiró entre add() e incr().
+        cache.set(key, 1, timeout)
+        return 1
+    # El incr() genérico (BaseCache, el que usa FileBasedCache) reescribe la
+    # clave con el timeout por defecto de la caché: sin renovarlo, las ventanas
+    # de más de TIMEOUT segundos y los contadores de estadísticas vencen antes.
+    cache.touch(key, timeout)
+    return value
+
+
+def check_rate(scope, request):
+    """
+    Ventana deslizante aproximada (dos ventanas fijas ponderadas) por cada
+    regla de RATELIMIT_RULES[scope]. Devuelve (bloqueada, segundos de espera).
+
+    Primero se leen todos los contadores (una sola ida a la caché); si alguna
+    regla está excedida, se bloquea sin contar el intento: así la ventana
+    avanza y el límite se libera solo. Si no, se cuenta en todas.
+    """
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    now = time.time()
+    rules = []
+    for kind, ident, limit, period in _identifiers(request, settings.RATELIMIT_RULES[scope]):
+        window = int(now // period)
+        base = f'ratelimit:{scope}:{kind}:{ident}'
+        rules.append((kind, limit, period, f'{base}:{window}', f'{base}:{window - 1}'))
+
+    counts = cache.get_many([key for rule in rules for key in rule[3:]])
+    for kind, limit, period, current_key, previous_key in rules:
+        elapsed = (now % period) / period
+        estimate = counts.get(previous_key, 0) * (1 - elapsed) + counts.get(current_key, 0)
+        if estimate >= limit:
+            _incr(cache, f'{STATS_PREFIX}:{scope}:blocked:{kind}')
+            return True, int(period - now % period) + 1
+
+    for _kind, _limit, period, current_key, _previous_key in rules:
+        _incr(cache, current_key, period * 2)
+    _incr(cache, f'{STATS_PREFIX}:{scope}:allowed')
+    return False, 0
+
+
+def rate_stats():
+    """
+    {scope: {'allowed': n, 'blocked': {tipo de regla: n}}} desde el último reinicio.
+    """
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    keys = {}
+    for scope, scope_rules in settings.RATELIMIT_RULES.items():
+        keys[f'{STATS_PREFIX}:{scope}:allowed'] = (scope, None)
+        for kind in scope_rules:
+            keys[f'{STATS_PREFIX}:{scope}:blocked:{kind}'] = (scope, kind)
+
+    values = cache.get_many(list(keys))
+    stats = {scope: {'allowed': 0, 'blocked': dict.fromkeys(rules, 0)} for scope, rules in settings.RATELIMIT_RULES.items()}
+    for key, (scope, kind) in keys.items():
+        if kind is None:
+            stats[scope]['allowed'] = values.get(key, 0)
+        else:
+            stats[scope]['blocked'][kind] = values.get(key, 0)
+    return stats
+
+
+def reset_rate_stats():
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    cache.delete_many([
+        f'{STATS_PREFIX}:{scope}:{suffix}'
+        for scope, rules in settings.RATELIMIT_RULES.items()
+        for suffix in ['allowed', *(f'blocked:{kind}' for kind in rules)]
+    ])
+
+
+def rate_limit(scope, methods=('POST',)):
+    """
+    Limita los intentos de una vista según RATELIMIT_RULES[scope]. Va antes
+    que cualquier trabajo caro (hash de contraseñas, validadores): si se
+    excede el límite responde 429 con Retry-After sin ejecutar la vista.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not settings.RATELIMIT_ENABLED or request.method not in methods:
+                return view_func(request, *args, **kwargs)
+            blocked, retry_after = check_rate(scope, request)
+            if blocked:
+                logger.warning("Límite de intentos excedido en %s desde %s", scope, client_ip(request))
+                response = HttpResponse(
+                    "Demasiados intentos. Espera unos minutos antes de volver a intentarlo.",
+                    status=429, content_type='text/plain; charset=utf-8',
+                )
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,61 @@
+# sitio_web/retry.py
+
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def is_database_locked(exc):
+    """
+    True si el error es de bloqueo de SQLite ("database is locked" /
+    "database table is locked"), que conviene reintentar.
+    """
+    return isinstance(exc, OperationalError) and 'locked' in str(exc).lower()
+
+
+def backoff_delay(attempt):
+    """
+    Espera antes del reintento `attempt` (1, 2, ...): exponencial con tope
+    y "full jitter", para que los procesos que chocaron no vuelvan a chocar.
+    """
+    ceiling = min(settings.DB_LOCK_RETRY_MAX_DELAY, settings.DB_LOCK_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def run_with_retry(func, *args, using=DEFAULT_DB_ALIAS, attempts=None, before_retry=None, **kwargs):
+    """
+    Ejecuta func(*args, **kwargs) dentro de transaction.atomic() y, si la
+    base está bloqueada, deshace y reintenta hasta `attempts` veces
+    (DB_LOCK_RETRY_ATTEMPTS por defecto).
+
+    Las vistas envuelven solo su parte de escritura: validar formularios,
+    hashear contraseñas o renderizar quedan fuera, sin tener tomado el
+    bloqueo de escritura. Con transaction_mode IMMEDIATE el bloqueo se pide
+    al abrir la transacción, así que un choque se detecta antes de ejecutar
+    `func` y el reintento no repite efectos (mensajes, archivos guardados).
+
+    Si ya hay una transacción abierta no se reintenta: el bloqueo pertenece
+    a la transacción de afuera, que es la que tendría que repetirse.
+    """
+    attempts = attempts or settings.DB_LOCK_RETRY_ATTEMPTS
+    if transaction.get_connection(using).in_atomic_block:
+        return func(*args, **kwargs)
+
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as exc:
+            if not is_database_locked(exc) or attempt == attempts:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning("Base de datos bloqueada (%s), reintento %s en %.0f ms", func.__name__, attempt, delay * 1000)
+            time.sleep(delay)
+            if before_retry is not None:
+                before_retry()
+
@@ -0,0 +1,74 @@
+# sitio_web/routers.py
+
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Estado de enrutamiento de la petición en curso. Es un dict mutable dentro de
+# una variable de contexto: las vistas async consultan desde otros hilos
+# (sync_to_async copia el contexto) y todas ven y marcan el mismo estado.
+_request_state = contextvars.ContextVar('sitio_web_db_routing', default=None)
+
+
+def replica_aliases():
+    return list(settings.DATABASE_REPLICAS)
+
+
+def start_request(replica=None):
+    """
+    Abre el estado de enrutamiento de una petición. `replica` es el alias
+    desde el que leer, o None para leer del primario.
+    """
+    state = {'replica': replica, 'wrote': False}
+    return state, _request_state.set(state)
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+def current_state():
+    return _request_state.get()
+
+
+def choose_replica():
+    aliases = replica_aliases()
+    return random.choice(aliases) if aliases else None
+
+
+class ReplicaRouter:
+    """
+    Lecturas de las vistas marcadas en DATABASE_REPLICA_VIEWS a una réplica;
+    todo lo demás (escrituras, otras vistas, comandos, worker) al primario.
+
+    Una vez que la petición escribe, el resto de sus lecturas vuelven al
+    primario, para leer lo recién escrito. El "pegado" entre peticiones de
+    la misma sesión lo hace ReplicaRoutingMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state and state['replica'] and not state['wrote']:
+            return state['replica']
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas tienen los mismos datos que el primario.
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación, no por migrate.
+        if db in replica_aliases():
+            return False
+        return None
@@ -0,0 +1,335 @@
+# sitio_web/search.py
+
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Document, Message, Project, ProjectAssignment, ProjectUpdate
+from .permissions import visible_messages
+
+# Tabla virtual FTS5 con el índice de búsqueda (ver migración 0008_search_index).
+SEARCH_TABLE = 'sitio_web_search'
+
+# Tipo de objeto -> código usado para construir el rowid (object_id * 4 + código),
+# así actualizar o borrar una entrada es una búsqueda por clave, no un recorrido.
+KIND_CODES = {
+    'message': 0,
+    'document': 1,
+    'update': 2,
+    'project': 3,
+}
+
+KIND_LABELS = {
+    'message': 'Mensaje',
+    'document': 'Documento',
+    'update': 'Avance',
+    'project': 'Proyecto',
+}
+
+# Pesos bm25 de las columnas (title, body): un acierto en el título pesa más.
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+DEFAULT_LIMIT = 50
+
+_INSERT_SQL = (
+    f"INSERT OR REPLACE INTO {SEARCH_TABLE} "
+    "(rowid, kind, object_id, project_id, user_a, user_b, visible, title, body) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Marcadores que usa snippet(); se reemplazan por <mark> después de escapar.
+_HL_START = '\x02'
+_HL_END = '\x03'
+
+
+def _connection(for_write=False):
+    """
+    Conexión a la base que elige el router (sitio_web/routers.py): las
+    búsquedas de una vista en DATABASE_REPLICA_VIEWS leen de la réplica, y
+    el mantenimiento del índice escribe en el primario. El índice vive en
+    las mismas bases que Message.
+    """
+    alias = router.db_for_write(Message) if for_write else router.db_for_read(Message)
+    return connections[alias]
+
+
+def fts_available(connection=None):
+    connection = connection or _connection(for_write=True)
+    return connection.vendor == 'sqlite'
+
+
+def _rowid(kind, object_id):
+    return object_id * 4 + KIND_CODES[kind]
+
+
+# --- Mantenimiento incremental del índice ---
+
+def document_row(instance):
+    """
+    Fila del índice para una instancia: (kind, object_id, project_id,
+    user_a, user_b, visible, title, body).
+    """
+    if isinstance(instance, Message):
+        return ('message', instance.pk, instance.project_id, instance.sender_id,
+                instance.receiver_id, 1, instance.subject or '', instance.body or '')
+    if isinstance(instance, Document):
+        return ('document', instance.pk, instance.project_id, instance.uploaded_by_id,
+                None, int(instance.visible_to_client), instance.title or '', instance.original_filename or '')
+    if isinstance(instance, ProjectUpdate):
+        return ('update', instance.pk, instance.project_id, instance.author_id,
+                None, 1, '', instance.comment or '')
+    if isinstance(instance, Project):
+        return ('project', instance.pk, instance.pk, instance.client_id,
+                None, 1, instance.name or '', f"{instance.address or ''} {instance.city or ''}")
+    return None
+
+
+def index_instance(instance):
+    """
+    Inserta o reemplaza la entrada de una instancia en el índice.
+    """
+    row = document_row(instance)
+    connection = _connection(for_write=True)
+    if row is None or not fts_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(_INSERT_SQL, [_rowid(row[0], row[1]), *row])
+
+
+def index_many(instances):
+    """
+    Indexa varias instancias en un solo executemany (para altas masivas con
+    bulk_create, que no disparan las señales).
+    """
+    connection = _connection(for_write=True)
+    if not fts_available(connection):
+        return
+    rows = [row for row in map(document_row, instances) if row is not None]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(_INSERT_SQL, [[_rowid(row[0], row[1]), *row] for row in rows])
+
+
+def unindex_instance(instance):
+    """
+    Elimina la entrada de una instancia del índice.
+    """
+    row = document_row(instance)
+    connection = _connection(for_write=True)
+    if row is None or not fts_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [_rowid(row[0], row[1])])
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Vacía y vuelve a poblar el índice completo. Devuelve la cantidad de filas.
+    """
+    connection = _connection(for_write=True)
+    if not fts_available(connection):
+        return 0
+
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        sources = (
+            Message.objects.only('id', 'project_id', 'sender_id', 'receiver_id', 'subject', 'body'),
+            Document.objects.only('id', 'project_id', 'uploaded_by_id', 'visible_to_client', 'title', 'original_filename'),
+            ProjectUpdate.objects.only('id', 'project_id', 'author_id', 'comment'),
+            Project.objects.only('id', 'client_id', 'name', 'address', 'city'),
+        )
+        for queryset in sources:
+            batch = []
+            for instance in queryset.order_by().iterator(chunk_size=batch_size):
+                row = document_row(instance)
+                batch.append([_rowid(row[0], row[1]), *row])
+                if len(batch) >= batch_size:
+                    cursor.executemany(_INSERT_SQL, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(_INSERT_SQL, batch)
+                total += len(batch)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+    return total
+
+
+# --- Consultas ---
+
+def build_match_query(text):
+    """
+    Convierte el texto del usuario en una expresión MATCH segura: cada
+    palabra entre comillas (sin operadores FTS) y la última como prefijo.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return ''
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _permission_clause(user, role, using):
+    """
+    Filtro SQL por rol, equivalente al de las vistas:
+    ADMIN ve todo; WORKER lo de sus proyectos asignados; CLIENT lo de sus
+    proyectos (documentos solo si son visibles). Los mensajes, los de las
+    conversaciones que ve en su bandeja (permissions.visible_messages).
+    """
+    messages_query = visible_messages(user, role).values('pk').query
+    messages_sql, messages_params = messages_query.get_compiler(using=using).as_sql()
+    message_clause = f"(kind = 'message' AND object_id IN ({messages_sql}))"
+
+    if role == 'ADMIN':
+        return f"({message_clause} OR kind != 'message')", [*messages_params]
+
+    if role == 'WORKER':
+        assigned = "SELECT project_id FROM sitio_web_projectassignment WHERE worker_id = %s"
+        return (
+            f"({message_clause} OR (kind != 'message' AND project_id IN ({assigned})))",
+            [*messages_params, user.pk],
+        )
+
+    if role == 'CLIENT':
+        owned = "SELECT id FROM sitio_web_project WHERE client_id = %s"
+        return (
+            f"({message_clause} "
+            f"OR (kind IN ('update', 'project') AND project_id IN ({owned})) "
+            f"OR (kind = 'document' AND visible = 1 AND project_id IN ({owned})))",
+            [*messages_params, user.pk, user.pk],
+        )
+
+    return '0', []
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(_HL_START, '<mark>').replace(_HL_END, '</mark>')
+    )
+
+
+def search(user, role, text, limit=DEFAULT_LIMIT):
+    """
+    Busca en mensajes, documentos, avances y proyectos visibles para el
+    usuario, ordenados por relevancia (bm25). Devuelve una lista de dicts.
+    """
+    connection = _connection()
+    if not fts_available(connection):
+        return like_search(user, role, text, limit)
+
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    clause, params = _permission_clause(user, role, connection.alias)
+    sql = (
+        f"SELECT kind, object_id, project_id, title, "
+        f"snippet({SEARCH_TABLE}, -1, %s, %s, '…', 16), "
+        f"bm25({SEARCH_TABLE}, 0, 0, 0, 0, 0, 0, %s, %s) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND {clause} "
+        f"ORDER BY rank LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [_HL_START, _HL_END, TITLE_WEIGHT, BODY_WEIGHT, match, *params, limit])
+        rows = cursor.fetchall()
+
+    results = [
+        {
+            'kind': kind,
+            'kind_label': KIND_LABELS[kind],
+            'object_id': object_id,
+            'project_id': project_id,
+            'title': title,
+            'snippet': _highlight(snippet),
+        }
+        for kind, object_id, project_id, title, snippet, _rank in rows
+    ]
+    _add_urls(results, role)
+    return results
+
+
+def _add_urls(results, role):
+    """
+    Completa 'url' en cada resultado. Los mensajes llevan a su conversación:
+    sus hilos salen de una sola consulta.
+    """
+    message_ids = [result['object_id'] for result in results if result['kind'] == 'message']
+    threads = dict(Message.objects.filter(pk__in=message_ids).values_list('pk', 'thread_id')) if message_ids else {}
+    for result in results:
+        result['url'] = result_url(
+            result['kind'], result['object_id'], result['project_id'], role,
+            thread_id=threads.get(result['object_id']) if result['kind'] == 'message' else None,
+        )
+
+
+def result_url(kind, object_id, project_id, role, thread_id=None):
+    """
+    Enlace al lugar de la aplicación donde se ve cada resultado.
+    """
+    if kind == 'document':
+        return reverse('document_download', args=[object_id])
+    if kind == 'message':
+        if thread_id:
+            return reverse('message_thread', args=[thread_id])
+        return reverse('client_inbox') if role == 'CLIENT' else reverse('staff_inbox')
+    if project_id is None:
+        return reverse('dashboard')
+    if role == 'CLIENT':
+        return reverse('client_project_detail', args=[project_id])
+    if role == 'WORKER':
+        return reverse('worker_project_detail', args=[project_id])
+    return reverse('staff_project_documents', args=[project_id])
+
+
+def like_search(user, role, text, limit=DEFAULT_LIMIT):
+    """
+    Búsqueda con LIKE '%...%' (lo que hace el admin de Django). Es la línea
+    base del benchmark y el respaldo en bases de datos sin FTS5.
+    """
+    text = (text or '').strip()
+    if not text:
+        return []
+
+    if role == 'ADMIN':
+        projects = Project.objects.all()
+    elif role == 'WORKER':
+        projects = Project.objects.filter(
+            id__in=ProjectAssignment.objects.filter(worker=user).values('project_id')
+        )
+    elif role == 'CLIENT':
+        projects = Project.objects.filter(client=user)
+    else:
+        return []
+    messages_qs = visible_messages(user, role)
+
+    documents = Document.objects.filter(project__in=projects)
+    if role == 'CLIENT':
+        documents = documents.filter(visible_to_client=True)
+
+    results = []
+    for msg in messages_qs.filter(Q(subject__icontains=text) | Q(body__icontains=text))[:limit]:
+        results.append({'kind': 'message', 'object_id': msg.pk, 'project_id': msg.project_id,
+                        'title': msg.subject or '', 'snippet': msg.body[:120]})
+    for doc in documents.filter(Q(title__icontains=text) | Q(original_filename__icontains=text))[:limit]:
+        results.append({'kind': 'document', 'object_id': doc.pk, 'project_id': doc.project_id,
+                        'title': doc.title, 'snippet': doc.original_filename})
+    for update in ProjectUpdate.objects.filter(project__in=projects, comment__icontains=text)[:limit]:
+        results.append({'kind': 'update', 'object_id': update.pk, 'project_id': update.project_id,
+                        'title': '', 'snippet': (update.comment or '')[:120]})
+    for project in projects.filter(Q(name__icontains=text) | Q(address__icontains=text) | Q(city__icontains=text))[:limit]:
+        results.append({'kind': 'project', 'object_id': project.pk, 'project_id': project.pk,
+                        'title': project.name, 'snippet': f"{project.address} {project.city}"})
+
+    results = results[:limit]
+    for result in results:
+        result['kind_label'] = KIND_LABELS[result['kind']]
+    _add_urls(results, role)
+    return results
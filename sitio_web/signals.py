@@ -0,0 +1,207 @@
+# sitio_web/signals.py
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_users
+from .events import broker, message_event, update_event
+from .fragments import bump_project_version
+from .images import delete_variants
+from .middleware import get_user_role
+from .progress import rebuild_progress_day, record_progress_snapshot
+from .models import Document, Message, Profile, Project, ProjectAssignment, ProjectUpdate
+from .search import index_instance, unindex_instance
+from .unread import initialize_counters
+from .storage import blob_digest
+from .threads import attach_to_thread
+
+
+def release_blob(name):
+    """
+    Borra el archivo de un blob si ningún Document lo referencia.
+    El conteo de referencias sale de las filas de Document (índice en sha256).
+
+    El conteo y el borrado van en la misma transacción, que en SQLite
+    (IMMEDIATE) tiene el bloqueo de escritura: una subida del mismo archivo
+    no puede confirmar su Document en el medio. La que llegue después ya no
+    encuentra el blob y lo vuelve a escribir.
+    """
+    digest = blob_digest(name)
+    if not digest:
+        return
+    with transaction.atomic():
+        if not Document.objects.select_for_update().filter(sha256=digest).exists():
+            storage = Document._meta.get_field('file').storage
+            storage.delete(name)
+
+
+@receiver(pre_save, sender=Document)
+def remember_previous_document_file(sender, instance, **kwargs):
+    instance._previous_file_name = None
+    if instance.pk:
+        instance._previous_file_name = (
+            Document.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Document)
+def release_replaced_document_file(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_file_name', None)
+    if previous and previous != instance.file.name:
+        transaction.on_commit(lambda: release_blob(previous))
+
+
+@receiver(post_delete, sender=Document)
+def release_deleted_document_file(sender, instance, **kwargs):
+    if instance.file:
+        name = instance.file.name
+        transaction.on_commit(lambda: release_blob(name))
+
+
+# --- Variantes de las imágenes de avance (sitio_web/images.py) ---
+# Si se reemplaza o se quita la imagen, las variantes de la anterior ya no
+# sirven: se borran sus archivos y image_variants queda vacío, que es lo que
+# busca `manage.py generate_image_variants`. Se borran al confirmar.
+
+@receiver(pre_save, sender=ProjectUpdate)
+def remember_previous_update_image(sender, instance, raw=False, **kwargs):
+    instance._previous_image = None
+    if instance.pk and not raw:
+        instance._previous_image = (
+            ProjectUpdate.objects.filter(pk=instance.pk).values_list('image', 'image_variants').first()
+        )
+
+
+@receiver(post_save, sender=ProjectUpdate)
+def delete_replaced_image_variants(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if not previous or previous[0] == instance.image.name:
+        return
+    variants = previous[1]
+    if instance.image_variants:
+        instance.image_variants = {}
+        ProjectUpdate.objects.filter(pk=instance.pk).update(image_variants={})
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants))
+
+
+@receiver(post_delete, sender=ProjectUpdate)
+def delete_deleted_image_variants(sender, instance, **kwargs):
+    variants = instance.image_variants
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants))
+
+
+# --- Índice de búsqueda (FTS5): se mantiene en la misma transacción ---
+
+@receiver(post_save, sender=Message)
+@receiver(post_save, sender=Document)
+@receiver(post_save, sender=ProjectUpdate)
+@receiver(post_save, sender=Project)
+def update_search_index(sender, instance, **kwargs):
+    index_instance(instance)
+
+
+@receiver(post_delete, sender=Message)
+@receiver(post_delete, sender=Document)
+@receiver(post_delete, sender=ProjectUpdate)
+@receiver(post_delete, sender=Project)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_instance(instance)
+
+
+# --- Tarjetas de proyecto cacheadas (sitio_web/fragments.py) ---
+# La versión se cambia al confirmar la transacción: si se cambiara antes,
+# otra petición podría cachear la tarjeta vieja bajo la versión nueva.
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_card(sender, instance, **kwargs):
+    project_id = instance.pk
+    transaction.on_commit(lambda: bump_project_version(project_id))
+
+
+@receiver(post_save, sender=ProjectUpdate)
+@receiver(post_delete, sender=ProjectUpdate)
+@receiver(post_save, sender=ProjectAssignment)
+@receiver(post_delete, sender=ProjectAssignment)
+def invalidate_related_project_card(sender, instance, **kwargs):
+    project_id = instance.project_id
+    transaction.on_commit(lambda: bump_project_version(project_id))
+
+
+# --- Serie de avance (sitio_web/progress.py) ---
+# Un avance nuevo se suma al snapshot de su día de forma incremental, venga
+# de la vista, del admin o de un script; una edición o un borrado recalcula
+# el día afectado. bulk_create no pasa por aquí: backfill_progress_snapshots.
+
+@receiver(post_save, sender=ProjectUpdate)
+def refresh_progress_day(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_progress_snapshot(instance)
+    else:
+        rebuild_progress_day(instance.project_id, instance.date)
+
+
+@receiver(post_delete, sender=ProjectUpdate)
+def refresh_progress_day_on_delete(sender, instance, origin=None, **kwargs):
+    # Si se borra el proyecto entero, sus snapshots se van en cascada.
+    if isinstance(origin, Project):
+        return
+    rebuild_progress_day(instance.project_id, instance.date)
+
+
+# --- Usuarios cacheados por el backend de autenticación (sitio_web/backends.py) ---
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.pk])
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.user_id])
+
+
+# --- Contadores de no leídos (sitio_web/unread.py) ---
+
+@receiver(post_save, sender=Profile)
+def initialize_profile_unread_counter(sender, instance, created, raw=False, **kwargs):
+    # Un perfil nuevo para un usuario que ya tenía mensajes no parte de 0.
+    if created and not raw:
+        initialize_counters([instance.user_id])
+
+
+# --- Conversaciones (sitio_web/threads.py) ---
+
+@receiver(post_save, sender=Message)
+def thread_new_message(sender, instance, created, raw=False, **kwargs):
+    # post_message ya guarda el mensaje con su hilo; esto cubre el resto
+    # (admin de Django, shell). bulk_create no dispara señales: backfill_threads.
+    if created and not raw and instance.thread_id is None:
+        attach_to_thread(instance)
+
+
+# --- Eventos en vivo (SSE, sitio_web/events.py): solo lo confirmado ---
+
+@receiver(post_save, sender=Message)
+def publish_new_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+    team = instance.receiver_id is None and get_user_role(instance.sender) == 'CLIENT'
+    event = message_event(instance, team)
+    transaction.on_commit(lambda: broker.publish(event))
+
+
+@receiver(post_save, sender=ProjectUpdate)
+def publish_new_update(sender, instance, created, **kwargs):
+    if not created:
+        return
+    event = update_event(instance, instance.project.client_id)
+    transaction.on_commit(lambda: broker.publish(event))
@@ -0,0 +1,122 @@
+// sitio_web/static/sitio_web/js/chunked_upload.js
+// Sube documentos grandes por partes y permite reanudar una subida cortada.
+// El formulario debe tener data-chunked-init-url y data-status-url-template.
+
+(function () {
+    var form = document.querySelector('form[data-chunked-init-url]');
+    if (!form || !window.fetch || !window.File || !File.prototype.slice) {
+        return; // Sin soporte: se usa el formulario normal.
+    }
+
+    var fileInput = form.querySelector('input[type="file"]');
+    var progress = document.getElementById('chunked-upload-progress');
+    var progressBar = progress ? progress.querySelector('.progress-bar') : null;
+    var csrfToken = form.querySelector('input[name="csrfmiddlewaretoken"]').value;
+    var MAX_RETRIES = 5;
+
+    function uploadUrl(uploadId, suffix) {
+        return form.getAttribute('data-status-url-template').replace('00000000-0000-0000-0000-000000000000', uploadId) + (suffix || '');
+    }
+
+    function storageKey(file) {
+        return 'chunked-upload:' + form.getAttribute('data-chunked-init-url') + ':' + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    function request(method, url, body, headers) {
+        headers = headers || {};
+        headers['X-CSRFToken'] = csrfToken;
+        return fetch(url, { method: method, body: body, headers: headers, credentials: 'same-origin' })
+            .then(function (response) {
+                return response.json().then(function (data) {
+                    if (!response.ok) {
+                        var error = new Error(data.error || ('Error ' + response.status));
+                        error.status = response.status;
+                        throw error;
+                    }
+                    return data;
+                });
+            });
+    }
+
+    function showProgress(done, total) {
+        if (!progressBar) { return; }
+        var percent = total ? Math.round((done / total) * 100) : 100;
+        progress.classList.remove('d-none');
+        progressBar.style.width = percent + '%';
+        progressBar.textContent = percent + '%';
+    }
+
+    function sendChunk(state, index, attempt) {
+        var start = index * state.chunk_size;
+        var blob = state.file.slice(start, Math.min(start + state.chunk_size, state.file.size));
+        return request('PUT', uploadUrl(state.upload_id, 'chunks/' + index + '/'), blob,
+                       { 'Content-Type': 'application/octet-stream' })
+            .catch(function (error) {
+                // Cortes de red: reintento con espera creciente.
+                if (attempt >= MAX_RETRIES || (error.status && error.status < 500)) { throw error; }
+                return new Promise(function (resolve) { setTimeout(resolve, 1000 * Math.pow(2, attempt)); })
+                    .then(function () { return sendChunk(state, index, attempt + 1); });
+            });
+    }
+
+    function start(file) {
+        var key = storageKey(file);
+        var saved = window.localStorage.getItem(key);
+        var ready;
+
+        if (saved) {
+            ready = request('GET', uploadUrl(saved)).catch(function () { return null; });
+        } else {
+            ready = Promise.resolve(null);
+        }
+
+        return ready.then(function (state) {
+            if (state && state.status === 'EN_PROGRESO') { return state; }
+            var data = new FormData();
+            data.append('title', form.querySelector('[name="title"]').value);
+            data.append('filename', file.name);
+            data.append('size', file.size);
+            if (form.querySelector('[name="visible_to_client"]').checked) {
+                data.append('visible_to_client', '1');
+            }
+            return request('POST', form.getAttribute('data-chunked-init-url'), data);
+        }).then(function (state) {
+            window.localStorage.setItem(key, state.upload_id);
+            state.file = file;
+            var received = {};
+            state.received.forEach(function (index) { received[index] = true; });
+            var done = state.received.length;
+            showProgress(done, state.total_chunks);
+
+            var chain = Promise.resolve();
+            for (var i = 0; i < state.total_chunks; i++) {
+                if (received[i]) { continue; }
+                (function (index) {
+                    chain = chain.then(function () {
+                        return sendChunk(state, index, 0).then(function () {
+                            done += 1;
+                            showProgress(done, state.total_chunks);
+                        });
+                    });
+                })(i);
+            }
+            return chain.then(function () {
+                return request('POST', uploadUrl(state.upload_id, 'finalize/'), new FormData());
+            }).then(function (result) {
+                window.localStorage.removeItem(key);
+                window.location.href = result.redirect;
+            });
+        });
+    }
+
+    form.addEventListener('submit', function (event) {
+        var file = fileInput.files[0];
+        if (!file) { return; }
+        event.preventDefault();
+        form.querySelector('button[type="submit"]').disabled = true;
+        start(file).catch(function (error) {
+            form.querySelector('button[type="submit"]').disabled = false;
+            alert('La subida se interrumpió: ' + error.message + '\nVuelve a enviar el mismo archivo para reanudarla.');
+        });
+    });
+})();
@@ -0,0 +1,58 @@
+// sitio_web/static/sitio_web/js/live_updates.js
+// Escucha el stream SSE de la intranet y actualiza la página sin recargar:
+// badge de mensajes sin leer, barras de avance del dashboard y un aviso.
+// Uso: <script src="live_updates.js" data-events-url="..."></script>
+
+(function () {
+    var script = document.currentScript;
+    var url = script && script.getAttribute('data-events-url');
+    if (!url || !window.EventSource) {
+        return;
+    }
+
+    function notify(text) {
+        var container = document.getElementById('live-notice');
+        if (!container) {
+            return;
+        }
+        var alert = document.createElement('div');
+        alert.className = 'alert alert-info alert-dismissible shadow-sm mb-2';
+        alert.setAttribute('role', 'status');
+        alert.textContent = text + ' ';
+        var reload = document.createElement('a');
+        reload.href = window.location.href;
+        reload.className = 'alert-link';
+        reload.textContent = 'Actualizar';
+        alert.appendChild(reload);
+        container.appendChild(alert);
+        setTimeout(function () { alert.remove(); }, 15000);
+    }
+
+    function onMessage(event) {
+        var data = JSON.parse(event.data);
+        document.querySelectorAll('[data-unread-badge]').forEach(function (badge) {
+            badge.textContent = (parseInt(badge.textContent, 10) || 0) + 1;
+            badge.classList.remove('d-none');
+        });
+        notify('Nuevo mensaje' + (data.subject ? ': ' + data.subject : '') + '.');
+    }
+
+    function onUpdate(event) {
+        var data = JSON.parse(event.data);
+        var text = data.progress_percent.toFixed(2) + '%';
+        document.querySelectorAll('[data-project-progress="' + data.project_id + '"]').forEach(function (node) {
+            node.textContent = text;
+            if (node.classList.contains('progress-bar')) {
+                node.style.width = data.progress_percent + '%';
+                node.setAttribute('aria-valuenow', data.progress_percent);
+            }
+        });
+        notify('Nuevo avance registrado en un proyecto.');
+    }
+
+    // EventSource reconecta solo (respetando el "retry" que envía el servidor).
+    var source = new EventSource(url);
+    source.addEventListener('message', onMessage);
+    source.addEventListener('update', onUpdate);
+    window.addEventListener('beforeunload', function () { source.close(); });
+})();
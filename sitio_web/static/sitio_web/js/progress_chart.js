@@ -0,0 +1,67 @@
+// sitio_web/static/sitio_web/js/progress_chart.js
+// Dibuja la serie de avance de un proyecto como un gráfico SVG simple.
+// Uso: <div data-progress-url="..."></div>
+
+(function () {
+    var SVG_NS = 'http://www.w3.org/2000/svg';
+    var WIDTH = 600;
+    var HEIGHT = 160;
+    var PAD = 24;
+
+    function el(name, attrs) {
+        var node = document.createElementNS(SVG_NS, name);
+        Object.keys(attrs).forEach(function (key) {
+            node.setAttribute(key, attrs[key]);
+        });
+        return node;
+    }
+
+    function draw(container, series) {
+        if (!series.length) {
+            container.textContent = 'Aún no hay avances registrados para graficar.';
+            return;
+        }
+
+        var svg = el('svg', {
+            viewBox: '0 0 ' + WIDTH + ' ' + HEIGHT,
+            width: '100%',
+            role: 'img',
+            'aria-label': 'Evolución del avance del proyecto'
+        });
+        var stepX = series.length > 1 ? (WIDTH - 2 * PAD) / (series.length - 1) : 0;
+        var points = series.map(function (point, i) {
+            var x = PAD + i * stepX;
+            var y = HEIGHT - PAD - (point.progress / 100) * (HEIGHT - 2 * PAD);
+            return x.toFixed(1) + ',' + y.toFixed(1);
+        });
+
+        svg.appendChild(el('line', {
+            x1: PAD, y1: HEIGHT - PAD, x2: WIDTH - PAD, y2: HEIGHT - PAD,
+            stroke: '#ced4da'
+        }));
+        svg.appendChild(el('polyline', {
+            points: points.join(' '),
+            fill: 'none',
+            stroke: '#28a745',
+            'stroke-width': 2
+        }));
+        points.forEach(function (point, i) {
+            var xy = point.split(',');
+            var dot = el('circle', { cx: xy[0], cy: xy[1], r: 3, fill: '#28a745' });
+            var title = el('title', {});
+            title.textContent = series[i].date + ': ' + series[i].progress + '%';
+            dot.appendChild(title);
+            svg.appendChild(dot);
+        });
+
+        container.innerHTML = '';
+        container.appendChild(svg);
+    }
+
+    document.querySelectorAll('[data-progress-url]').forEach(function (container) {
+        fetch(container.getAttribute('data-progress-url'), { credentials: 'same-origin' })
+            .then(function (response) { return response.json(); })
+            .then(function (data) { draw(container, data.series); })
+            .catch(function () { container.textContent = 'No se pudo cargar el gráfico de avance.'; });
+    });
+})();
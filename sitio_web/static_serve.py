@@ -0,0 +1,70 @@
+# sitio_web/static_serve.py
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Nombre con el hash de ManifestStaticFilesStorage: site.3f2a9c1b04de.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+# Versiones precomprimidas, en orden de preferencia.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _accepted_encodings(request):
+    header = request.headers.get('Accept-Encoding', '')
+    return {part.split(';')[0].strip().lower() for part in header.split(',')}
+
+
+def _set_cache_headers(response, path, mtime):
+    # Iguales en el 200 y en el 304: un 304 actualiza lo guardado en las
+    # cachés, que si no perderían el Vary o el max-age.
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Last-Modified'] = http_date(mtime)
+    if HASHED_NAME.search(path):
+        response.headers['Cache-Control'] = IMMUTABLE
+    else:
+        response.headers['Cache-Control'] = f'public, max-age={settings.STATIC_UNHASHED_MAX_AGE}'
+    return response
+
+
+def serve_static(request, path):
+    """
+    Sirve un archivo de STATIC_ROOT (después de collectstatic) cuando no hay
+    un servidor web delante que lo haga:
+
+    - entrega la versión .br o .gz si el navegador la acepta;
+    - los nombres con hash no cambian nunca: caché de un año e immutable;
+      el resto (p. ej. referencias sin hash), STATIC_UNHASHED_MAX_AGE.
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404("Archivo no encontrado.")
+    if not os.path.isfile(fullpath):
+        raise Http404("Archivo no encontrado.")
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return _set_cache_headers(HttpResponseNotModified(), path, stat.st_mtime)
+
+    content_type, _encoding = mimetypes.guess_type(fullpath)
+    served_path, content_encoding = fullpath, None
+    accepted = _accepted_encodings(request)
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(fullpath + suffix):
+            served_path, content_encoding = fullpath + suffix, encoding
+            break
+
+    response = FileResponse(open(served_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    return _set_cache_headers(response, path, stat.st_mtime)
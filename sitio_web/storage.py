@@ -0,0 +1,146 @@
+# sitio_web/storage.py
+
+import gzip
+import hashlib
+import os
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # opcional: sin el paquete solo se generan los .gz
+    brotli = None
+
+# Bloque de lectura al calcular el SHA-256 de un archivo.
+HASH_BLOCK_SIZE = 64 * 1024
+
+# Carpeta (dentro de MEDIA_ROOT) donde viven los blobs direccionados por contenido.
+BLOB_PREFIX = 'blobs'
+
+
+def hash_file(content):
+    """
+    SHA-256 de un File de Django leyendo por bloques.
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_BLOCK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_name(digest):
+    """
+    Ruta del blob en un árbol de dos niveles (blobs/ab/cd/abcd...), para
+    no acumular miles de archivos en un mismo directorio.
+    """
+    return os.path.join(BLOB_PREFIX, digest[:2], digest[2:4], digest)
+
+
+def blob_digest(name):
+    """
+    SHA-256 de un nombre de blob, o None si el nombre no es un blob.
+    """
+    parts = name.replace(os.sep, '/').split('/')
+    if len(parts) == 4 and parts[0] == BLOB_PREFIX and len(parts[3]) == 64:
+        return parts[3]
+    return None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Storage que guarda cada archivo una sola vez, nombrado por su SHA-256.
+    Subir un archivo idéntico devuelve el mismo nombre sin volver a escribirlo.
+    El nombre original se conserva en Document.original_filename.
+
+    Dos subidas simultáneas del mismo archivo no pasan por el renombrado de
+    FileSystemStorage (que dejaría un "blob" con sufijo): cada una escribe un
+    temporal junto al destino y lo enlaza con os.link, que falla sin pisar
+    nada si el blob ya apareció; como el contenido es el mismo, vale igual.
+    """
+
+    def save(self, name, content, max_length=None):
+        # Si quien sube ya calculó el hash (p. ej. la subida por partes), se reutiliza.
+        digest = getattr(content, 'sha256', None) or hash_file(content)
+        name = blob_name(digest)
+        if self.exists(name):
+            return name
+
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=directory)
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                os.close(fd)
+                file_move_safe(content.temporary_file_path(), temp_path, allow_overwrite=True)
+            else:
+                with os.fdopen(fd, 'wb') as handle:
+                    for chunk in content.chunks():
+                        handle.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            try:
+                os.link(temp_path, path)
+            except FileExistsError:
+                pass
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+
+document_storage = ContentAddressedStorage()
+
+
+# Extensiones de estáticos que vale la pena comprimir (las imágenes y las
+# fuentes woff/woff2 ya vienen comprimidas).
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.svg', '.json', '.txt', '.map', '.html', '.ttf', '.eot')
+
+# Solo se guarda la versión comprimida si ahorra al menos esto.
+MIN_COMPRESSION_RATIO = 0.95
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Estáticos con el hash del contenido en el nombre (app.3f2a9c1b.css, vía
+    staticfiles.json) y, junto a cada uno, versiones .gz y .br generadas
+    en `collectstatic`. nginx (gzip_static/brotli_static) o
+    sitio_web.static_serve las entregan sin comprimir en cada petición.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Las pasadas de ManifestStaticFilesStorage pueden entregar un mismo
+        # archivo varias veces; vale el último nombre con hash.
+        final_names = {}
+        for name, hashed_name, processed in super().post_process(paths, dry_run=dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                final_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name, hashed_name in final_names.items():
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        with self.open(name) as source:
+            data = source.read()
+        encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+        for suffix, encode in encoders:
+            compressed = encode(data)
+            if len(compressed) >= len(data) * MIN_COMPRESSION_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def get_document_storage():
+    return document_storage
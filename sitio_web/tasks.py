@@ -0,0 +1,81 @@
+# sitio_web/tasks.py
+# Tareas en segundo plano de la app. Se ejecutan con `manage.py runworker`.
+
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .images import generate_image_variants
+from .jobs import task
+from .models import Job, Message
+from .threads import refresh_threads
+from .unread import messages_deleted
+
+
+@task()
+def process_update_image(update_id):
+    """
+    Genera las variantes responsivas de la imagen de un ProjectUpdate.
+    """
+    generate_image_variants(update_id)
+
+
+@task()
+def delete_user(user_id, batch_size=500):
+    """
+    Elimina un usuario y sus mensajes enviados por lotes, para no bloquear
+    la base de datos con un único DELETE en cascada enorme.
+
+    Cada lote descuenta sus mensajes sin leer de los contadores y recalcula
+    las conversaciones afectadas, en la misma transacción que el borrado.
+    """
+    while True:
+        ids = list(
+            Message.objects.filter(sender_id=user_id).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            batch = Message.objects.filter(id__in=ids)
+            thread_ids = sorted(set(batch.exclude(thread=None).values_list('thread_id', flat=True)))
+            messages_deleted(batch)
+            batch.delete()
+            refresh_threads(thread_ids)
+
+    User.objects.filter(pk=user_id).delete()
+
+
+@task()
+def clear_expired_sessions():
+    """
+    Borra las sesiones vencidas (lo mismo que `manage.py clearsessions`) y
+    programa el próximo barrido dentro de SESSION_SWEEP_INTERVAL.
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except NotImplementedError:
+        # signed_cookies: no hay nada guardado del lado del servidor.
+        return
+    # Este Job sigue EN_PROCESO: schedule_session_sweep() lo tomaría por un
+    # barrido activo, así que el siguiente se encola directamente.
+    clear_expired_sessions.enqueue(delay=settings.SESSION_SWEEP_INTERVAL)
+
+
+def schedule_session_sweep(delay=0):
+    """
+    Encola el barrido de sesiones si no hay uno pendiente ni en proceso.
+
+    La consulta y el INSERT van en la misma transacción, que en SQLite
+    (IMMEDIATE) tiene el bloqueo de escritura: si dos workers arrancan a la
+    vez, el segundo ya ve el Job del primero. Devuelve el Job encolado o None.
+    """
+    with transaction.atomic():
+        active = Job.objects.select_for_update().filter(
+            task=clear_expired_sessions.task_name, status__in=('PENDIENTE', 'EN_PROCESO'),
+        )
+        if active.exists():
+            return None
+        return clear_expired_sessions.enqueue(delay=delay)
@@ -0,0 +1,32 @@
+# sitio_web/templatetags/assets.py
+
+from django import template
+
+from sitio_web.assets import responsive_sources, vendor_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_asset(name):
+    """
+    URL de una librería de terceros: {% vendor_asset 'bootstrap.css' %}.
+    """
+    return vendor_url(name)
+
+
+@register.inclusion_tag('sitio_web/responsive_image.html')
+def responsive_image(path, alt='', sizes='100vw', img_class='', img_style='', loading='lazy', fetchpriority=''):
+    """
+    <picture> con variantes AVIF/WebP/JPEG por ancho de una imagen estática:
+    {% responsive_image 'sitio_web/images/project1.jpg' alt='...' sizes='100vw' %}
+    """
+    return {
+        'image': responsive_sources(path),
+        'alt': alt,
+        'sizes': sizes,
+        'img_class': img_class,
+        'img_style': img_style,
+        'loading': loading,
+        'fetchpriority': fetchpriority,
+    }
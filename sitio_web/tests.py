@@ -1,3 +1,1333 @@
-from django.test import TestCase
+# sitio_web/tests.py
 
-# Create your tests here.
+import csv
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .backends import ProfileModelBackend, user_cache_key
+from .downloads import parse_range
+from .events import Subscriber, broker, stream_events
+from .images import generate_image_variants
+from .instrumentation import query_budget
+from .jobs import claim_job, run_job, run_worker, task
+from .middleware import PRIMARY_UNTIL_SESSION_KEY, ReplicaRoutingMiddleware
+from .models import (
+    ChunkedUpload, Document, Job, Message, MessageThread, Profile, Project, ProjectAssignment,
+    ProjectProgressSnapshot, ProjectUpdate, TeamInbox,
+)
+from .pagination import keyset_paginate
+from .ratelimit import check_rate, rate_stats
+from .retry import run_with_retry
+from .routers import ReplicaRouter, end_request, start_request
+from .search import like_search, search
+from .tasks import clear_expired_sessions, schedule_session_sweep
+from .threads import backfill_threads, post_message
+from .unread import TEAM_INBOX_ID, mark_read, team_unread_count, unread_count
+from .uploads import upload_dir
+
+
+# Tarea de prueba para la cola de trabajos.
+@task(name='sitio_web.tests.flaky_task', max_attempts=3)
+def flaky_task(fail=False):
+    if fail:
+        raise RuntimeError("Falla a propósito")
+
+
+# Cachés en memoria para los tests: los de archivos (sesiones, límite de
+# intentos) no deben escribir fuera de la base de pruebas.
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in settings.CACHES
+}
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class CCRTestCase(TestCase):
+    """
+    Base de los tests: un admin, un trabajador asignado a un proyecto, su
+    cliente y carpetas temporales para documentos y subidas por partes.
+    """
+
+    password = 'clave-de-prueba-123'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_dir = tempfile.mkdtemp(prefix='ccr-test-')
+        cls.addClassCleanup(shutil.rmtree, cls.media_dir, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=os.path.join(cls.media_dir, 'media'),
+            CHUNKED_UPLOAD_DIR=os.path.join(cls.media_dir, 'chunks'),
+        )
+        media.enable()
+        cls.addClassCleanup(media.disable)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.make_user('admin', 'ADMIN')
+        cls.worker = cls.make_user('trabajador', 'WORKER')
+        cls.client_user = cls.make_user('cliente', 'CLIENT')
+        cls.project = Project.objects.create(
+            name='Obra Uno', client=cls.client_user, start_date=datetime.date(2024, 1, 1),
+            address='Av. Siempre Viva 742', city='Santiago',
+        )
+        ProjectAssignment.objects.create(project=cls.project, worker=cls.worker)
+
+    @classmethod
+    def make_user(cls, username, role):
+        user = User.objects.create_user(username, password=cls.password)
+        Profile.objects.create(user=user, role=role)
+        return user
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def login(self, user):
+        self.client.force_login(user)
+        return self.client
+
+    def client_message(self, subject='Consulta', **kwargs):
+        # Mensaje de un cliente a la bandeja del equipo, por el camino de las vistas.
+        message = Message(sender=self.client_user, project=self.project, subject=subject, body='Hola', **kwargs)
+        return post_message(message, client=self.client_user)
+
+    def staff_reply(self, parent, sender=None):
+        reply = Message(
+            sender=sender or self.worker, receiver=self.client_user, project=self.project,
+            subject=f'Re: {parent.subject}', body='Respuesta',
+        )
+        return post_message(reply, parent=parent)
+
+
+class KeysetPaginationTests(CCRTestCase):
+    """
+    Paginación por cursor de las bandejas (sitio_web/pagination.py).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Varios hilos con el mismo last_message_at: el desempate es por id.
+        base = timezone.now()
+        MessageThread.objects.bulk_create([
+            MessageThread(project=cls.project, client=cls.client_user, subject=f'Hilo {number}',
+                          last_message_at=base - datetime.timedelta(minutes=number // 3))
+            for number in range(30)
+        ])
+
+    def expected_order(self):
+        return list(MessageThread.objects.order_by('-last_message_at', '-id').values_list('pk', flat=True))
+
+    def walk_forward(self, per_page):
+        pages, cursor = [], None
+        while True:
+            page = keyset_paginate(MessageThread.objects.all(), cursor=cursor, field='last_message_at', per_page=per_page)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once(self):
+        for per_page in (1, 4, 7, 30, 31):
+            with self.subTest(per_page=per_page):
+                pages = self.walk_forward(per_page)
+                seen = [thread.pk for page in pages for thread in page]
+                self.assertEqual(seen, self.expected_order())
+                self.assertTrue(pages[0].is_first)
+                self.assertFalse(pages[-1].has_next)
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        pages = self.walk_forward(5)
+        self.assertEqual([len(page) for page in pages], [5] * 6)
+
+    def test_before_cursor_returns_previous_page(self):
+        pages = self.walk_forward(4)
+        for previous, current in zip(pages, pages[1:]):
+            back = keyset_paginate(
+                MessageThread.objects.all(), before=current.prev_cursor, field='last_message_at', per_page=4,
+            )
+            self.assertEqual([thread.pk for thread in back], [thread.pk for thread in previous])
+            self.assertEqual(back.has_previous, previous is not pages[0])
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = keyset_paginate(MessageThread.objects.all(), cursor='no-es-un-cursor', field='last_message_at', per_page=3)
+        self.assertEqual([thread.pk for thread in page], self.expected_order()[:3])
+        self.assertTrue(page.is_first)
+
+    def test_staff_inbox_follows_cursor(self):
+        client = self.login(self.worker)
+        first = client.get(reverse('staff_inbox')).context['threads']
+        second = client.get(reverse('staff_inbox'), {'cursor': first.next_cursor}).context['threads']
+        shown = [thread.pk for thread in first] + [thread.pk for thread in second]
+        self.assertEqual(shown, self.expected_order())
+        self.assertFalse(second.has_next)
+
+
+class ProgressSnapshotTests(CCRTestCase):
+    """
+    Serie diaria de avance (sitio_web/progress.py): el snapshot del día sigue
+    a los ProjectUpdate, vengan de la vista o de cualquier otro lado.
+    """
+
+    def add_update(self, percent):
+        return ProjectUpdate.objects.create(project=self.project, author=self.worker, progress_percent=percent)
+
+    def snapshot(self, day):
+        return ProjectProgressSnapshot.objects.filter(project=self.project, date=day).values_list(
+            'progress_percent', 'updates_count',
+        ).first()
+
+    def test_view_records_the_update_once(self):
+        self.login(self.worker).post(
+            reverse('worker_add_update', args=[self.project.pk]), {'progress_percent': '40', 'comment': 'Losa'},
+        )
+        update = ProjectUpdate.objects.get(project=self.project)
+        self.assertEqual(self.snapshot(update.date), (Decimal('40'), 1))
+
+    def test_updates_created_outside_the_view(self):
+        # Como los crea el admin de Django o un script.
+        first = self.add_update(10)
+        self.add_update(25)
+        self.assertEqual(self.snapshot(first.date), (Decimal('25'), 2))
+
+    def test_edit_rebuilds_the_day(self):
+        self.add_update(10)
+        last = self.add_update(25)
+        last.progress_percent = 30
+        last.save()
+        self.assertEqual(self.snapshot(last.date), (Decimal('30'), 2))
+
+    def test_delete_rebuilds_or_removes_the_day(self):
+        first = self.add_update(10)
+        last = self.add_update(25)
+        last.delete()
+        self.assertEqual(self.snapshot(first.date), (Decimal('10'), 1))
+        first.delete()
+        self.assertIsNone(self.snapshot(first.date))
+
+    def test_series_endpoint(self):
+        update = self.add_update(15)
+        url = reverse('project_progress_series', args=[self.project.pk])
+        response = self.login(self.client_user).get(url)
+        self.assertEqual(response.json()['series'], [{'date': update.date.isoformat(), 'progress': 15.0}])
+
+        outsider = self.make_user('otro', 'WORKER')
+        self.assertEqual(self.login(outsider).get(url).status_code, 403)
+
+
+class ImageVariantTests(CCRTestCase):
+    """
+    Variantes responsivas de las imágenes de avance (sitio_web/images.py):
+    sus archivos se van con la imagen que las generó.
+    """
+
+    def image_file(self, name, width=700):
+        buffer = BytesIO()
+        Image.new('RGB', (width, 400), 'orange').save(buffer, format='JPEG')
+        return ContentFile(buffer.getvalue(), name=name)
+
+    def variant_files(self, variants):
+        return [name for key in ('webp', 'jpeg') for name in variants[key].values()]
+
+    def add_update(self):
+        update = ProjectUpdate.objects.create(
+            project=self.project, author=self.worker, progress_percent=10, image=self.image_file('losa.jpg'),
+        )
+        generate_image_variants(update.pk)
+        update.refresh_from_db()
+        return update
+
+    def test_variants_are_generated_without_upscaling(self):
+        variants = self.add_update().image_variants
+        self.assertEqual((variants['width'], sorted(variants['webp'], key=int)), (700, ['320', '640']))
+        self.assertTrue(variants['placeholder'].startswith('data:image/jpeg;base64,'))
+        for name in self.variant_files(variants):
+            self.assertTrue(default_storage.exists(name))
+
+    def test_replacing_the_image_deletes_old_variants(self):
+        update = self.add_update()
+        old = self.variant_files(update.image_variants)
+        update.image = self.image_file('losa-2.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            update.save()
+        update.refresh_from_db()
+        self.assertEqual(update.image_variants, {})
+        for name in old:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_deleting_the_update_deletes_variants(self):
+        update = self.add_update()
+        old = self.variant_files(update.image_variants)
+        with self.captureOnCommitCallbacks(execute=True):
+            update.delete()
+        for name in old:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_saving_without_changing_the_image_keeps_variants(self):
+        update = self.add_update()
+        update.comment = 'Editado'
+        with self.captureOnCommitCallbacks(execute=True):
+            update.save()
+        update.refresh_from_db()
+        self.assertTrue(update.image_variants)
+        for name in self.variant_files(update.image_variants):
+            self.assertTrue(default_storage.exists(name))
+
+
+class JobQueueTests(CCRTestCase):
+    """
+    Cola de trabajos (sitio_web/jobs.py): reintentos con backoff y Jobs
+    abandonados por un worker que se vuelven a tomar.
+    """
+
+    def test_failed_job_is_retried_later(self):
+        job = flaky_task.enqueue(fail=True)
+        with self.assertLogs('sitio_web.jobs', 'WARNING'):
+            self.assertFalse(run_job(claim_job('worker-1')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('PENDIENTE', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIsNone(claim_job('worker-1'))
+
+    def test_job_fails_after_max_attempts(self):
+        job = flaky_task.enqueue(fail=True)
+        Job.objects.filter(pk=job.pk).update(attempts=job.max_attempts - 1)
+        with self.assertLogs('sitio_web.jobs', 'ERROR'):
+            run_job(claim_job('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FALLIDO')
+        self.assertIn('RuntimeError', job.last_error)
+
+    def test_expired_lock_is_claimed_again(self):
+        job = flaky_task.enqueue()
+        claim_job('worker-1')
+        self.assertIsNone(claim_job('worker-2'))
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(claim_job('worker-2').pk, job.pk)
+
+
+class DocumentDownloadTests(CCRTestCase):
+    """
+    Descarga de documentos: permisos por rol, GET condicional y Range.
+    """
+
+    content = b'0123456789abcdefghij'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_worker = cls.make_user('otro', 'WORKER')
+
+    def setUp(self):
+        super().setUp()
+        # El archivo va en el MEDIA_ROOT temporal de la clase, no en setUpTestData.
+        self.document = Document.objects.create(
+            project=self.project, uploaded_by=self.worker, title='Plano',
+            file=ContentFile(self.content, name='plano.txt'),
+        )
+        self.url = reverse('document_download', args=[self.document.pk])
+
+    def download(self, user, headers=None):
+        return self.login(user).get(self.url, headers=headers)
+
+    def test_permissions_by_role(self):
+        cases = [(self.admin, 200), (self.worker, 200), (self.client_user, 200), (self.other_worker, 403)]
+        for user, status in cases:
+            with self.subTest(user=user.username):
+                response = self.download(user)
+                self.assertEqual(response.status_code, status)
+                if status == 200:
+                    self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_hidden_document_is_forbidden_for_client(self):
+        Document.objects.filter(pk=self.document.pk).update(visible_to_client=False)
+        self.assertEqual(self.download(self.client_user).status_code, 403)
+        self.assertEqual(self.download(self.worker).status_code, 200)
+
+    def test_anonymous_is_redirected_to_login(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_range(self):
+        response = self.download(self.client_user, {'Range': 'bytes=2-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[2:6])
+
+    def test_suffix_range(self):
+        response = self.download(self.client_user, {'Range': 'bytes=-3'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[-3:])
+
+    def test_unsatisfiable_range(self):
+        response = self.download(self.client_user, {'Range': f'bytes={len(self.content)}-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.download(self.client_user, {'Range': 'bytes=2-5', 'If-Range': '"otro-etag"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_range_is_checked_after_permissions(self):
+        self.assertEqual(self.download(self.other_worker, {'Range': 'bytes=0-1'}).status_code, 403)
+
+    def test_not_modified(self):
+        etag = self.download(self.client_user)['ETag']
+        self.assertEqual(self.download(self.client_user, {'If-None-Match': etag}).status_code, 304)
+
+    def test_missing_file_is_not_found(self):
+        os.remove(self.document.file.path)
+        self.assertEqual(self.download(self.admin).status_code, 404)
+
+    def test_parse_range(self):
+        cases = [
+            (None, None),
+            ('bytes=0-0', (0, 0)),
+            ('bytes=5-', (5, 19)),
+            ('bytes=10-100', (10, 19)),
+            ('bytes=-100', (0, 19)),
+            ('bytes=-0', 'unsatisfiable'),
+            ('bytes=20-', 'unsatisfiable'),
+            ('bytes=5-2', 'unsatisfiable'),
+            ('bytes=0-1,4-5', None),
+            ('items=0-1', None),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 20), expected)
+
+
+@override_settings(CHUNKED_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadTests(CCRTestCase):
+    """
+    Subida por partes: init -> PUT de cada parte -> finalize.
+    """
+
+    content = b'plano de la obra, version 2'
+
+    def start(self, user=None):
+        client = self.login(user or self.worker)
+        response = client.post(
+            reverse('chunked_upload_init', args=[self.project.pk]),
+            {'title': 'Plano', 'filename': 'plano.pdf', 'size': len(self.content)},
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def put_chunk(self, upload_id, index, data, sha256=None):
+        headers = {'X-Chunk-SHA256': sha256 or hashlib.sha256(data).hexdigest()}
+        return self.client.put(
+            reverse('chunked_upload_chunk', args=[upload_id, index]),
+            data, content_type='application/octet-stream', headers=headers,
+        )
+
+    def upload_all(self, upload):
+        size = upload['chunk_size']
+        for index in range(upload['total_chunks']):
+            response = self.put_chunk(upload['upload_id'], index, self.content[index * size:(index + 1) * size])
+            self.assertEqual(response.status_code, 200)
+
+    def finalize(self, upload_id, **data):
+        return self.client.post(reverse('chunked_upload_finalize', args=[upload_id]), data)
+
+    def test_upload_and_finalize(self):
+        upload = self.start()
+        self.assertEqual(upload['total_chunks'], 7)
+        self.upload_all(upload)
+
+        status = self.client.get(reverse('chunked_upload_status', args=[upload['upload_id']])).json()
+        self.assertEqual(status['received'], list(range(7)))
+
+        # Las partes se borran al confirmar la transacción.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.finalize(upload['upload_id'], sha256=hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(response.status_code, 200)
+        document = Document.objects.get(pk=response.json()['document_id'])
+        self.assertEqual((document.original_filename, document.size), ('plano.pdf', len(self.content)))
+        with document.file.open('rb') as handle:
+            self.assertEqual(handle.read(), self.content)
+        self.assertFalse(os.path.exists(upload_dir(ChunkedUpload(pk=upload['upload_id']))))
+
+    def test_finalize_twice_creates_one_document(self):
+        upload = self.start()
+        self.upload_all(upload)
+        first = self.finalize(upload['upload_id']).json()
+        second = self.finalize(upload['upload_id']).json()
+        self.assertEqual(first['document_id'], second['document_id'])
+        self.assertEqual(Document.objects.count(), 1)
+        self.assertEqual(self.put_chunk(upload['upload_id'], 0, self.content[:4]).status_code, 409)
+
+    def test_missing_chunks_are_reported(self):
+        upload = self.start()
+        self.put_chunk(upload['upload_id'], 0, self.content[:4])
+        response = self.finalize(upload['upload_id'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['received'], [0])
+        self.assertFalse(Document.objects.exists())
+
+    def test_bad_chunks_are_rejected(self):
+        upload = self.start()
+        self.assertEqual(self.put_chunk(upload['upload_id'], 0, b'abcd', sha256='0' * 64).status_code, 400)
+        self.assertEqual(self.put_chunk(upload['upload_id'], 0, b'abc').status_code, 400)
+        self.assertEqual(self.put_chunk(upload['upload_id'], 7, b'abcd').status_code, 400)
+        self.assertEqual(self.client.get(reverse('chunked_upload_status', args=[upload['upload_id']])).json()['received'], [])
+
+    def test_file_hash_mismatch_keeps_upload_open(self):
+        upload = self.start()
+        self.upload_all(upload)
+        response = self.finalize(upload['upload_id'], sha256='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ChunkedUpload.objects.get(pk=upload['upload_id']).status, 'EN_PROGRESO')
+        self.assertEqual(self.finalize(upload['upload_id']).status_code, 200)
+
+    def test_upload_belongs_to_its_author(self):
+        upload = self.start()
+        self.login(self.admin)
+        self.assertEqual(self.put_chunk(upload['upload_id'], 0, self.content[:4]).status_code, 404)
+        self.assertEqual(self.finalize(upload['upload_id']).status_code, 404)
+
+
+class DocumentStorageTests(CCRTestCase):
+    """
+    Documentos direccionados por contenido (sitio_web/storage.py): un
+    archivo idéntico se guarda una vez y se borra con su último Document.
+    """
+
+    def add_document(self, content, name='plano.pdf', **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Document.objects.create(
+                project=self.project, uploaded_by=self.worker, title='Plano',
+                file=ContentFile(content, name=name), **kwargs,
+            )
+
+    def blob_exists(self, document):
+        return document.file.storage.exists(document.file.name)
+
+    def test_identical_files_share_one_blob(self):
+        first = self.add_document(b'%PDF plano')
+        second = self.add_document(b'%PDF plano', name='copia.pdf')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.sha256, hashlib.sha256(b'%PDF plano').hexdigest())
+        self.assertEqual((first.original_filename, second.original_filename), ('plano.pdf', 'copia.pdf'))
+        self.assertEqual(second.size, 10)
+
+    def test_blob_is_deleted_with_its_last_document(self):
+        first = self.add_document(b'%PDF plano')
+        second = self.add_document(b'%PDF plano')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(self.blob_exists(second))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(self.blob_exists(second))
+
+    def test_replacing_the_file_releases_the_old_blob(self):
+        document = self.add_document(b'%PDF version 1')
+        old_name = document.file.name
+        document.file = ContentFile(b'%PDF version 2', name='plano.pdf')
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        self.assertNotEqual(document.file.name, old_name)
+        self.assertFalse(document.file.storage.exists(old_name))
+        self.assertTrue(self.blob_exists(document))
+
+    def test_upload_view_deduplicates(self):
+        url = reverse('staff_upload_document', args=[self.project.pk])
+        for name in ('plano.pdf', 'plano-copia.pdf'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.login(self.worker).post(url, {
+                    'title': 'Plano', 'visible_to_client': 'on', 'file': ContentFile(b'%PDF plano', name=name),
+                })
+        names = set(Document.objects.filter(project=self.project).values_list('file', flat=True))
+        self.assertEqual(Document.objects.filter(project=self.project).count(), 2)
+        self.assertEqual(len(names), 1)
+
+
+class SearchTests(CCRTestCase):
+    """
+    Búsqueda (sitio_web/search.py): cada rol encuentra lo mismo que ve en
+    las bandejas y en los proyectos, y nada más.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_client = cls.make_user('otro_cliente', 'CLIENT')
+        cls.other_project = Project.objects.create(
+            name='Obra Dos', client=cls.other_client, start_date=datetime.date(2024, 1, 1), address='x', city='y',
+        )
+        cls.own_message = post_message(
+            Message(sender=cls.client_user, project=cls.project, subject='Hormigón de la losa', body='¿Cuándo llega?'),
+            client=cls.client_user,
+        )
+        cls.foreign_message = post_message(
+            Message(sender=cls.other_client, project=cls.other_project, subject='Hormigón ajeno', body='x'),
+            client=cls.other_client,
+        )
+        cls.own_update = ProjectUpdate.objects.create(
+            project=cls.project, author=cls.worker, progress_percent=10, comment='Hormigonado de fundaciones',
+        )
+        cls.foreign_update = ProjectUpdate.objects.create(
+            project=cls.other_project, author=cls.worker, progress_percent=10, comment='Hormigonado de muros',
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.hidden_document = Document.objects.create(
+            project=self.project, title='Cubicación hormigón', visible_to_client=False,
+            file=ContentFile(b'interno', name='cubicacion.txt'),
+        )
+
+    def found(self, user, role, text='hormig', search_function=search):
+        return {(result['kind'], result['object_id']) for result in search_function(user, role, text)}
+
+    def test_client_sees_only_own_visible_content(self):
+        self.assertEqual(self.found(self.client_user, 'CLIENT'), {
+            ('message', self.own_message.pk), ('update', self.own_update.pk),
+        })
+
+    def test_worker_sees_client_threads_and_assigned_projects(self):
+        self.assertEqual(self.found(self.worker, 'WORKER'), {
+            ('message', self.own_message.pk), ('message', self.foreign_message.pk),
+            ('update', self.own_update.pk), ('document', self.hidden_document.pk),
+        })
+
+    def test_admin_sees_everything(self):
+        self.assertEqual(len(self.found(self.admin, 'ADMIN')), 5)
+
+    def test_like_search_matches_the_index(self):
+        for user, role in ((self.client_user, 'CLIENT'), (self.worker, 'WORKER'), (self.admin, 'ADMIN')):
+            with self.subTest(role=role):
+                self.assertEqual(self.found(user, role, 'hormig'), self.found(user, role, 'hormig', like_search))
+
+    def test_message_results_link_to_their_thread(self):
+        result, = [result for result in search(self.client_user, 'CLIENT', 'losa') if result['kind'] == 'message']
+        self.assertEqual(result['url'], reverse('message_thread', args=[self.own_message.thread_id]))
+        self.assertIn('<mark>', result['snippet'])
+
+    def test_edits_and_deletes_update_the_index(self):
+        self.own_update.comment = 'Enfierradura'
+        self.own_update.save()
+        self.own_message.delete()
+        self.assertEqual(self.found(self.client_user, 'CLIENT'), set())
+
+    def test_query_is_read_from_the_router_database(self):
+        # En DATABASE_REPLICA_VIEWS el router manda la lectura a una réplica: la
+        # consulta FTS va por esa conexión (aquí, un alias más de la de pruebas).
+        replicas = {'replica': connections[DEFAULT_DB_ALIAS]}
+        with mock.patch('sitio_web.search.router') as search_router, \
+                mock.patch('sitio_web.search.connections', replicas):
+            search_router.db_for_read.return_value = 'replica'
+            results = search(self.client_user, 'CLIENT', 'losa')
+        search_router.db_for_read.assert_called_once_with(Message)
+        self.assertEqual([result['object_id'] for result in results], [self.own_message.pk])
+
+    def test_view(self):
+        client = self.login(self.client_user)
+        client.get(reverse('search'), {'q': 'losa'})
+        with query_budget(settings.SQL_QUERY_BUDGETS['search']):
+            response = client.get(reverse('search'), {'q': 'losa'})
+        self.assertContains(response, 'Hormigón de la losa')
+
+
+class ProjectCardCacheTests(CCRTestCase):
+    """
+    Tarjetas de proyecto cacheadas en los paneles (sitio_web/fragments.py):
+    se sirven de la caché hasta que el proyecto o sus datos cambian.
+    """
+
+    def dashboard(self, user=None):
+        return self.login(user or self.client_user).get(reverse('dashboard')).content.decode()
+
+    def test_card_is_served_from_the_cache(self):
+        self.assertIn('Obra Uno', self.dashboard())
+        # update() no dispara señales: la tarjeta cacheada sigue igual.
+        Project.objects.filter(pk=self.project.pk).update(name='Obra Renombrada')
+        self.assertIn('Obra Uno', self.dashboard())
+
+    def test_saving_the_project_invalidates_its_card(self):
+        self.assertIn('Obra Uno', self.dashboard())
+        self.project.name = 'Obra Renombrada'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        for user in (self.client_user, self.worker, self.admin):
+            with self.subTest(role=user.profile.role):
+                self.assertIn('Obra Renombrada', self.dashboard(user))
+
+    def test_new_update_invalidates_the_card(self):
+        self.dashboard()
+        Project.objects.filter(pk=self.project.pk).update(progress_percent=55)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectUpdate.objects.create(project=self.project, author=self.worker, progress_percent=55)
+        self.assertIn('55.00%', self.dashboard())
+
+
+class UnreadCounterTests(CCRTestCase):
+    """
+    Contadores de no leídos (sitio_web/unread.py): el personal en Profile y
+    el compartido del staff en TeamInbox.
+    """
+
+    def counters(self):
+        self.client_user.profile.refresh_from_db()
+        self.worker.profile.refresh_from_db()
+        return self.client_user.profile.unread_messages, self.worker.profile.unread_messages, team_unread_count()
+
+    def test_team_message_counts_once_for_all_staff(self):
+        self.client_message()
+        self.client_message()
+        self.assertEqual(self.counters(), (0, 0, 2))
+        self.assertEqual(unread_count(self.admin, 'ADMIN'), 2)
+        self.assertEqual(unread_count(self.worker, 'WORKER'), 2)
+
+    def test_reply_counts_for_receiver(self):
+        self.staff_reply(self.client_message())
+        self.assertEqual(self.counters(), (1, 0, 1))
+
+    def test_mark_read_twice_does_not_drift(self):
+        message = self.client_message()
+        mark_read(Message.objects.filter(pk=message.pk))
+        mark_read(Message.objects.filter(pk=message.pk))
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_thread_view_marks_read(self):
+        reply = self.staff_reply(self.client_message())
+        self.login(self.client_user).get(reverse('message_thread', args=[reply.thread_id]))
+        self.assertEqual(self.counters()[0], 0)
+
+    def test_reconcile_fixes_drifted_counters(self):
+        self.staff_reply(self.client_message())
+        Profile.objects.filter(user=self.client_user).update(unread_messages=7)
+        Profile.objects.filter(user=self.worker).update(unread_messages=3)
+        TeamInbox.objects.filter(pk=TEAM_INBOX_ID).delete()
+
+        call_command('reconcile_unread_counters', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.counters(), (1, 0, 1))
+
+    def test_new_profile_starts_from_existing_messages(self):
+        newcomer = User.objects.create_user('nuevo', password=self.password)
+        Message.objects.create(sender=self.worker, receiver=newcomer, subject='Bienvenida', body='Hola')
+        Profile.objects.create(user=newcomer, role='CLIENT')
+        self.assertEqual(Profile.objects.get(user=newcomer).unread_messages, 1)
+
+
+class EventStreamTests(CCRTestCase):
+    """
+    Eventos en vivo (sitio_web/events.py): cada conexión recibe solo lo
+    que su rol puede ver, y solo después de confirmada la transacción.
+    """
+
+    def test_visibility_by_role(self):
+        team_message = {'type': 'message', 'team': True}
+        direct_message = {'type': 'message', 'team': False, 'receiver_id': self.client_user.pk}
+        update = {'type': 'update', 'project_id': self.project.pk, 'client_id': self.client_user.pk}
+        cases = [
+            (Subscriber(None, self.admin.pk, 'ADMIN'), (True, False, True)),
+            (Subscriber(None, self.worker.pk, 'WORKER', [self.project.pk]), (True, False, True)),
+            (Subscriber(None, self.worker.pk, 'WORKER'), (True, False, False)),
+            (Subscriber(None, self.client_user.pk, 'CLIENT'), (False, True, True)),
+        ]
+        for subscriber, expected in cases:
+            with self.subTest(role=subscriber.role, projects=subscriber.project_ids):
+                seen = tuple(subscriber.can_see(event) for event in (team_message, direct_message, update))
+                self.assertEqual(seen, expected)
+
+    def test_events_are_published_on_commit(self):
+        with mock.patch('sitio_web.signals.broker') as broker_mock:
+            with self.captureOnCommitCallbacks() as callbacks:
+                message = self.client_message()
+            broker_mock.publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        event = broker_mock.publish.call_args.args[0]
+        self.assertEqual((event['type'], event['id'], event['team']), ('message', message.pk, True))
+
+    async def test_stream_delivers_visible_events(self):
+        subscriber = broker.subscribe(self.client_user.pk, 'CLIENT')
+        stream = stream_events(subscriber)
+        try:
+            self.assertTrue((await anext(stream)).startswith('retry: '))
+            broker.publish({'type': 'message', 'team': True, 'id': 1})
+            broker.publish({'type': 'message', 'team': False, 'receiver_id': self.client_user.pk, 'id': 2})
+            chunk = await anext(stream)
+        finally:
+            await stream.aclose()
+        self.assertTrue(chunk.startswith('event: message\ndata: '))
+        self.assertEqual(json.loads(chunk.split('data: ', 1)[1])['id'], 2)
+        self.assertNotIn(subscriber.key, broker._subscribers)
+
+
+class PortfolioImportTests(CCRTestCase):
+    """
+    Carga masiva de cartera (`manage.py import_portfolio`): filas inválidas
+    informadas y omitidas, y se puede volver a correr sin duplicar.
+    """
+
+    def csv(self, name, text):
+        path = os.path.join(self.media_dir, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+        return path
+
+    def run_import(self, **files):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_portfolio', stdout=stdout, stderr=stderr, **files)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def portfolio(self):
+        return {
+            'users': self.csv('usuarios.csv', (
+                'username,email,first_name,last_name,role,phone,company_name\n'
+                'constructora,contacto@constructora.cl,Ana,Rojas,client,,Constructora SpA\n'
+                'maestro,,Juan,Soto,WORKER,,\n'
+                'malo,no-es-email,,,CLIENT,,\n'
+            )),
+            'projects': self.csv('proyectos.csv', (
+                'name,client,start_date,end_date_estimated,address,city,status,progress_percent,description\n'
+                'Edificio Norte,constructora,2024-03-01,,Calle 1,Temuco,EN_PROGRESO,12.5,Torre de oficinas\n'
+                'Sin Cliente,nadie,2024-03-01,,Calle 2,Temuco,,,\n'
+            )),
+            'assignments': self.csv('asignaciones.csv', 'project,worker\nEdificio Norte,maestro\n'),
+        }
+
+    def test_import_creates_users_projects_and_assignments(self):
+        _stdout, stderr = self.run_import(**self.portfolio())
+        client = User.objects.get(username='constructora')
+        self.assertEqual((client.profile.role, client.has_usable_password()), ('CLIENT', False))
+        self.assertFalse(User.objects.filter(username='malo').exists())
+        project = Project.objects.get(name='Edificio Norte')
+        self.assertEqual((project.client, project.progress_percent), (client, Decimal('12.50')))
+        self.assertTrue(ProjectAssignment.objects.filter(project=project, worker__username='maestro').exists())
+        self.assertIn("Email inválido: 'no-es-email'", stderr)
+        self.assertIn("El cliente 'nadie' no existe", stderr)
+        # bulk_create no dispara señales: el importador indexa lo creado.
+        results = search(client, 'CLIENT', 'Edificio')
+        self.assertEqual([(hit['kind'], hit['title']) for hit in results], [('project', 'Edificio Norte')])
+
+    def test_rerun_does_not_duplicate(self):
+        files = self.portfolio()
+        self.run_import(**files)
+        stdout, _stderr = self.run_import(**files)
+        self.assertIn('creados: 0, ya existían: 2', stdout)
+        self.assertEqual(Project.objects.filter(name='Edificio Norte').count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        stdout, _stderr = self.run_import(dry_run=True, users=self.portfolio()['users'])
+        self.assertIn('se crearían: 2', stdout)
+        self.assertFalse(User.objects.filter(username='constructora').exists())
+
+
+class ExportTests(CCRTestCase):
+    """
+    Exportaciones CSV/XLSX en streaming: cada rol exporta lo que ve en su
+    panel y en sus bandejas.
+    """
+
+    def export(self, user, url_name, fmt='csv', **params):
+        response = self.login(user).get(reverse(url_name, args=[fmt]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def rows(self, user, url_name, **params):
+        content = self.export(user, url_name, **params).decode('utf-8-sig')
+        return list(csv.reader(StringIO(content)))
+
+    def test_projects_by_role(self):
+        ProjectUpdate.objects.create(project=self.project, author=self.worker, progress_percent=20, comment='=1+1')
+        outsider = self.make_user('otro', 'WORKER')
+        for user, expected in ((self.client_user, 1), (self.worker, 1), (self.admin, 1), (outsider, 0)):
+            with self.subTest(user=user.username):
+                self.assertEqual(len(self.rows(user, 'export_projects')) - 1, expected)
+        row = self.rows(self.client_user, 'export_projects')[1]
+        self.assertEqual(row[1:3], ['Obra Uno', 'cliente'])
+        # Un texto que empieza con "=" no se exporta como fórmula.
+        self.assertEqual(row[-1], "'=1+1")
+
+    def test_messages_follow_the_inbox_scope(self):
+        self.staff_reply(self.client_message('Consulta propia'))
+        other_client = self.make_user('otro_cliente', 'CLIENT')
+        post_message(Message(sender=other_client, subject='Ajena', body='Hola'), client=other_client)
+
+        subjects = [row[4] for row in self.rows(self.client_user, 'export_messages')[1:]]
+        self.assertEqual(subjects, ['Consulta propia', 'Re: Consulta propia'])
+        subjects = [row[4] for row in self.rows(self.admin, 'export_messages', client=other_client.pk)[1:]]
+        self.assertEqual(subjects, ['Ajena'])
+
+    def test_xlsx(self):
+        content = self.export(self.admin, 'export_projects', 'xlsx')
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('Obra Uno', sheet)
+
+    def test_unknown_format(self):
+        response = self.login(self.admin).get(reverse('export_projects', args=['pdf']))
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryBudgetTests(CCRTestCase):
+    """
+    Las vistas más visitadas no deben crecer en consultas con los datos
+    (SQL_QUERY_BUDGETS), ni en la primera visita (usuario fuera de la
+    caché) ni en las siguientes, y sin consultas repetidas (N+1).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(30):
+            message = Message(sender=cls.client_user, project=cls.project, subject=f'Consulta {number}', body='Hola')
+            post_message(message, client=cls.client_user)
+            if number % 3 == 0:
+                reply = Message(sender=cls.worker, receiver=cls.client_user, project=cls.project,
+                                subject=f'Re: Consulta {number}', body='Respuesta')
+                post_message(reply, parent=message)
+
+    def assertWithinBudget(self, user, url_name, *args):
+        # La primera petición carga además el usuario; la segunda ya lo
+        # tiene en caché. Las dos deben entrar en el presupuesto.
+        client = self.login(user)
+        url = reverse(url_name, args=args)
+        for request in ('fría', 'con caché'):
+            with self.subTest(request=request), query_budget(settings.SQL_QUERY_BUDGETS[url_name], max_duplicates=1):
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_dashboard(self):
+        for user in (self.admin, self.worker, self.client_user):
+            with self.subTest(role=user.profile.role):
+                self.assertWithinBudget(user, 'dashboard')
+
+    def test_staff_inbox(self):
+        self.assertWithinBudget(self.worker, 'staff_inbox')
+
+    def test_client_inbox(self):
+        self.assertWithinBudget(self.client_user, 'client_inbox')
+
+    def test_client_project_detail(self):
+        self.assertWithinBudget(self.client_user, 'client_project_detail', self.project.pk)
+
+    def test_client_project_detail_not_modified(self):
+        # El 304 sale de los validadores, sin renderizar la página.
+        client = self.login(self.client_user)
+        url = reverse('client_project_detail', args=[self.project.pk])
+        etag = client.get(url)['ETag']
+        with query_budget(1):
+            response = client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_REPLICA_VIEWS={'dashboard'})
+class ReplicaRoutingTests(CCRTestCase):
+    """
+    Lecturas a réplicas (sitio_web/routers.py y ReplicaRoutingMiddleware):
+    solo las vistas marcadas y sin escrituras recientes de la sesión.
+    """
+
+    def route(self, method='get', url_name='dashboard', write=False, session=None):
+        # Devuelve la base de la que leyó la "vista" y la sesión resultante.
+        request = getattr(RequestFactory(), method)('/')
+        request.resolver_match = mock.Mock(url_name=url_name)
+        request.session = {} if session is None else session
+        request.user = self.client_user
+
+        def view(request):
+            middleware.process_view(request, view, (), {})
+            database = router.db_for_read(Project)
+            if write:
+                router.db_for_write(Project)
+            return database
+
+        router = ReplicaRouter()
+        middleware = ReplicaRoutingMiddleware(view)
+        return middleware(request), request.session
+
+    def test_marked_view_reads_from_the_replica(self):
+        self.assertEqual(self.route()[0], 'replica')
+        self.assertEqual(self.route(url_name='client_inbox')[0], DEFAULT_DB_ALIAS)
+
+    def test_writes_stick_the_session_to_the_primary(self):
+        database, session = self.route(method='post')
+        self.assertEqual(database, DEFAULT_DB_ALIAS)
+        self.assertEqual(self.route(session=session)[0], DEFAULT_DB_ALIAS)
+
+        database, session = self.route(write=True)
+        self.assertEqual(database, 'replica')
+        self.assertIn(PRIMARY_UNTIL_SESSION_KEY, session)
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        router = ReplicaRouter()
+        state, token = start_request(replica='replica')
+        try:
+            self.assertEqual(router.db_for_read(Project), 'replica')
+            router.db_for_write(Project)
+            self.assertEqual(router.db_for_read(Project), DEFAULT_DB_ALIAS)
+        finally:
+            end_request(token)
+        self.assertTrue(state['wrote'])
+        self.assertEqual(router.db_for_read(Project), DEFAULT_DB_ALIAS)
+
+
+class RetryTests(TransactionTestCase):
+    """
+    Reintentos ante "database is locked" (sitio_web/retry.py). Sin la
+    transacción de TestCase: run_with_retry no reintenta dentro de otra.
+    """
+
+    def setUp(self):
+        # La fila del equipo que crea la migración de contadores no interesa aquí.
+        TeamInbox.objects.all().delete()
+        sleep = mock.patch('sitio_web.retry.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def flaky_write(self, failures, error='database is locked'):
+        calls = []
+
+        def write():
+            calls.append(1)
+            TeamInbox.objects.create(unread_messages=len(calls))
+            if len(calls) <= failures:
+                raise OperationalError(error)
+            return len(calls)
+        return write, calls
+
+    def test_locked_database_is_retried_and_rolled_back(self):
+        write, _calls = self.flaky_write(2)
+        before_retry = mock.Mock()
+        with self.assertLogs('sitio_web.retry', 'WARNING'):
+            self.assertEqual(run_with_retry(write, before_retry=before_retry), 3)
+        self.assertEqual(list(TeamInbox.objects.values_list('unread_messages', flat=True)), [3])
+        self.assertEqual((self.sleep.call_count, before_retry.call_count), (2, 2))
+
+    def test_gives_up_after_the_last_attempt(self):
+        write, calls = self.flaky_write(5)
+        with self.assertRaises(OperationalError), self.assertLogs('sitio_web.retry', 'WARNING'):
+            run_with_retry(write, attempts=3)
+        self.assertEqual((len(calls), TeamInbox.objects.count()), (3, 0))
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self.flaky_write(1, error='no such table: sitio_web_teaminbox')
+        with self.assertRaises(OperationalError):
+            run_with_retry(write)
+        self.assertEqual(len(calls), 1)
+
+
+class ConditionalGetTests(CCRTestCase):
+    """
+    GET condicional de la página de un proyecto y caché de la portada
+    para visitantes anónimos (sitio_web/http_cache.py).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('client_project_detail', args=[self.project.pk])
+        self.browser = self.login(self.client_user)
+
+    def etag(self):
+        response = self.browser.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.etag()
+        response = self.browser.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_etag_follows_what_the_page_shows(self):
+        changes = {
+            'avance nuevo': lambda: ProjectUpdate.objects.create(
+                project=self.project, author=self.worker, progress_percent=10),
+            'avance editado': lambda: ProjectUpdate.objects.filter(project=self.project).update(
+                updated_at=timezone.now() + datetime.timedelta(seconds=1)),
+            'documento visible': lambda: Document.objects.create(
+                project=self.project, title='Plano', file=ContentFile(b'plano', name='plano.txt')),
+            'mensaje sin leer': lambda: self.staff_reply(self.client_message()),
+        }
+        etag = self.etag()
+        for change, apply in changes.items():
+            with self.subTest(change=change):
+                with self.captureOnCommitCallbacks(execute=True):
+                    apply()
+                new_etag = self.etag()
+                self.assertNotEqual(new_etag, etag)
+                etag = new_etag
+
+    def test_flash_messages_are_never_answered_with_304(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.browser.post(
+                reverse('client_send_message', args=[self.project.pk]), {'subject': 'Consulta', 'body': 'Hola'},
+            )
+        response = self.browser.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertContains(response, 'Mensaje enviado exitosamente')
+
+    def test_home_is_cached_for_anonymous_visitors(self):
+        self.client.logout()
+        first = self.client.get(reverse('home'))
+        with mock.patch('sitio_web.views.render', side_effect=AssertionError("no debería renderizar")):
+            again = self.client.get(reverse('home'))
+            not_modified = self.client.get(reverse('home'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.login(self.client_user)
+        self.assertNotIn('ETag', self.client.get(reverse('home')))
+
+
+class CachedUserTests(CCRTestCase):
+    """
+    Usuario autenticado en caché (sitio_web/backends.py): sin consultas en
+    las peticiones siguientes, sin la contraseña y siempre al día.
+    """
+
+    def cached_entry(self, user):
+        return caches[settings.USER_CACHE_ALIAS].get(user_cache_key(user.pk))
+
+    def test_user_and_profile_come_from_the_cache(self):
+        backend = ProfileModelBackend()
+        backend.get_user(self.client_user.pk)
+        self.assertNotIn('password', self.cached_entry(self.client_user)['user'])
+        with self.assertNumQueries(0):
+            user = backend.get_user(self.client_user.pk)
+            self.assertEqual((user.username, user.profile.role), ('cliente', 'CLIENT'))
+
+    def test_profile_changes_invalidate_the_entry(self):
+        ProfileModelBackend().get_user(self.worker.pk)
+        profile = self.worker.profile
+        profile.role = 'ADMIN'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertIsNone(self.cached_entry(self.worker))
+        self.assertEqual(ProfileModelBackend().get_user(self.worker.pk).profile.role, 'ADMIN')
+
+    def test_password_change_ends_other_sessions(self):
+        browser = self.login(self.client_user)
+        self.assertEqual(browser.get(reverse('dashboard')).status_code, 200)
+        self.assertIsNotNone(self.cached_entry(self.client_user))
+
+        self.client_user.set_password('otra-clave-456')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_user.save()
+        response = browser.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(settings.LOGIN_URL))
+
+    def test_saving_a_cached_user_keeps_the_password(self):
+        ProfileModelBackend().get_user(self.client_user.pk)
+        user = ProfileModelBackend().get_user(self.client_user.pk)
+        user.first_name = 'Ana'
+        user.save()
+        self.assertTrue(User.objects.get(pk=user.pk).check_password(self.password))
+
+
+class SessionSweepTests(CCRTestCase):
+    """
+    Barrido periódico de sesiones vencidas (sitio_web/tasks.py): nunca
+    queda encolado dos veces.
+    """
+
+    def sweeps(self, *statuses):
+        return Job.objects.filter(task=clear_expired_sessions.task_name, status__in=statuses).count()
+
+    def test_sweep_is_not_scheduled_twice(self):
+        self.assertIsNotNone(schedule_session_sweep())
+        self.assertIsNone(schedule_session_sweep())
+        self.assertEqual(self.sweeps('PENDIENTE'), 1)
+
+    def test_sweep_is_not_scheduled_while_one_runs(self):
+        schedule_session_sweep()
+        claim_job('worker-1')
+        self.assertIsNone(schedule_session_sweep())
+        self.assertEqual(self.sweeps('PENDIENTE', 'EN_PROCESO'), 1)
+
+    def test_sweep_schedules_the_next_one(self):
+        schedule_session_sweep()
+        self.assertEqual(run_worker(burst=True), 1)
+        self.assertEqual(self.sweeps('COMPLETADO'), 1)
+        self.assertEqual(self.sweeps('PENDIENTE'), 1)
+        self.assertIsNone(schedule_session_sweep())
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMIT_CLIENT_IP_HEADER=None)
+class RateLimitTests(CCRTestCase):
+    """
+    Límite de intentos de login (sitio_web/ratelimit.py, RATELIMIT_RULES).
+    """
+
+    def attempt(self, username, ip='10.0.0.1', password='incorrecta'):
+        return self.client.post(reverse('login'), {'username': username, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_username_is_locked_after_limit(self):
+        limit, _period = settings.RATELIMIT_RULES['login']['username']
+        for number in range(limit):
+            # Desde IPs distintas, para que solo cuente la regla por usuario.
+            self.assertEqual(self.attempt('cliente', ip=f'10.0.1.{number}').status_code, 200)
+
+        with self.assertLogs('sitio_web.ratelimit', 'WARNING'):
+            response = self.attempt('cliente', ip='10.0.2.1', password=self.password)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_ip_is_locked_after_limit(self):
+        limit, _period = settings.RATELIMIT_RULES['login']['ip']
+        for number in range(limit):
+            self.attempt(f'usuario{number}')
+        with self.assertLogs('sitio_web.ratelimit', 'WARNING'):
+            self.assertEqual(self.attempt('otro').status_code, 429)
+
+    def test_lockout_does_not_affect_other_users(self):
+        limit, _period = settings.RATELIMIT_RULES['login']['username']
+        with self.assertLogs('sitio_web.ratelimit', 'WARNING'):
+            for number in range(limit + 2):
+                self.attempt('cliente', ip=f'10.0.1.{number}')
+
+        response = self.attempt('trabajador', ip='10.0.3.1', password=self.password)
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        limit, _period = settings.RATELIMIT_RULES['login']['ip']
+        for _number in range(limit + 1):
+            response = self.attempt('cliente')
+        self.assertEqual(response.status_code, 200)
+
+    def test_file_cache_keeps_window_longer_than_default_timeout(self):
+        # Con la caché de archivos de producción: su incr() reescribe la clave
+        # con el TIMEOUT por defecto (300 s), más corto que la ventana de registro.
+        file_caches = {**TEST_CACHES, 'ratelimit': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(self.media_dir, 'ratelimit'),
+        }}
+        limit, period = settings.RATELIMIT_RULES['register']['ip']
+        request = RequestFactory().post(reverse('register'), REMOTE_ADDR='10.0.4.1')
+        # Al comienzo de una ventana, para que todo caiga en la misma.
+        start = (time.time() // period + 1) * period + 1
+        with override_settings(CACHES=file_caches):
+            with mock.patch('time.time', return_value=start):
+                for _number in range(limit):
+                    self.assertEqual(check_rate('register', request), (False, 0))
+            with mock.patch('time.time', return_value=start + period / 2):
+                self.assertTrue(check_rate('register', request)[0])
+            with mock.patch('time.time', return_value=start + 30 * 24 * 3600):
+                self.assertEqual(rate_stats()['register']['allowed'], limit)
+
+
+class MessageThreadTests(CCRTestCase):
+    """
+    Conversaciones (sitio_web/threads.py): toda forma de crear un mensaje lo
+    deja en un hilo, y los mensajes anteriores se agrupan con el backfill.
+    """
+
+    def legacy_message(self, sender, subject, minutes, receiver=None):
+        # bulk_create no dispara señales: queda sin hilo, como los mensajes
+        # anteriores a las conversaciones o los de seed_load.
+        message, = Message.objects.bulk_create([
+            Message(sender=sender, receiver=receiver, project=self.project, subject=subject, body='x'),
+        ])
+        # sent_at es auto_now_add: se fija después para controlar el orden.
+        Message.objects.filter(pk=message.pk).update(sent_at=timezone.now() + datetime.timedelta(minutes=minutes))
+        return message
+
+    def test_message_saved_outside_post_message_gets_a_thread(self):
+        # Como lo crea el admin de Django: save() sin post_message.
+        question = Message.objects.create(sender=self.client_user, project=self.project, subject='Plazos', body='x')
+        answer = Message.objects.create(
+            sender=self.worker, receiver=self.client_user, project=self.project,
+            subject='Re: Plazos', body='y', parent=question,
+        )
+        question.refresh_from_db()
+        answer.refresh_from_db()
+        self.assertIsNotNone(question.thread_id)
+        self.assertEqual(answer.thread_id, question.thread_id)
+
+        thread = MessageThread.objects.get(pk=question.thread_id)
+        self.assertEqual((thread.client_id, thread.subject, thread.message_count), (self.client_user.pk, 'Plazos', 2))
+        self.assertEqual(thread.last_message_id, answer.pk)
+        self.assertEqual(team_unread_count(), 1)
+        self.assertEqual(Profile.objects.get(user=self.client_user).unread_messages, 1)
+
+        response = self.login(self.worker).get(reverse('staff_inbox'))
+        self.assertEqual([shown.pk for shown in response.context['threads']], [thread.pk])
+
+    def test_staff_message_to_client_is_the_clients_thread(self):
+        message = Message.objects.create(sender=self.worker, receiver=self.client_user, subject='Aviso', body='x')
+        self.assertEqual(MessageThread.objects.get(pk=message.thread_id).client_id, self.client_user.pk)
+
+    def test_backfill_groups_replies_into_the_original_conversation(self):
+        question = self.legacy_message(self.client_user, 'Plazos', 0)
+        answer = self.legacy_message(self.worker, 'Re: Plazos', 1, receiver=self.client_user)
+        again = self.legacy_message(self.client_user, 'RE: re: Plazos', 2)
+        other = self.legacy_message(self.client_user, 'Presupuesto', 3)
+
+        self.assertEqual(backfill_threads(batch_size=2), 4)
+
+        question, answer, again, other = Message.objects.filter(
+            pk__in=[question.pk, answer.pk, again.pk, other.pk],
+        ).order_by('sent_at')
+        self.assertEqual(answer.thread_id, question.thread_id)
+        self.assertEqual(again.thread_id, question.thread_id)
+        self.assertNotEqual(other.thread_id, question.thread_id)
+        self.assertEqual((answer.parent_id, again.parent_id), (question.pk, answer.pk))
+
+        thread = MessageThread.objects.get(pk=question.thread_id)
+        self.assertEqual((thread.client_id, thread.subject, thread.message_count), (self.client_user.pk, 'Plazos', 3))
+        self.assertEqual(thread.last_message_id, again.pk)
+        self.assertEqual(set(thread.participants.values_list('pk', flat=True)), {self.client_user.pk, self.worker.pk})
+
+    def test_backfill_rerun_continues_existing_threads(self):
+        question = self.legacy_message(self.client_user, 'Plazos', 0)
+        backfill_threads()
+        answer = self.legacy_message(self.worker, 'Re: Plazos', 1, receiver=self.client_user)
+
+        self.assertEqual(backfill_threads(), 1)
+        self.assertEqual(backfill_threads(), 0)
+        answer.refresh_from_db()
+        question.refresh_from_db()
+        self.assertEqual((answer.thread_id, answer.parent_id), (question.thread_id, question.pk))
+        self.assertEqual(MessageThread.objects.get(pk=question.thread_id).message_count, 2)
+
+    def test_migration_backfill(self):
+        # La copia congelada de la migración 0011 agrupa igual que backfill_threads.
+        migration = import_module('sitio_web.migrations.0012_backfill_message_threads')
+        question = self.legacy_message(self.client_user, 'Plazos', 0)
+        answer = self.legacy_message(self.worker, 'Re: Plazos', 1, receiver=self.client_user)
+
+        migration.assign_threads(django_apps, None)
+
+        question.refresh_from_db()
+        answer.refresh_from_db()
+        self.assertEqual((answer.thread_id, answer.parent_id), (question.thread_id, question.pk))
+        self.assertEqual(MessageThread.objects.get(pk=question.thread_id).message_count, 2)
@@ -0,0 +1,181 @@
+# sitio_web/threads.py
+
+import re
+
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, When
+from django.utils import timezone
+
+from .models import Message, MessageThread, Profile
+from .unread import message_created
+
+# "Re: ", "RE:", "Re: Re: " ... al comienzo del asunto.
+REPLY_PREFIX = re.compile(r'^(\s*re\s*:\s*)+', re.IGNORECASE)
+
+# Mensajes por lote (y por transacción) al agrupar en hilos los mensajes existentes.
+BACKFILL_BATCH_SIZE = 2000
+
+
+def thread_subject(subject):
+    """
+    Asunto de la conversación: el del mensaje sin los "Re:" de las respuestas.
+    """
+    return REPLY_PREFIX.sub('', subject or '').strip()
+
+
+def _record_in_thread(message, thread):
+    # Lo desnormalizado del hilo y el contador de no leídos del mensaje nuevo.
+    MessageThread.objects.filter(pk=thread.pk).update(
+        last_message=message,
+        last_message_at=message.sent_at,
+        message_count=F('message_count') + 1,
+    )
+    thread.participants.add(message.sender_id)
+    message_created(message)
+
+
+def post_message(message, client=None, parent=None):
+    """
+    Guarda `message` (con sender, receiver y project ya puestos) en su
+    conversación: la del mensaje `parent` al que responde o, si no hay,
+    una nueva con `client` como cliente. Actualiza lo desnormalizado del
+    hilo y el contador de no leídos, todo en la misma transacción.
+    """
+    with transaction.atomic():
+        if parent is not None and parent.thread_id:
+            thread = MessageThread(pk=parent.thread_id)
+        else:
+            thread = MessageThread.objects.create(
+                project=message.project,
+                client=client,
+                subject=thread_subject(message.subject),
+                last_message_at=timezone.now(),
+            )
+        message.thread = thread
+        message.parent = parent
+        message.save()
+        _record_in_thread(message, thread)
+    return message
+
+
+def attach_to_thread(message):
+    """
+    Pone en una conversación un mensaje ya guardado sin post_message (admin
+    de Django, shell): la de su `parent` si tiene, o una nueva cuyo cliente es
+    el remitente o el destinatario con rol CLIENT (el criterio de
+    backfill_threads). Sin hilo, el mensaje no aparecería en las bandejas ni
+    en la búsqueda. La llama una señal post_save de Message.
+    """
+    with transaction.atomic():
+        parent_thread_id = (
+            Message.objects.filter(pk=message.parent_id).values_list('thread_id', flat=True).first()
+            if message.parent_id else None
+        )
+        if parent_thread_id:
+            thread = MessageThread(pk=parent_thread_id)
+        else:
+            client_id = (
+                Profile.objects.filter(user_id__in=[message.sender_id, message.receiver_id], role='CLIENT')
+                .order_by(Case(When(user_id=message.sender_id, then=0), default=1))
+                .values_list('user_id', flat=True)
+                .first()
+            )
+            thread = MessageThread.objects.create(
+                project_id=message.project_id,
+                client_id=client_id,
+                subject=thread_subject(message.subject),
+                last_message_at=message.sent_at,
+            )
+        Message.objects.filter(pk=message.pk).update(thread=thread)
+        message.thread = thread
+        _record_in_thread(message, thread)
+
+
+def backfill_threads(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Agrupa en conversaciones los mensajes que todavía no tienen hilo, en
+    orden de envío. Una respuesta ("Re: asunto", mismo cliente y proyecto)
+    va a la última conversación con ese asunto y apunta al mensaje anterior;
+    cualquier otro mensaje empieza una conversación.
+
+    Trabaja por lotes, cada uno en su transacción: se puede interrumpir y
+    volver a correr. Es para los mensajes creados con bulk_create (seed_load),
+    que no pasan por post_message ni por su señal. La migración 0011 tiene su
+    propia copia. Devuelve la cantidad de mensajes asignados.
+    """
+    clients = set(Profile.objects.filter(role='CLIENT').values_list('user_id', flat=True))
+
+    # (cliente, proyecto, asunto) -> [hilo, último mensaje]. Se parte de los hilos
+    # existentes para que las respuestas sigan en su conversación al retomar.
+    open_threads = {}
+    existing = MessageThread.objects.order_by('last_message_at', 'id').values_list(
+        'id', 'client_id', 'project_id', 'subject', 'last_message_id',
+    )
+    for thread_id, client_id, project_id, subject, last_message_id in existing.iterator():
+        open_threads[(client_id, project_id, subject)] = [MessageThread(pk=thread_id), last_message_id]
+
+    # El índice (thread, sent_at, id) da los pendientes en orden; cada lote sale
+    # del filtro al asignarle hilo.
+    pending = Message.objects.filter(thread__isnull=True).order_by('sent_at', 'id')
+    touched, assigned = set(), 0
+    while True:
+        rows = list(pending.values_list('id', 'sender_id', 'receiver_id', 'project_id', 'subject', 'sent_at')[:batch_size])
+        if not rows:
+            break
+
+        with transaction.atomic():
+            new_threads, placed = [], []
+            for message_id, sender_id, receiver_id, project_id, subject, sent_at in rows:
+                if sender_id in clients:
+                    client_id = sender_id
+                else:
+                    client_id = receiver_id if receiver_id in clients else None
+                key = (client_id, project_id, thread_subject(subject))
+                current = open_threads.get(key) if REPLY_PREFIX.match(subject or '') else None
+                if current is None:
+                    thread = MessageThread(project_id=project_id, client_id=client_id, subject=key[2], last_message_at=sent_at)
+                    new_threads.append(thread)
+                    current = open_threads[key] = [thread, None]
+                placed.append((message_id, current[0], current[1]))
+                current[1] = message_id
+
+            MessageThread.objects.bulk_create(new_threads)
+            Message.objects.bulk_update(
+                [Message(pk=message_id, thread_id=thread.pk, parent_id=parent_id) for message_id, thread, parent_id in placed],
+                ['thread', 'parent'],
+                batch_size=500,
+            )
+        touched.update(thread.pk for _message_id, thread, _parent_id in placed)
+        assigned += len(rows)
+
+    refresh_threads(sorted(touched))
+    return assigned
+
+
+def refresh_threads(thread_ids, chunk_size=500):
+    """
+    Recalcula último mensaje, cantidad y participantes de los hilos indicados
+    (después de asignar o borrar mensajes sin pasar por post_message). Los
+    hilos que quedaron sin mensajes se borran.
+    """
+    in_thread = Message.objects.filter(thread=OuterRef('pk'))
+    latest = in_thread.order_by('-sent_at', '-id')
+    total = in_thread.order_by().values('thread').annotate(total=Count('pk')).values('total')
+    Participant = MessageThread.participants.through
+
+    for start in range(0, len(thread_ids), chunk_size):
+        chunk = thread_ids[start:start + chunk_size]
+        with transaction.atomic():
+            MessageThread.objects.filter(pk__in=chunk).exclude(
+                pk__in=Message.objects.filter(thread_id__in=chunk).values('thread_id'),
+            ).delete()
+            MessageThread.objects.filter(pk__in=chunk).update(
+                last_message_id=Subquery(latest.values('pk')[:1]),
+                last_message_at=Subquery(latest.values('sent_at')[:1]),
+                message_count=Subquery(total),
+            )
+            senders = Message.objects.filter(thread_id__in=chunk).order_by().values_list('thread_id', 'sender_id').distinct()
+            Participant.objects.bulk_create(
+                [Participant(messagethread_id=thread_id, user_id=user_id) for thread_id, user_id in senders],
+                ignore_conflicts=True,
+            )
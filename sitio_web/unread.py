@@ -0,0 +1,199 @@
+# sitio_web/unread.py
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .backends import invalidate_cached_users
+from .models import Message, Profile, TeamInbox
+
+# Roles que comparten la bandeja del equipo (mensajes de clientes con receiver nulo).
+STAFF_ROLES = ('ADMIN', 'WORKER')
+
+# Fila única de TeamInbox (la crea la migración 0009_profile_unread_messages).
+TEAM_INBOX_ID = 1
+
+# Clave del contador del equipo en USER_CACHE_ALIAS, junto a los usuarios cacheados.
+TEAM_UNREAD_CACHE_KEY = 'unread:team'
+
+
+def team_messages(queryset=None):
+    """
+    Mensajes de la bandeja del equipo: los que envían los clientes sin
+    destinatario. Es el mismo criterio que usa staff_inbox.
+    """
+    queryset = Message.objects.all() if queryset is None else queryset
+    return queryset.filter(receiver__isnull=True, sender__profile__role='CLIENT')
+
+
+def _add(profiles, amount):
+    if not amount:
+        return
+    # update() no dispara señales: el usuario cacheado (con el contador del
+    # badge) se invalida a mano.
+    user_ids = list(profiles.values_list('user_id', flat=True))
+    if amount > 0:
+        profiles.update(unread_messages=F('unread_messages') + amount)
+    else:
+        # Greatest: si el contador ya se había desviado, no queda negativo.
+        profiles.update(unread_messages=Greatest(F('unread_messages') + amount, 0))
+    invalidate_cached_users(user_ids)
+
+
+def _add_team(amount):
+    """
+    Suma `amount` al contador compartido del staff: una sola fila, sin
+    importar cuántos perfiles del staff haya. Si la fila falta (p. ej. tras
+    vaciar la base) se recrea con el valor calculado desde Message.
+    """
+    if not amount:
+        return
+    team = TeamInbox.objects.filter(pk=TEAM_INBOX_ID)
+    if amount > 0:
+        updated = team.update(unread_messages=F('unread_messages') + amount)
+    else:
+        updated = team.update(unread_messages=Greatest(F('unread_messages') + amount, 0))
+    if not updated:
+        set_team_unread(expected_team_count())
+    else:
+        _invalidate_team_count()
+
+
+def _invalidate_team_count():
+    # Igual que invalidate_cached_users: también al confirmar, por si otra
+    # petición volvió a cachear el valor viejo mientras tanto.
+    cache = caches[settings.USER_CACHE_ALIAS]
+    cache.delete(TEAM_UNREAD_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(TEAM_UNREAD_CACHE_KEY))
+
+
+def set_team_unread(total):
+    TeamInbox.objects.update_or_create(pk=TEAM_INBOX_ID, defaults={'unread_messages': total})
+    _invalidate_team_count()
+
+
+def team_unread_count():
+    """
+    Mensajes sin leer de la bandeja del equipo, desde la caché de usuarios
+    (se invalida con cada cambio) o desde la fila de TeamInbox.
+    """
+    cache = caches[settings.USER_CACHE_ALIAS]
+    total = cache.get(TEAM_UNREAD_CACHE_KEY)
+    if total is None:
+        total = TeamInbox.objects.filter(pk=TEAM_INBOX_ID).values_list('unread_messages', flat=True).first() or 0
+        cache.set(TEAM_UNREAD_CACHE_KEY, total, settings.USER_CACHE_TIMEOUT)
+    return total
+
+
+async def ateam_unread_count():
+    cache = caches[settings.USER_CACHE_ALIAS]
+    total = await cache.aget(TEAM_UNREAD_CACHE_KEY)
+    if total is None:
+        total = await sync_to_async(team_unread_count)()
+    return total
+
+
+def message_created(message):
+    """
+    Suma el mensaje nuevo al contador de quien debe leerlo: el receptor,
+    o el contador compartido del staff si va a la bandeja del equipo.
+    Llamar dentro de la misma transacción que crea el mensaje.
+    """
+    if message.receiver_id:
+        _add(Profile.objects.filter(user_id=message.receiver_id), 1)
+    elif team_messages(Message.objects.filter(pk=message.pk)).exists():
+        _add_team(1)
+
+
+def messages_deleted(queryset):
+    """
+    Descuenta de los contadores los mensajes sin leer del queryset que se
+    van a borrar (el borrado masivo no pasa por mark_read). Llamar en la
+    misma transacción, antes del DELETE.
+    """
+    unread = queryset.filter(is_read=False)
+    _add_team(-team_messages(unread).count())
+    per_receiver = (
+        unread.filter(receiver__isnull=False)
+        .order_by()
+        .values('receiver_id')
+        .annotate(total=Count('pk'))
+        .values_list('receiver_id', 'total')
+    )
+    for receiver_id, total in per_receiver:
+        _add(Profile.objects.filter(user_id=receiver_id), -total)
+
+
+def mark_read(queryset):
+    """
+    Marca como leídos los mensajes del queryset y descuenta de los contadores
+    solo los que realmente cambiaron: el UPDATE con is_read=False evita
+    descontar dos veces si dos personas abren el mismo mensaje a la vez.
+    """
+    unread = queryset.filter(is_read=False)
+
+    team_ids = list(team_messages(unread).values_list('pk', flat=True))
+    if team_ids:
+        changed = Message.objects.filter(pk__in=team_ids, is_read=False).update(is_read=True)
+        _add_team(-changed)
+
+    receiver_ids = list(
+        unread.filter(receiver__isnull=False)
+        .order_by()
+        .values_list('receiver_id', flat=True)
+        .distinct()
+    )
+    for receiver_id in receiver_ids:
+        changed = unread.filter(receiver_id=receiver_id).update(is_read=True)
+        _add(Profile.objects.filter(user_id=receiver_id), -changed)
+
+
+def expected_team_count():
+    """
+    Valor correcto del contador compartido del staff, calculado desde Message.
+    """
+    return team_messages(Message.objects.filter(is_read=False)).count()
+
+
+def expected_counts(user_ids=None):
+    """
+    Valor correcto de cada contador personal, calculado desde Message.
+    Devuelve {user_id: cantidad} para los perfiles con mensajes sin leer
+    (de `user_ids`, si se indica).
+    """
+    unread = Message.objects.filter(is_read=False, receiver__isnull=False)
+    if user_ids is not None:
+        unread = unread.filter(receiver_id__in=user_ids)
+    return dict(
+        unread.values('receiver_id')
+        .annotate(total=Count('pk'))
+        .values_list('receiver_id', 'total')
+    )
+
+
+def initialize_counters(user_ids):
+    """
+    Pone el contador de perfiles recién creados desde expected_counts(),
+    por si el usuario ya tenía mensajes dirigidos a él. Para creaciones que
+    no disparan señales (bulk_create); el resto lo hace una señal de Profile.
+    """
+    counts = expected_counts(user_ids)
+    for user_id, total in counts.items():
+        Profile.objects.filter(user_id=user_id).update(unread_messages=total)
+    invalidate_cached_users(list(counts))
+
+
+def unread_count(user, role, team_count=None):
+    """
+    Lo que muestra el badge: el contador personal más, para el staff, el
+    de la bandeja del equipo (`team_count` si ya se leyó).
+    """
+    profile = getattr(user, 'profile', None)
+    total = profile.unread_messages if profile else 0
+    if role in STAFF_ROLES:
+        total += team_unread_count() if team_count is None else team_count
+    return total
+
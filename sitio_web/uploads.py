@@ -0,0 +1,183 @@
+# sitio_web/uploads.py
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChunkedUpload, Document
+
+# Tamaño de bloque al leer del request y al ensamblar las partes.
+STREAM_BLOCK_SIZE = 64 * 1024
+
+_PART_RE = re.compile(r'^(\d+)\.part$')
+
+
+class ChunkError(Exception):
+    """
+    Error en una parte de una subida por partes (tamaño o hash inválido).
+    """
+
+
+class AssembledFile(File):
+    """
+    Archivo ensamblado en disco. Al exponer temporary_file_path(), el
+    FileSystemStorage lo mueve a su destino en vez de copiarlo.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_dir(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, str(upload.pk))
+
+
+def _part_path(upload, index):
+    return os.path.join(upload_dir(upload), f'{index}.part')
+
+
+def received_chunks(upload):
+    """
+    Índices de las partes ya recibidas. El disco es la fuente de verdad,
+    así que partes subidas en paralelo no compiten por actualizar una fila.
+    """
+    directory = upload_dir(upload)
+    if not os.path.isdir(directory):
+        return []
+    indexes = []
+    for name in os.listdir(directory):
+        match = _PART_RE.match(name)
+        if match:
+            indexes.append(int(match.group(1)))
+    return sorted(indexes)
+
+
+def write_chunk(upload, index, stream, expected_sha256=None):
+    """
+    Escribe una parte leyendo el cuerpo del request por bloques, sin
+    cargarla completa en memoria, y calculando su SHA-256 al vuelo.
+    La parte solo queda visible (renombrada) si el tamaño y el hash cuadran.
+
+    Cada escritura usa su propio temporal (mkstemp): dos envíos de la misma
+    parte, desde otro hilo o proceso, no se pisan; gana el último rename.
+    Cada parte recibida renueva updated_at, así purge_chunked_uploads no
+    borra una subida larga que sigue avanzando.
+    """
+    if not 0 <= index < upload.total_chunks:
+        raise ChunkError(f"Índice de parte fuera de rango: {index}.")
+
+    expected_length = upload.expected_chunk_length(index)
+    directory = upload_dir(upload)
+    os.makedirs(directory, exist_ok=True)
+    final_path = _part_path(upload, index)
+    fd, temp_path = tempfile.mkstemp(prefix=f'{index}.', suffix='.tmp', dir=directory)
+
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            while True:
+                block = stream.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if written > expected_length:
+                    raise ChunkError("La parte es más grande de lo esperado.")
+                digest.update(block)
+                handle.write(block)
+
+        if written != expected_length:
+            raise ChunkError(f"Tamaño de parte inválido: {written} bytes, se esperaban {expected_length}.")
+        if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+            raise ChunkError("El SHA-256 de la parte no coincide.")
+
+        os.replace(temp_path, final_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    ChunkedUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now())
+    return digest.hexdigest()
+
+
+def assemble(upload):
+    """
+    Une las partes en orden en un único archivo, calculando el SHA-256
+    completo en la misma pasada. Devuelve (AssembledFile abierto, sha256).
+
+    Cada llamada ensambla en su propio temporal: dos finalizaciones a la vez
+    no escriben el mismo archivo (la que llega segunda se descarta al
+    guardar, ver complete_upload). Si las partes desaparecen a mitad de
+    camino (otra finalización ya terminó y limpió), es un ChunkError.
+    """
+    missing = set(range(upload.total_chunks)) - set(received_chunks(upload))
+    if missing:
+        raise ChunkError(f"Faltan {len(missing)} partes por subir.")
+
+    try:
+        fd, assembled_path = tempfile.mkstemp(prefix='assembled.', dir=upload_dir(upload))
+    except FileNotFoundError:
+        raise ChunkError("Las partes de esta subida ya no están disponibles.")
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            for index in range(upload.total_chunks):
+                with open(_part_path(upload, index), 'rb') as part:
+                    while True:
+                        block = part.read(STREAM_BLOCK_SIZE)
+                        if not block:
+                            break
+                        digest.update(block)
+                        target.write(block)
+    except FileNotFoundError:
+        if os.path.exists(assembled_path):
+            os.remove(assembled_path)
+        raise ChunkError("Las partes de esta subida ya no están disponibles.")
+
+    return AssembledFile(open(assembled_path, 'rb'), name=upload.filename), digest.hexdigest()
+
+
+def complete_upload(upload, user, assembled, digest):
+    """
+    Crea el Document de una subida ya ensamblada y la marca COMPLETADO.
+    Va dentro de una transacción (run_with_retry) y relee la subida con
+    select_for_update (en SQLite la transacción IMMEDIATE ya tiene el
+    bloqueo de escritura): si otra finalización ganó, no se crea un segundo
+    documento. Devuelve (subida, True si esta llamada la completó).
+    """
+    upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+    if upload.status == 'COMPLETADO':
+        return upload, False
+
+    doc = Document(
+        project_id=upload.project_id,
+        uploaded_by=user,
+        title=upload.title,
+        visible_to_client=upload.visible_to_client,
+        original_filename=upload.filename,
+    )
+    # El hash ya se calculó al ensamblar; el storage por contenido lo reutiliza.
+    assembled.sha256 = digest
+    doc.file.save(upload.filename, assembled, save=False)
+    doc.save()
+
+    upload.status = 'COMPLETADO'
+    upload.sha256 = digest
+    upload.document = doc
+    upload.save(update_fields=['status', 'sha256', 'document', 'updated_at'])
+    transaction.on_commit(lambda: discard(upload))
+    return upload, True
+
+
+def discard(upload):
+    """
+    Elimina las partes y el archivo ensamblado de una subida.
+    """
+    shutil.rmtree(upload_dir(upload), ignore_errors=True)
@@ -19,10 +19,16 @@ urlpatterns = [
     path('worker/project/<int:project_id>/', views.worker_project_detail, name='worker_project_detail'),
     path('worker/project/<int:project_id>/add-update/', views.worker_add_update, name='worker_add_update'),
     
+    # Serie de avance (JSON) para los gráficos de detalle de proyecto
+    path('project/<int:project_id>/progress.json', views.project_progress_series, name='project_progress_series'),
+
     # Vistas de cliente
     path('client/project/<int:project_id>/', views.client_project_detail, name='client_project_detail'),
     path('client/project/<int:project_id>/send-message/', views.client_send_message, name='client_send_message'),
     path('client/inbox/', views.client_inbox, name='client_inbox'),
+
+    # Conversaciones (cliente y staff)
+    path('messages/thread/<int:thread_id>/', views.message_thread, name='message_thread'),
     
     # Vistas de staff (admin/worker)
     path('staff/inbox/', views.staff_inbox, name='staff_inbox'),
@@ -32,6 +38,25 @@ urlpatterns = [
     path('staff/project/<int:project_id>/documents/', views.staff_project_documents, name='staff_project_documents'),
     path('staff/project/<int:project_id>/documents/upload/', views.staff_upload_document, name='staff_upload_document'),
 
+    # Subida de documentos por partes (reanudable)
+    path('staff/project/<int:project_id>/documents/uploads/', views.chunked_upload_init, name='chunked_upload_init'),
+    path('staff/uploads/<uuid:upload_id>/', views.chunked_upload_status, name='chunked_upload_status'),
+    path('staff/uploads/<uuid:upload_id>/chunks/<int:index>/', views.chunked_upload_chunk, name='chunked_upload_chunk'),
+    path('staff/uploads/<uuid:upload_id>/finalize/', views.chunked_upload_finalize, name='chunked_upload_finalize'),
+
+    # Descarga de documentos con control de permisos (todos los roles)
+    path('documents/<int:document_id>/download/', views.document_download, name='document_download'),
+
+    # Eventos en vivo (SSE, requiere servidor ASGI)
+    path('events/', views.event_stream, name='event_stream'),
+
+    # Exportaciones en streaming (filtradas por rol)
+    path('exports/projects.<str:fmt>', views.export_projects, name='export_projects'),
+    path('exports/messages.<str:fmt>', views.export_messages, name='export_messages'),
+
+    # Búsqueda (todos los roles, resultados filtrados por permisos)
+    path('buscar/', views.search, name='search'),
+
     # Gestión de usuarios (solo admin)
     # Gestión de usuarios (solo admin, rutas propias de la app, no del admin de Django)
     path('panel/usuarios/', views.admin_user_management, name='admin_user_management'),
@@ -1,13 +1,21 @@
 # sitio_web/views.py
 
-from django.shortcuts import render, redirect, get_object_or_404
+import os
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.http import HttpResponseForbidden
+from django.conf import settings
+from django.http import Http404, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from django.db.models import Exists, OuterRef
 from django.contrib import messages  # <-- Para mensajes de éxito / error
 
 from .models import (
+    ChunkedUpload,
     Profile,
     Project,
     ProjectAssignment,
@@ -23,11 +31,30 @@ from .forms import (
     UserRegisterForm,
     UserRoleForm,
 )
-
-
+from .concurrency import run_concurrently, streaming_content
+from .dashboard import aget_dashboard_data
+from .decorators import role_required
+from .downloads import serve_document
+from .events import broker, stream_events
+from .exports import FORMATS, export_filename, message_rows, project_rows, render_export
+from .http_cache import cache_anonymous_page, client_project_validators, conditional_page
+from .pagination import keyset_paginate
+from .permissions import can_view_project, can_view_thread, visible_threads
+from .progress import progress_series
+from .ratelimit import rate_limit
+from .retry import run_with_retry
+from .search import search as search_index
+from .threads import post_message, thread_subject
+from .unread import STAFF_ROLES, mark_read, team_messages
+from .uploads import ChunkError, assemble, complete_upload, received_chunks, write_chunk
+from . import tasks
+
+
+@cache_anonymous_page
 def home(request):
     """
     Página de inicio pública del sitio.
+    Para visitantes anónimos se sirve desde la caché de páginas.
     """
     context = {
         'company_name': 'CCR CONSULTORES',
@@ -36,6 +63,7 @@ def home(request):
     return render(request, 'sitio_web/home.html', context)
 
 
+@rate_limit('login')
 def custom_login(request):
     """
     Vista de inicio de sesión para todos los usuarios (admin, trabajador, cliente).
@@ -67,6 +95,7 @@ def custom_login(request):
     return render(request, 'sitio_web/login.html', context)
 
 
+@rate_limit('register')
 def register(request):
     """
     Registro de nuevos usuarios (rol CLIENT por defecto).
@@ -78,7 +107,10 @@ def register(request):
     if request.method == 'POST':
         form = UserRegisterForm(request.POST)
         if form.is_valid():
-            form.save()
+            # El hash de la contraseña (lento a propósito) se calcula antes de
+            # abrir la transacción, que solo cubre los INSERT.
+            user = form.save(commit=False)
+            run_with_retry(form.save_account, user)
             messages.success(request, 'Tu cuenta ha sido creada. Ahora puedes iniciar sesión.')
             return redirect('login')
     else:
@@ -101,13 +133,14 @@ def custom_logout(request):
 
 
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """
     Vista principal después de iniciar sesión.
     Según el rol del usuario (Profile.role), mostramos distinta información.
+    Las consultas viven en sitio_web/dashboard.py.
     """
-    profile = getattr(request.user, 'profile', None)
-    role = profile.role if profile else 'CLIENT'
+    user = await request.auser()
+    role = request.role or 'CLIENT'
 
     context = {
         'company_name': 'CCR CONSULTORES',
@@ -115,28 +148,19 @@ def dashboard(request):
         'role': role,
     }
 
+    context.update(await aget_dashboard_data(user, role))
+
     if role == 'ADMIN':
-        projects = Project.objects.all().order_by('-created_at')[:10]
-        context['projects'] = projects
         template_name = 'sitio_web/dashboard_admin.html'
-
     elif role == 'WORKER':
-        assignments = ProjectAssignment.objects.filter(
-            worker=request.user
-        ).select_related('project')
-        projects = [assignment.project for assignment in assignments]
-        context['projects'] = projects
         template_name = 'sitio_web/dashboard_worker.html'
-
     else:
-        projects = Project.objects.filter(client=request.user).order_by('-created_at')
-        context['projects'] = projects
         template_name = 'sitio_web/dashboard_client.html'
 
     return render(request, template_name, context)
 
 
-@login_required
+@role_required('WORKER', message="No tienes permiso para acceder a este proyecto.")
 def worker_project_detail(request, project_id):
     """
     Detalle de un proyecto visto por un trabajador.
@@ -145,10 +169,6 @@ def worker_project_detail(request, project_id):
     """
     project = get_object_or_404(Project, id=project_id)
 
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'WORKER':
-        return HttpResponseForbidden("No tienes permiso para acceder a este proyecto.")
-
     is_assigned = ProjectAssignment.objects.filter(
         project=project,
         worker=request.user
@@ -168,7 +188,24 @@ def worker_project_detail(request, project_id):
     return render(request, 'sitio_web/worker_project_detail.html', context)
 
 
-@login_required
+def _save_project_update(form, project, author):
+    update = form.save(commit=False)
+    update.project = project
+    update.author = author
+    update.save()
+
+    # Actualizar el porcentaje de avance del proyecto (y updated_at,
+    # que invalida el ETag de la página del cliente)
+    project.progress_percent = update.progress_percent
+    project.save(update_fields=['progress_percent', 'updated_at'])
+
+    # Variantes de la imagen: las genera el worker, fuera de la petición
+    if update.image:
+        tasks.process_update_image.enqueue(update_id=update.id)
+    return update
+
+
+@role_required('WORKER', message="No tienes permiso para actualizar este proyecto.")
 def worker_add_update(request, project_id):
     """
     Permite al trabajador agregar una nueva actualización de avance
@@ -176,10 +213,6 @@ def worker_add_update(request, project_id):
     """
     project = get_object_or_404(Project, id=project_id)
 
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'WORKER':
-        return HttpResponseForbidden("No tienes permiso para actualizar este proyecto.")
-
     is_assigned = ProjectAssignment.objects.filter(
         project=project,
         worker=request.user
@@ -191,14 +224,7 @@ def worker_add_update(request, project_id):
     if request.method == 'POST':
         form = ProjectUpdateForm(request.POST, request.FILES)
         if form.is_valid():
-            update = form.save(commit=False)
-            update.project = project
-            update.author = request.user
-            update.save()
-
-            # Actualizar el porcentaje de avance del proyecto
-            project.progress_percent = update.progress_percent
-            project.save(update_fields=['progress_percent'])
+            update = run_with_retry(_save_project_update, form, project, request.user)
 
             # MENSAJE DE ÉXITO
             messages.success(
@@ -220,23 +246,48 @@ def worker_add_update(request, project_id):
 
 
 @login_required
-def client_project_detail(request, project_id):
+def project_progress_series(request, project_id):
+    """
+    Devuelve en JSON la serie diaria de avance de un proyecto para los gráficos.
+    Se lee solo de ProjectProgressSnapshot, sin recorrer los ProjectUpdate.
+    """
+    project = get_object_or_404(Project, id=project_id)
+
+    if not can_view_project(request.user, request.role, project):
+        return HttpResponseForbidden("No tienes permiso para acceder a este proyecto.")
+
+    return JsonResponse({
+        'project': project.id,
+        'series': progress_series(project.id),
+    })
+
+
+@role_required('CLIENT', message="No tienes permiso para acceder a este proyecto.")
+@conditional_page(client_project_validators)
+async def client_project_detail(request, project_id):
     """
     Detalle de un proyecto visto por un cliente.
     Solo accesible si el proyecto pertenece a ese cliente.
     Muestra información básica, el historial de actualizaciones y documentos visibles.
+    Si el navegador ya tiene la versión vigente responde 304 sin consultar ni renderizar.
     """
-    project = get_object_or_404(Project, id=project_id)
+    user = await request.auser()
+    # Los validadores del ETag ya lo leyeron (salvo con mensajes flash pendientes).
+    project = getattr(request, 'validated_project', None)
+    if project is None:
+        project = await aget_object_or_404(Project, id=project_id)
 
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'CLIENT' or project.client != request.user:
+    if project.client_id != user.id:
         return HttpResponseForbidden("No tienes permiso para acceder a este proyecto.")
 
-    updates = ProjectUpdate.objects.filter(project=project).order_by('-date')
-    documents = Document.objects.filter(
-        project=project,
-        visible_to_client=True
-    ).order_by('-uploaded_at')
+    # Avances y documentos no dependen entre sí: se consultan a la vez.
+    updates, documents = await run_concurrently(
+        lambda: list(ProjectUpdate.objects.filter(project=project).order_by('-date')),
+        lambda: list(Document.objects.filter(
+            project=project,
+            visible_to_client=True
+        ).order_by('-uploaded_at')),
+    )
 
     context = {
         'company_name': 'CCR CONSULTORES',
@@ -248,16 +299,16 @@ def client_project_detail(request, project_id):
     return render(request, 'sitio_web/client_project_detail.html', context)
 
 
-@login_required
+@role_required('CLIENT', message="No tienes permiso para enviar mensajes sobre este proyecto.")
 def client_send_message(request, project_id):
     """
     Permite al CLIENTE enviar un mensaje asociado a uno de sus proyectos.
-    El mensaje va dirigido al equipo administrativo (receiver = None).
+    El mensaje va dirigido al equipo administrativo (receiver = None) y
+    empieza una conversación nueva.
     """
     project = get_object_or_404(Project, id=project_id)
 
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'CLIENT' or project.client != request.user:
+    if project.client_id != request.user.id:
         return HttpResponseForbidden("No tienes permiso para enviar mensajes sobre este proyecto.")
 
     if request.method == 'POST':
@@ -267,7 +318,8 @@ def client_send_message(request, project_id):
             msg.project = project
             msg.sender = request.user
             msg.receiver = None
-            msg.save()
+            # Cada mensaje nuevo del cliente abre una conversación.
+            run_with_retry(post_message, msg, client=request.user)
 
             # MENSAJE DE ÉXITO
             messages.success(
@@ -288,70 +340,150 @@ def client_send_message(request, project_id):
     return render(request, 'sitio_web/client_send_message.html', context)
 
 
-@login_required
-def client_inbox(request):
+@role_required('CLIENT', message="No tienes permiso para ver esta bandeja de entrada.")
+async def client_inbox(request):
     """
-    Bandeja de entrada para CLIENTES.
-    Muestra los mensajes enviados por el staff al cliente y los mensajes enviados por el cliente.
+    Bandeja de entrada para CLIENTES: sus conversaciones con el equipo,
+    la de actividad más reciente primero. Los mensajes se ven (y se marcan
+    como leídos) al abrir cada conversación.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'CLIENT':
-        return HttpResponseForbidden("No tienes permiso para ver esta bandeja de entrada.")
-
-    # Mensajes donde el cliente es el receptor (respuestas del staff)
-    messages_to_client = Message.objects.filter(
-        receiver=request.user
-    ).select_related('sender', 'project').order_by('-sent_at')
+    user = await request.auser()
 
-    # Mensajes enviados por el cliente
-    messages_from_client = Message.objects.filter(
-        sender=request.user
-    ).select_related('receiver', 'project').order_by('-sent_at')
+    threads = (
+        visible_threads(user, 'CLIENT')
+        .select_related('project', 'last_message__sender')
+        .annotate(has_unread=Exists(
+            Message.objects.filter(thread=OuterRef('pk'), receiver=user, is_read=False)
+        ))
+    )
+    page = await sync_to_async(keyset_paginate)(
+        threads, cursor=request.GET.get('cursor'), before=request.GET.get('before'), field='last_message_at',
+    )
 
     context = {
         'company_name': 'CCR CONSULTORES',
         'page_title': 'Mi bandeja de mensajes',
-        'messages_to_client': messages_to_client,
-        'messages_from_client': messages_from_client,
+        'threads': page,
     }
     return render(request, 'sitio_web/client_inbox.html', context)
 
 
-@login_required
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para ver los mensajes.")
 def staff_inbox(request):
     """
     Bandeja de entrada para ADMIN y WORKER.
-    Muestra todos los mensajes enviados por clientes,
-    opcionalmente filtrados por proyecto.
-    """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role not in ['ADMIN', 'WORKER']:
-        return HttpResponseForbidden("No tienes permiso para ver los mensajes.")
+    Muestra las conversaciones con clientes paginadas por cursor, opcionalmente
+    filtradas por proyecto, por no leídas y por las que el usuario participó.
+    """
+    # No leída = tiene mensajes de cliente al equipo sin leer (mismo criterio
+    # que el contador, ver sitio_web/unread.py).
+    unread = team_messages(Message.objects.filter(thread=OuterRef('pk'), is_read=False))
+    threads_qs = (
+        visible_threads(request.user, request.role)
+        .select_related('client', 'project', 'last_message__sender')
+        .annotate(has_unread=Exists(unread))
+    )
+
+    selected_project = request.GET.get('project', '')
+    if selected_project.isdigit():
+        threads_qs = threads_qs.filter(project_id=int(selected_project))
+    else:
+        selected_project = ''
 
-    messages_qs = Message.objects.filter(
-        sender__profile__role='CLIENT'
-    ).select_related('sender', 'project').order_by('-sent_at')
+    only_unread = request.GET.get('unread') == '1'
+    if only_unread:
+        threads_qs = threads_qs.filter(has_unread=True)
+
+    only_mine = request.GET.get('mine') == '1'
+    if only_mine:
+        threads_qs = threads_qs.filter(participants=request.user)
+
+    page = keyset_paginate(
+        threads_qs, cursor=request.GET.get('cursor'), before=request.GET.get('before'), field='last_message_at',
+    )
 
     context = {
         'company_name': 'CCR CONSULTORES',
         'page_title': 'Bandeja de mensajes',
-        'messages': messages_qs,
+        'threads': page,
+        'projects': Project.objects.only('id', 'name').order_by('name'),
+        'selected_project': selected_project,
+        'only_unread': only_unread,
+        'only_mine': only_mine,
     }
     return render(request, 'sitio_web/staff_inbox.html', context)
 
 
 @login_required
+def message_thread(request, thread_id):
+    """
+    Conversación completa, para su cliente y para el staff, con el
+    formulario para responder. Los mensajes (y el hilo con su proyecto)
+    salen de una sola consulta por el índice (thread, sent_at, id).
+    Abrirla marca como leídos los mensajes dirigidos a quien la ve.
+    """
+    thread_messages = list(
+        Message.objects.filter(thread_id=thread_id)
+        .select_related('thread__project', 'thread__client', 'sender')
+        .order_by('sent_at', 'id')
+    )
+    if not thread_messages:
+        raise Http404("Conversación no encontrada.")
+    thread = thread_messages[0].thread
+
+    is_staff = request.role in STAFF_ROLES
+    if not can_view_thread(request.user, request.role, thread):
+        return HttpResponseForbidden("No tienes permiso para ver esta conversación.")
+    # El staff le responde al cliente; sin cliente no hay a quién.
+    can_reply = thread.client_id is not None
+
+    if request.method == 'POST':
+        if not can_reply:
+            return HttpResponseForbidden("Esta conversación no admite respuestas.")
+        form = MessageReplyForm(request.POST)
+        if form.is_valid():
+            reply = form.save(commit=False)
+            reply.project = thread.project
+            reply.sender = request.user
+            reply.receiver = thread.client if is_staff else None
+            reply.subject = f"Re: {thread.subject}"
+            run_with_retry(post_message, reply, parent=thread_messages[-1])
+
+            messages.success(request, 'Respuesta enviada exitosamente.')
+            return redirect('message_thread', thread_id=thread.id)
+    else:
+        form = MessageReplyForm()
+
+        # Lo dirigido a quien mira: al staff, lo que el cliente mandó al equipo.
+        unread_ids = [
+            msg.pk for msg in thread_messages
+            if not msg.is_read and (msg.receiver_id is None if is_staff else msg.receiver_id == request.user.id)
+        ]
+        if unread_ids:
+            run_with_retry(mark_read, Message.objects.filter(pk__in=unread_ids))
+
+    context = {
+        'company_name': 'CCR CONSULTORES',
+        'page_title': thread.subject or 'Conversación',
+        'thread': thread,
+        'thread_messages': thread_messages,
+        'participants': list({msg.sender_id: msg.sender for msg in thread_messages}.values()),
+        'is_staff': is_staff,
+        'can_reply': can_reply,
+        'form': form,
+    }
+    return render(request, 'sitio_web/message_thread.html', context)
+
+
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para responder mensajes.")
 def staff_reply_message(request, message_id):
     """
     Permite a ADMIN o WORKER responder un mensaje enviado por un cliente.
-    Crea un nuevo Message donde el sender es el usuario staff y el receiver es el cliente.
+    Crea un nuevo Message donde el sender es el usuario staff y el receiver es
+    el cliente, dentro de la conversación del mensaje original.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role not in ['ADMIN', 'WORKER']:
-        return HttpResponseForbidden("No tienes permiso para responder mensajes.")
-
     original_message = get_object_or_404(
-        Message.objects.select_related('sender', 'project'),
+        Message.objects.select_related('sender__profile', 'project'),
         id=message_id
     )
 
@@ -367,8 +499,8 @@ def staff_reply_message(request, message_id):
             reply.project = original_message.project
             reply.sender = request.user
             reply.receiver = original_message.sender
-            reply.subject = f"Re: {original_message.subject}"
-            reply.save()
+            reply.subject = f"Re: {thread_subject(original_message.subject)}"
+            reply = run_with_retry(post_message, reply, client=original_message.sender, parent=original_message)
 
             # MENSAJE DE ÉXITO
             messages.success(
@@ -376,9 +508,12 @@ def staff_reply_message(request, message_id):
                 f'Respuesta enviada exitosamente a {original_message.sender.username}.'
             )
 
-            return redirect('staff_inbox')
+            return redirect('message_thread', thread_id=reply.thread_id)
     else:
         form = MessageReplyForm()
+        # Abrir el mensaje para responderlo lo marca como leído.
+        if not original_message.is_read:
+            run_with_retry(mark_read, Message.objects.filter(pk=original_message.pk))
 
     context = {
         'company_name': 'CCR CONSULTORES',
@@ -389,20 +524,77 @@ def staff_reply_message(request, message_id):
     return render(request, 'sitio_web/staff_reply_message.html', context)
 
 
+@login_required
+async def event_stream(request):
+    """
+    Stream SSE (text/event-stream) con los mensajes y avances nuevos que el
+    usuario puede ver según su rol. Es una vista async: bajo ASGI cada
+    conexión abierta es solo una tarea en espera, no un hilo.
+    """
+    user = await request.auser()
+    role = request.role
+
+    project_ids = ()
+    if role == 'WORKER':
+        project_ids = [
+            project_id async for project_id in
+            ProjectAssignment.objects.filter(worker=user).values_list('project_id', flat=True)
+        ]
+
+    subscriber = broker.subscribe(user.pk, role, project_ids)
+    response = StreamingHttpResponse(stream_events(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx: no acumular la respuesta en buffer.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # -------------------------------------------------------------
-#  Gestión de documentos de proyecto por parte del staff
+#  Exportaciones (CSV / XLSX en streaming)
 # -------------------------------------------------------------
 
+def _export_response(request, rows, fmt, prefix, sheet_name):
+    if fmt not in FORMATS:
+        raise Http404("Formato de exportación no soportado.")
+    # Bajo ASGI las filas se generan por lotes en un hilo, sin armar el archivo en memoria.
+    content = streaming_content(request, render_export(rows, fmt, sheet_name))
+    response = StreamingHttpResponse(content, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(prefix, fmt)}"'
+    return response
+
+
 @login_required
+def export_projects(request, fmt):
+    """
+    Planilla de proyectos con su último avance. Cada rol exporta solo los
+    proyectos que ve en su panel.
+    """
+    role = request.role or 'CLIENT'
+    return _export_response(request, project_rows(request.user, role), fmt, 'proyectos', 'Proyectos')
+
+
+@login_required
+def export_messages(request, fmt):
+    """
+    Historial de mensajes. El staff puede filtrar por cliente (?client=<id>);
+    el cliente exporta solo sus conversaciones.
+    """
+    role = request.role or 'CLIENT'
+    client_id = request.GET.get('client', '')
+    client_id = int(client_id) if client_id.isdigit() else None
+    return _export_response(request, message_rows(request.user, role, client_id), fmt, 'mensajes', 'Mensajes')
+
+
+# -------------------------------------------------------------
+#  Gestión de documentos de proyecto por parte del staff
+# -------------------------------------------------------------
+
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para ver los documentos de este proyecto.")
 def staff_project_documents(request, project_id):
     """
     Vista para que ADMIN y WORKER vean los documentos de un proyecto
     y accedan a la subida de nuevos documentos.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role not in ['ADMIN', 'WORKER']:
-        return HttpResponseForbidden("No tienes permiso para ver los documentos de este proyecto.")
-
     project = get_object_or_404(Project, id=project_id)
     documents = Document.objects.filter(project=project).order_by('-uploaded_at')
 
@@ -415,15 +607,11 @@ def staff_project_documents(request, project_id):
     return render(request, 'sitio_web/staff_project_documents.html', context)
 
 
-@login_required
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para subir documentos para este proyecto.")
 def staff_upload_document(request, project_id):
     """
     Permite a ADMIN o WORKER subir un nuevo documento para un proyecto.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role not in ['ADMIN', 'WORKER']:
-        return HttpResponseForbidden("No tienes permiso para subir documentos para este proyecto.")
-
     project = get_object_or_404(Project, id=project_id)
 
     if request.method == 'POST':
@@ -432,7 +620,7 @@ def staff_upload_document(request, project_id):
             doc = form.save(commit=False)
             doc.project = project
             doc.uploaded_by = request.user
-            doc.save()
+            run_with_retry(doc.save)
 
             messages.success(request, f'Documento "{doc.title}" subido correctamente.')
             return redirect('staff_project_documents', project_id=project.id)
@@ -449,19 +637,172 @@ def staff_upload_document(request, project_id):
 
 
 # -------------------------------------------------------------
-#  Gestión de usuarios (solo ADMIN)
+#  Subida de documentos por partes (reanudable)
+#  Protocolo: init -> PUT de cada parte numerada -> finalize.
 # -------------------------------------------------------------
 
+def _upload_status(upload):
+    data = {
+        'upload_id': str(upload.pk),
+        'status': upload.status,
+        'chunk_size': upload.chunk_size,
+        'total_size': upload.total_size,
+        'total_chunks': upload.total_chunks,
+        'received': received_chunks(upload),
+    }
+    if upload.document_id:
+        data['document_id'] = upload.document_id
+        data['redirect'] = reverse('staff_project_documents', args=[upload.project_id])
+    return data
+
+
+def _get_own_upload(request, upload_id):
+    return get_object_or_404(ChunkedUpload, pk=upload_id, uploaded_by=request.user)
+
+
+@require_POST
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para subir documentos para este proyecto.")
+def chunked_upload_init(request, project_id):
+    """
+    Inicia una subida por partes y devuelve el tamaño de parte a usar.
+    """
+    project = get_object_or_404(Project, id=project_id)
+
+    title = request.POST.get('title', '').strip()
+    filename = os.path.basename(request.POST.get('filename', '').strip())
+    try:
+        total_size = int(request.POST.get('size', ''))
+    except ValueError:
+        total_size = -1
+
+    if not title or not filename or total_size < 0:
+        return JsonResponse({'error': "Faltan el título, el nombre o el tamaño del archivo."}, status=400)
+    if total_size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return JsonResponse({'error': "El archivo supera el tamaño máximo permitido."}, status=400)
+
+    upload = run_with_retry(
+        ChunkedUpload.objects.create,
+        project=project,
+        uploaded_by=request.user,
+        title=title[:200],
+        visible_to_client=request.POST.get('visible_to_client') in ('1', 'true', 'on'),
+        filename=filename,
+        total_size=total_size,
+        chunk_size=settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+    )
+    return JsonResponse(_upload_status(upload), status=201)
+
+
+@require_GET
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para subir documentos.")
+def chunked_upload_status(request, upload_id):
+    """
+    Estado de una subida: qué partes ya llegaron, para reanudarla.
+    """
+    return JsonResponse(_upload_status(_get_own_upload(request, upload_id)))
+
+
+@require_http_methods(['PUT'])
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para subir documentos.")
+def chunked_upload_chunk(request, upload_id, index):
+    """
+    Recibe una parte numerada como cuerpo binario del request.
+    Se puede reenviar una parte: la nueva reemplaza a la anterior.
+    """
+    upload = _get_own_upload(request, upload_id)
+    if upload.status != 'EN_PROGRESO':
+        return JsonResponse({'error': "La subida ya fue finalizada."}, status=409)
+
+    try:
+        digest = write_chunk(upload, index, request, request.headers.get('X-Chunk-SHA256'))
+    except ChunkError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    return JsonResponse({'index': index, 'sha256': digest})
+
+
+@require_POST
+@role_required('ADMIN', 'WORKER', message="No tienes permiso para subir documentos.")
+def chunked_upload_finalize(request, upload_id):
+    """
+    Ensambla las partes y crea el Document. Si el cliente envía el
+    SHA-256 del archivo completo, se verifica antes de guardar. Finalizar
+    dos veces a la vez (doble clic, reintento) crea un solo documento.
+    """
+    upload = _get_own_upload(request, upload_id)
+    if upload.status == 'COMPLETADO':
+        return JsonResponse(_upload_status(upload))
+
+    try:
+        assembled, digest = assemble(upload)
+    except ChunkError as exc:
+        upload.refresh_from_db()
+        if upload.status == 'COMPLETADO':
+            # Otra finalización terminó mientras tanto y limpió las partes.
+            return JsonResponse(_upload_status(upload))
+        return JsonResponse({'error': str(exc), **_upload_status(upload)}, status=400)
+
+    expected = request.POST.get('sha256', '').lower()
+    if expected and expected != digest:
+        assembled.close()
+        os.remove(assembled.temporary_file_path())
+        return JsonResponse({'error': "El SHA-256 del archivo no coincide."}, status=400)
+
+    with assembled:
+        upload, completed = run_with_retry(complete_upload, upload, request.user, assembled, digest)
+
+    if completed:
+        messages.success(request, f'Documento "{upload.title}" subido correctamente.')
+    return JsonResponse(_upload_status(upload))
+
+
 @login_required
+def document_download(request, document_id):
+    """
+    Descarga de un documento con control de permisos:
+    ADMIN cualquiera, WORKER solo de proyectos asignados y CLIENT solo
+    de sus proyectos y si el documento es visible para el cliente.
+    El archivo se transmite por bloques y admite descargas reanudables (Range).
+    """
+    document = get_object_or_404(Document.objects.select_related('project'), id=document_id)
+
+    allowed = can_view_project(request.user, request.role, document.project)
+    if request.role == 'CLIENT' and not document.visible_to_client:
+        allowed = False
+    if not allowed:
+        return HttpResponseForbidden("No tienes permiso para descargar este documento.")
+
+    return serve_document(request, document)
+
+
+@login_required
+def search(request):
+    """
+    Búsqueda de texto completo en mensajes, documentos, avances y proyectos,
+    filtrada según lo que el rol del usuario puede ver.
+    """
+    query = request.GET.get('q', '').strip()
+    results = search_index(request.user, request.role, query) if query else []
+
+    context = {
+        'company_name': 'CCR CONSULTORES',
+        'page_title': 'Buscar',
+        'query': query,
+        'results': results,
+    }
+    return render(request, 'sitio_web/search.html', context)
+
+
+# -------------------------------------------------------------
+#  Gestión de usuarios (solo ADMIN)
+# -------------------------------------------------------------
+
+@role_required('ADMIN', message="No tienes permiso para acceder a esta sección.")
 def admin_user_management(request):
     """
     Panel de gestión de usuarios solo para ADMIN.
     Muestra listado de usuarios y sus roles.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'ADMIN':
-        return HttpResponseForbidden("No tienes permiso para acceder a esta sección.")
-
     users = (
         User.objects.all()
         .select_related('profile')
@@ -476,22 +817,18 @@ def admin_user_management(request):
     return render(request, 'sitio_web/admin_user_management.html', context)
 
 
-@login_required
+@role_required('ADMIN', message="No tienes permiso para editar usuarios.")
 def admin_edit_user_role(request, user_id):
     """
     Permite al ADMIN cambiar el rol de un usuario.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'ADMIN':
-        return HttpResponseForbidden("No tienes permiso para editar usuarios.")
-
     user_to_edit = get_object_or_404(User, id=user_id)
     user_profile, created = Profile.objects.get_or_create(user=user_to_edit)
 
     if request.method == 'POST':
         form = UserRoleForm(request.POST, instance=user_profile)
         if form.is_valid():
-            form.save()
+            run_with_retry(form.save)
             messages.success(request, f'Rol de {user_to_edit.username} actualizado correctamente.')
             return redirect('admin_user_management')
     else:
@@ -506,15 +843,17 @@ def admin_edit_user_role(request, user_id):
     return render(request, 'sitio_web/admin_edit_user_role.html', context)
 
 
-@login_required
+def _deactivate_user(user):
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    tasks.delete_user.enqueue(user_id=user.id)
+
+
+@role_required('ADMIN', message="No tienes permiso para eliminar usuarios.")
 def admin_delete_user(request, user_id):
     """
     Permite al ADMIN eliminar un usuario.
     """
-    profile = getattr(request.user, 'profile', None)
-    if not profile or profile.role != 'ADMIN':
-        return HttpResponseForbidden("No tienes permiso para eliminar usuarios.")
-
     user_to_delete = get_object_or_404(User, id=user_id)
 
     # No permitir que el admin se elimine a sí mismo
@@ -524,8 +863,9 @@ def admin_delete_user(request, user_id):
 
     if request.method == 'POST':
         username = user_to_delete.username
-        user_to_delete.delete()
-        messages.success(request, f'Usuario {username} eliminado correctamente.')
+        # Se desactiva de inmediato; el borrado en cascada lo hace el worker.
+        run_with_retry(_deactivate_user, user_to_delete)
+        messages.success(request, f'Usuario {username} desactivado; se eliminará en segundo plano.')
         return redirect('admin_user_management')
 
     context = {